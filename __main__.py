@@ -3,13 +3,24 @@ import sys
 import subprocess
 import tempfile
 
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QAction, QFileDialog, QMenu
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QTabWidget, QAction, QFileDialog, QMenu, QMessageBox, QProgressBar, QPushButton
+)
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt, QSize, pyqtSignal
 from classes.EditorTab import EditorTab
+from classes.ModuleInspector import module_inspector
+from classes.WorkspaceIndex import workspace_index
+from classes.FileSearch import FileSearch
+from classes.SearchResultsPanel import SearchResultsPanel
+from classes.LargeFileViewer import LargeFileViewer
+from classes.SaveService import save_service
+from classes.TabState import TabStateUpdater, tab_state, window_title
+from classes.TabPlaceholder import TabPlaceholder
 
 from config.Config import config
 from extras.utils import FindReplaceDialog, RAction
+from extras.session import load_session, save_session
 
 class DetachedTabWindow(QMainWindow):
     tab_reattached = pyqtSignal(EditorTab)  # Señal para devolver la pestaña al editor principal
@@ -18,14 +29,16 @@ class DetachedTabWindow(QMainWindow):
         super().__init__(parent)
         self.editor = EditorTab()
         self.editor_tab = editor_tab  # Mantener referencia del EditorTab
-        self.setWindowTitle(editor_tab.file_path if editor_tab.file_path else "Untiled")
+        self.tab_state = TabStateUpdater(self.apply_tab_state, self)
         self.setCentralWidget(self.editor)
         self.resize(800, 600)
         
         #Establecer los valores necesarios:
-        self.editor.setPlainText(editor_tab.toPlainText())
+        self.editor.set_text(editor_tab.toPlainText())
         self.editor.set_file_path(editor_tab.get_file_path())
-        self.editor.original_content = editor_tab.original_content
+        self.editor.copy_saved_state(editor_tab)
+        self.tab_state.watch(self.editor)
+        self.apply_tab_state(self.editor)
 
         # Barra de herramientas con botón para regresar el tab
         toolbar = self.addToolBar('Detached Toolbar')
@@ -91,22 +104,26 @@ class DetachedTabWindow(QMainWindow):
 
     def reattach_tab(self):
         """Devuelve la pestaña a la ventana principal."""
-        self.editor_tab.setPlainText(self.editor.toPlainText())
+        self.editor_tab.set_text(self.editor.toPlainText())
         self.editor_tab.set_file_path(self.editor.get_file_path())
-        self.editor_tab.original_content = self.editor.original_content
+        self.editor_tab.copy_saved_state(self.editor)
         self.tab_reattached.emit(self.editor_tab)  # Emitir señal para devolver el tab
         self.close()
     
     def closeEvent(self, event):
         self.reattach_tab()
         event.accept()
+
+    def apply_tab_state(self, editor):
+        """Muestra en el título de la ventana la ruta del editor y si tiene cambios sin guardar."""
+        title = window_title(editor)
+        if self.windowTitle() != title:
+            self.setWindowTitle(title)
+        self.setWindowModified(tab_state(editor)[2])
     
     def save_current_file(self):
         if isinstance(self.editor, EditorTab) and self.editor.file_path:
-            with open(self.editor.get_file_path(), 'w') as f:
-                f.write(self.editor.toPlainText())
-            self.editor.mark_as_saved()
-            #self.update_this_tab_icon(editor)              Aqui se arreglaria el simbolo de guardado...
+            save_service.save(self.editor)
         else:
             self.save_current_file_as()
     
@@ -116,11 +133,7 @@ class DetachedTabWindow(QMainWindow):
             fname, _ = QFileDialog.getSaveFileName(self, 'Save file', '', "Python Files (*.py);;All Files (*)")
             if fname:
                 self.editor.set_file_path(fname)
-                with open(fname, 'w') as f:
-                    f.write(self.editor.toPlainText())
-                self.setWindowTitle(fname)
-                self.editor.mark_as_saved()
-                #self.update_this_tab_icon(self.editor)      Aqui se arreglaria el simbolo de guardado...
+                save_service.save(self.editor)
 
     def run_code(self):
         """Ejecuta el código del archivo actual."""        
@@ -177,6 +190,8 @@ class MWCodeEditor(QMainWindow):
         self.tabs.setTabsClosable(True)
         self.tabs.setMovable(True)  # Habilitar reordenamiento de pestañas
         self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.restoring = False  # Añadiendo las pestañas de la sesión: no se materializan todavía
+        self.tabs.currentChanged.connect(self.materialize_tab)  # Antes que el resto: ya verán el editor
         self.tabs.currentChanged.connect(self.update_title)
         self.setCentralWidget(self.tabs)
         
@@ -184,8 +199,27 @@ class MWCodeEditor(QMainWindow):
         self.tabs.tabBar().customContextMenuRequested.connect(self.context_menu_requested)
         
         self.find_dialog = FindReplaceDialog(self)
+        self.file_search = FileSearch(self)  # Buscar en archivos
+        self.file_search.file_matched.connect(self.on_file_matched)
+        self.file_search.search_finished.connect(self.on_file_search_finished)
+        self.search_results = SearchResultsPanel(self)
+        self.search_results.match_activated.connect(self.open_match)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.search_results)
+        self.search_results.hide()
+        save_service.file_saved.connect(self.on_file_saved)
+        module_inspector.build_site_index()  # Índice estático para el autocompletado
         
         self.unsaved_icon = QIcon('NotepadGPT/icons/handwriter.svg')
+        self.tab_state = TabStateUpdater(self.apply_tab_state, self)  # Iconos y títulos, una vez por vuelta
+
+        # Progreso de la carga por tramos de la pestaña activa
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.cancel_load_button = QPushButton("Cancelar carga")
+        self.cancel_load_button.clicked.connect(self.cancel_loading)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.statusBar().addPermanentWidget(self.cancel_load_button)
+        self.statusBar().hide()
 
         self.initUI()
         
@@ -209,13 +243,15 @@ class MWCodeEditor(QMainWindow):
     def tab_detached(self, index):
         """Desancla un tab y lo mueve a una nueva ventana."""
         widget = self.tabs.widget(index)
-        if not widget:
+        if not isinstance(widget, EditorTab) or widget.loading:
             return
 
         # Extrae el widget de la pestaña y crea una nueva ventana
         title = self.tabs.tabText(index)
         self.tabs.removeTab(index)
+        self.tab_state.unwatch(widget)
 
+        widget.highlighter.stop_lazy()
         detached_window = DetachedTabWindow(widget, title, self)
         widget.reinitialize()
         detached_window.tab_reattached.connect(self.reattach_tab)  # Conectar señal
@@ -231,10 +267,9 @@ class MWCodeEditor(QMainWindow):
         index = self.tabs.addTab(editor_tab, title)
         self.tabs.setCurrentWidget(editor_tab)
         
-        self.update_tab_icon()
-        
         # Reconectar la señal para actualizar íconos
-        editor_tab.content_changed.connect(self.update_tab_icon)
+        self.tab_state.watch(editor_tab)
+        self.tab_state.schedule(editor_tab)
 
 
     def context_menu_requested(self, pos):
@@ -285,6 +320,7 @@ class MWCodeEditor(QMainWindow):
         copy_action = RAction(self, 'copy.svg', 'Copy selected text or selected line', 'Ctrl+C', self.copy)
         paste_action = RAction(self, 'paste.svg', 'Paste of clipboard', 'Ctrl+V', self.paste)
         find_dialog = RAction(self, 'document-magnifying-glass.svg', 'Search or Replace', 'Ctrl+F', self.open_find_dialog)
+        go_to_definition = RAction(self, 'text-magnifying-glass.svg', 'Go to definition', 'F12', self.go_to_definition)
         
         # Crear barra de menús
         #file_menu.addSeparator()
@@ -304,6 +340,8 @@ class MWCodeEditor(QMainWindow):
         file_menu.addAction(cut_action)
         file_menu.addAction(copy_action)
         file_menu.addAction(paste_action)
+        file_menu.addSeparator()
+        file_menu.addAction(go_to_definition)
         
         file_menu = menubar.addMenu('&Run')
         file_menu.addAction(find_dialog)
@@ -344,13 +382,24 @@ class MWCodeEditor(QMainWindow):
         tab_index = self.tabs.addTab(editor, file_name)
         self.tabs.setCurrentWidget(editor)
         
-        editor.content_changed.connect(self.update_tab_icon)
+        self.tab_state.watch(editor)
+        editor.definition_requested.connect(self.open_definition)
+        editor.load_progress.connect(self.update_load_progress)
+        editor.load_finished.connect(self.on_load_finished)
 
     def close_tab(self, index):
         """Cierra una pestaña específica."""
         editor = self.tabs.widget(index)
         if isinstance(editor, EditorTab):
-            editor.content_changed.disconnect(self.update_tab_icon)
+            editor.cancel_loading()
+            self.tab_state.unwatch(editor)
+            editor.load_progress.disconnect(self.update_load_progress)
+            editor.load_finished.disconnect(self.on_load_finished)
+            editor.definition_requested.disconnect(self.open_definition)
+            editor.highlighter.stop_lazy()
+            editor.hide_completion_popup()
+        elif isinstance(editor, LargeFileViewer):
+            editor.close_file()
         self.tabs.removeTab(index)
 
 
@@ -358,23 +407,189 @@ class MWCodeEditor(QMainWindow):
         """Abre un archivo y crea una nueva pestaña para él."""
         fname, _ = QFileDialog.getOpenFileName(self, 'Open file', '', "Python Files (*.py);;All Files (*)")
         if fname:
-            with open(fname, 'r') as f:
+            self.open_path(fname)
+
+    def open_path(self, fname):
+        """Abre un archivo en una pestaña nueva, o activa la suya si ya está abierto. Devuelve el editor."""
+        target = os.path.normcase(os.path.abspath(fname))
+        for i in range(self.tabs.count()):
+            editor = self.tabs.widget(i)
+            path = isinstance(editor, (EditorTab, LargeFileViewer, TabPlaceholder)) and editor.get_file_path()
+            if path and os.path.normcase(os.path.abspath(path)) == target:
+                self.tabs.setCurrentIndex(i)  # Si es de la sesión restaurada, aquí se crea su editor
+                editor = self.tabs.widget(i)
+                if not isinstance(editor, TabPlaceholder):
+                    return editor
+                self.tabs.removeTab(i)  # No se pudo abrir al restaurarla: se vuelve a intentar abajo
+                editor.deleteLater()
+                break
+
+        widget = self.create_file_widget(fname)
+        self.tabs.addTab(widget, os.path.basename(fname))
+        self.tabs.setTabToolTip(self.tabs.indexOf(widget), fname)
+        self.tabs.setCurrentWidget(widget)
+        return widget
+
+    def create_file_widget(self, fname):
+        """Crea el editor de un archivo (o el visor, si es enorme) ya conectado a la ventana, sin añadirlo."""
+        if os.path.getsize(fname) >= config.large_file_threshold:
+            return LargeFileViewer(fname)  # Demasiado grande para el editor: solo lectura
+
+        editor = EditorTab(file_path=fname)
+        editor.load_progress.connect(self.update_load_progress)
+        editor.load_finished.connect(self.on_load_finished)
+        if os.path.getsize(fname) >= config.stream_load_threshold:
+            editor.load_file(fname)  # Por tramos en segundo plano
+        else:
+            with open(fname, 'r', encoding=config.encoding_files) as f:
                 data = f.read()
-            editor = EditorTab(file_path=fname)
-            editor.setPlainText(data)
-            #editor.setStyleSheet(self.actual_theme)
-            tab_index = self.tabs.addTab(editor, fname.split('/')[-1])
-            self.tabs.setCurrentWidget(editor)
-            
+            editor.set_text(data)
             editor.mark_as_saved()
-            editor.content_changed.connect(self.update_tab_icon)
-            editor.highlighter.rehighlight()
+        #editor.setStyleSheet(self.actual_theme)
+        self.tab_state.watch(editor)
+        editor.definition_requested.connect(self.open_definition)
+        return editor
+
+    def materialize_tab(self, index):
+        """Sustituye una pestaña de la sesión restaurada por su editor la primera vez que se activa."""
+        placeholder = self.tabs.widget(index)
+        if self.restoring or not isinstance(placeholder, TabPlaceholder):
+            return
+        path = placeholder.get_file_path()
+        try:
+            widget = self.create_file_widget(path)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error al abrir el archivo {path}: {e}")
+            placeholder.setText(f"No se pudo abrir {path}: {e}")
+            return
+        title = self.tabs.tabText(index)
+        self.tabs.blockSignals(True)  # Cambia el widget, no la pestaña activa
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, widget, title)
+        self.tabs.setTabToolTip(index, path)
+        self.tabs.setCurrentIndex(index)
+        self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+        widget.restore_view_state(placeholder.view_state())
+
+    def restore_session(self):
+        """
+        Reabre las pestañas de la última sesión. Cada una empieza como un
+        TabPlaceholder y solo se lee su archivo al activarla, así que reabrir
+        muchas pestañas es casi instantáneo. Devuelve si se reabrió alguna.
+        """
+        session = load_session(config.session_file)
+        if session is None:
+            return False
+        tabs, current = session
+        current_index = 0
+        self.restoring = True
+        for i, tab in enumerate(tabs):
+            path = tab["path"]
+            if not os.path.isfile(path):
+                continue  # Se borró o se movió desde la última sesión
+            index = self.tabs.addTab(TabPlaceholder(path, tab), os.path.basename(path))
+            self.tabs.setTabToolTip(index, path)
+            if i == current:
+                current_index = index
+        self.restoring = False
+        if self.tabs.count() == 0:
+            return False
+        if self.tabs.currentIndex() == current_index:
+            # Ya era la activa mientras se restauraba: no habrá aviso de cambio
+            self.materialize_tab(current_index)
+            self.update_title(current_index)
+            self.on_tab_changed(current_index)
+        else:
+            self.tabs.setCurrentIndex(current_index)
+        return True
+
+    def save_session(self):
+        """Guarda las pestañas con archivo y su posición para reabrirlas en el próximo inicio."""
+        tabs = []
+        current = 0
+        for i in range(self.tabs.count()):
+            widget = self.tabs.widget(i)
+            if not isinstance(widget, (EditorTab, LargeFileViewer, TabPlaceholder)) or not widget.get_file_path():
+                continue
+            if i == self.tabs.currentIndex():
+                current = len(tabs)
+            tabs.append(dict(widget.view_state(), path=os.path.abspath(widget.get_file_path())))
+        save_session(config.session_file, tabs, current)
+
+    def closeEvent(self, event):
+        if config.restore_session:
+            self.save_session()
+        super().closeEvent(event)
+
+    def update_load_progress(self, *_):
+        """Muestra el progreso de carga de la pestaña activa, si se está cargando."""
+        editor = self.get_current_editor()
+        loading = editor is not None and editor.loading
+        if loading:
+            self.load_progress.setValue(editor.load_percent)
+        if self.statusBar().isVisible() != loading:
+            self.statusBar().setVisible(loading)
+
+    def on_load_finished(self, error):
+        """Cierra la pestaña si su archivo no se pudo cargar por completo."""
+        editor = self.sender()
+        if error:
+            QMessageBox.warning(self, "Error", f"No se pudo abrir {editor.get_file_path()}: {error}")
+            self.close_tab(self.tabs.indexOf(editor))
+        self.update_load_progress()
+
+    def cancel_loading(self):
+        """Cancela la carga de la pestaña activa y la cierra."""
+        editor = self.get_current_editor()
+        if editor and editor.loading:
+            self.close_tab(self.tabs.indexOf(editor))
+        self.update_load_progress()
+
+    def go_to_definition(self):
+        """Salta a la definición del nombre bajo el cursor."""
+        editor = self.get_current_editor()
+        if editor:
+            editor.go_to_definition()
+
+    def open_definition(self, path, line, column):
+        """Abre el archivo de una definición y coloca el cursor en ella."""
+        try:
+            editor = self.open_path(path)
+        except OSError as e:
+            print(f"Error al abrir el archivo {path}: {e}")
+            return
+        editor.go_to_position(line, column)
+
+    def find_in_files(self, root, search_text, pattern):
+        """Busca pattern en los archivos de root y muestra los resultados a medida que llegan."""
+        self.search_results.start(root, search_text)
+        self.file_search.start(root, pattern)
+
+    def on_file_matched(self, generation, path, matches):
+        if self.file_search.is_current(generation):
+            self.search_results.add_file(path, matches)
+
+    def on_file_search_finished(self, generation, searched, error):
+        if self.file_search.is_current(generation):
+            self.search_results.finish(searched, error)
+
+    def open_match(self, path, line, column, length):
+        """Abre el archivo de un resultado de búsqueda y selecciona la coincidencia."""
+        try:
+            editor = self.open_path(path)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error al abrir el archivo {path}: {e}")
+            return
+        editor.go_to_position(line, column, length)
+        editor.setFocus()
     
     def save_all_files(self):
-        """Guarda el archivo actual."""
+        """Guarda a la vez todas las pestañas con cambios (las escrituras van en paralelo)."""
         for i in range(self.tabs.count()):
-            editor = self.parent.tabs.widget(i)
-            self.save_file(editor, i)
+            editor = self.tabs.widget(i)
+            if isinstance(editor, EditorTab) and editor.is_modified():
+                self.save_file(editor, i)
     
     def save_current_file(self):
         """Guarda el archivo actual."""
@@ -383,14 +598,20 @@ class MWCodeEditor(QMainWindow):
         self.save_file(editor, index)
     
     def save_file(self, editor, index):
+        if isinstance(editor, EditorTab) and editor.loading:
+            return  # Aún no está todo el archivo: guardarlo lo truncaría
         if isinstance(editor, EditorTab) and editor.file_path:
-            with open(editor.get_file_path(), 'w') as f:
-                f.write(editor.toPlainText())
-            editor.mark_as_saved()
-            self.update_this_tab_icon(editor)
+            save_service.save(editor)
         else:
             self.save_file_as(editor, index)
 
+    def on_file_saved(self, path, error):
+        """Avisa si un guardado en segundo plano falló; si no, actualiza el índice del proyecto."""
+        if error:
+            QMessageBox.warning(self, "Error", f"No se pudo guardar {path}: {error}")
+        else:
+            workspace_index.refresh_path(path)
+
     def save_current_file_as(self):
         """Guarda el archivo actual con una nueva ruta."""
         editor = self.tabs.currentWidget()
@@ -403,11 +624,7 @@ class MWCodeEditor(QMainWindow):
             fname, _ = QFileDialog.getSaveFileName(self, 'Save file', '', "Python Files (*.py);;All Files (*)")
             if fname:
                 editor.set_file_path(fname)
-                with open(fname, 'w') as f:
-                    f.write(editor.toPlainText())
-                self.tabs.setTabText(index, fname.split('/')[-1])
-                editor.mark_as_saved()
-                self.update_this_tab_icon(editor)
+                save_service.save(editor)
 
     def run_code(self):
         """Ejecuta el código del archivo actual."""
@@ -476,45 +693,50 @@ class MWCodeEditor(QMainWindow):
         if index != -1:
             editor = self.tabs.widget(index)
             if isinstance(editor, EditorTab):
-                self.setWindowTitle(editor.get_file_path() or "Untitled")
-
-    def update_tab_icon(self):
-        """Actualiza el ícono de la pestaña cuando hay cambios en el contenido."""
-        current_editor = self.tabs.currentWidget()
-        if isinstance(current_editor, EditorTab):
-            tab_index = self.tabs.indexOf(current_editor)
-            file_name = current_editor.get_file_path() or "New File"
-            
-            if current_editor.is_modified():
-                # Agrega el ícono de "sin guardar" a la pestaña
-                self.tabs.setTabIcon(tab_index, self.unsaved_icon)
-            else:
-                # Elimina el ícono de "sin guardar"
-                self.tabs.setTabIcon(tab_index, QIcon())  # Sin ícono    
-                
-    def update_this_tab_icon(self, editor):
-        """Actualiza el ícono de la pestaña cuando hay cambios en el contenido."""
-        #current_editor = self.tabs.currentWidget()
-        if isinstance(editor, EditorTab):
-            tab_index = self.tabs.indexOf(editor)
-            file_name = editor.get_file_path() or "New File"
-            
-            if editor.is_modified():
-                # Agrega el ícono de "sin guardar" a la pestaña
-                self.tabs.setTabIcon(tab_index, self.unsaved_icon)
-            else:
-                # Elimina el ícono de "sin guardar"
-                self.tabs.setTabIcon(tab_index, QIcon())  # Sin ícono
+                self.tab_state.schedule(editor)
+
+    def apply_tab_state(self, editor):
+        """
+        Ajusta la pestaña de editor (ícono de cambios sin guardar, nombre y ruta
+        como descripción) y, si es la activa, el título de la ventana. Solo toca
+        lo que cambió, para no redibujar la barra de pestañas sin motivo.
+        """
+        tab_index = self.tabs.indexOf(editor)
+        if tab_index == -1:
+            return  # Se cerró o se desancló antes de actualizarse
+        name, path, modified = tab_state(editor)
+        icon = self.unsaved_icon if modified else QIcon()  # Sin ícono si no hay cambios
+        if self.tabs.tabIcon(tab_index).cacheKey() != icon.cacheKey():
+            self.tabs.setTabIcon(tab_index, icon)
+        if name and self.tabs.tabText(tab_index) != name:
+            self.tabs.setTabText(tab_index, name)  # Las pestañas sin archivo conservan su nombre
+        if self.tabs.tabToolTip(tab_index) != path:
+            self.tabs.setTabToolTip(tab_index, path)
+        if editor is self.tabs.currentWidget():
+            title = window_title(editor)
+            if self.windowTitle() != title:
+                self.setWindowTitle(title)
+            self.setWindowModified(modified)
 
     def on_tab_changed(self, index):
         editor = self.tabs.widget(index)
         if isinstance(editor, EditorTab):
             editor.update_font()
+        self.update_load_progress()
+
+        # El resaltado diferido solo avanza en la pestaña activa
+        for i in range(self.tabs.count()):
+            tab = self.tabs.widget(i)
+            if isinstance(tab, EditorTab):
+                if tab is editor:
+                    tab.highlighter.resume_lazy()
+                else:
+                    tab.highlighter.pause_lazy()
 
     def open_find_dialog(self):
         """Abre el cuadro de diálogo de buscar y reemplazar."""
-        editor = self.get_current_editor()
-        if editor:
+        editor = self.get_current_editor() or self.tabs.currentWidget()
+        if isinstance(editor, (EditorTab, LargeFileViewer)):
             self.find_dialog.set_editor(editor)
             self.find_dialog.show()
         else:
@@ -522,6 +744,11 @@ class MWCodeEditor(QMainWindow):
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(module_inspector.shutdown)
+    app.aboutToQuit.connect(workspace_index.shutdown)
     ex = MWCodeEditor()
-    ex.new_tab("Welcome!")
+    app.aboutToQuit.connect(ex.file_search.shutdown)
+    app.aboutToQuit.connect(save_service.shutdown)
+    if not (config.restore_session and ex.restore_session()):
+        ex.new_tab("Welcome!")
     sys.exit(app.exec_())
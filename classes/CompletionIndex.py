@@ -0,0 +1,80 @@
+from bisect import bisect_left, insort
+
+
+class CompletionIndex:
+    """
+    Índice ordenado de candidatos de autocompletado, agrupados por origen.
+    Las actualizaciones sustituyen la lista en vez de modificarla, así que las
+    consultas desde otro hilo siempre ven una versión completa.
+    """
+
+    # A partir de esta proporción de altas es más barato reordenar todo que insertar uno a uno
+    REBUILD_RATIO = 0.25
+
+    def __init__(self):
+        self.names = []  # Lista ordenada y sin duplicados
+        self.counts = {}  # Nombre -> número de orígenes que lo aportan
+        self.sources = {}  # Origen -> frozenset de nombres
+
+    def has_source(self, source):
+        """Indica si el origen ya está indexado."""
+        return source in self.sources
+
+    def set_source(self, source, names):
+        """Sustituye los nombres de un origen aplicando solo las diferencias."""
+        new = frozenset(names)
+        old = self.sources.get(source, frozenset())
+        if new == old:
+            return
+
+        names = list(self.names)
+        for name in old - new:
+            self._remove(names, name)
+
+        added = new - old
+        if len(added) > len(names) * self.REBUILD_RATIO:
+            for name in added:
+                self.counts[name] = self.counts.get(name, 0) + 1
+            names = sorted(self.counts)
+        else:
+            for name in added:
+                self._add(names, name)
+        self.names = names
+
+        if new:
+            self.sources[source] = new
+        else:
+            self.sources.pop(source, None)
+
+    def remove_source(self, source):
+        """Elimina todos los nombres aportados por un origen."""
+        self.set_source(source, ())
+
+    def query(self, prefix, limit=None):
+        """Devuelve, en orden, los nombres que empiezan por prefix: O(log n + k)."""
+        names = self.names
+        index = bisect_left(names, prefix)
+        result = []
+        while index < len(names) and names[index].startswith(prefix):
+            result.append(names[index])
+            if limit is not None and len(result) >= limit:
+                break
+            index += 1
+        return result
+
+    def _add(self, names, name):
+        count = self.counts.get(name, 0)
+        if not count:
+            insort(names, name)
+        self.counts[name] = count + 1
+
+    def _remove(self, names, name):
+        count = self.counts[name] - 1
+        if count:
+            self.counts[name] = count
+            return
+        del self.counts[name]
+        del names[bisect_left(names, name)]
+
+    def __len__(self):
+        return len(self.names)
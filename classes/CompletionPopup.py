@@ -0,0 +1,115 @@
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+MAX_VISIBLE_ROWS = 12  # Filas visibles del popup; solo se miden estas
+MAX_REMOVED_RUNS = 32  # A partir de aquí es más barato reiniciar el modelo que eliminar tramos
+
+
+class CompletionModel(QAbstractListModel):
+    """Lista de sugerencias; al estrechar el prefijo se eliminan filas en vez de reconstruirla."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.items[index.row()]
+        return None
+
+    def set_items(self, items):
+        """Sustituye las sugerencias, actualizando en el sitio cuando la nueva lista es una sublista."""
+        items = list(items)
+        removed_runs = self._removed_runs(items)
+        if removed_runs is None or len(removed_runs) > MAX_REMOVED_RUNS:
+            self.beginResetModel()
+            self.items = items
+            self.endResetModel()
+            return
+
+        # De atrás hacia delante para que los índices sigan siendo válidos
+        for first, last in reversed(removed_runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.items[first:last + 1]
+            self.endRemoveRows()
+
+    def _removed_runs(self, items):
+        """Tramos (inicio, fin) de filas a quitar, o None si items no es sublista de la actual."""
+        old = self.items
+        if not old or len(items) > len(old):
+            return None
+        runs = []
+        position = 0
+        for item in items:
+            start = position
+            while position < len(old) and old[position] != item:
+                position += 1
+            if position == len(old):
+                return None
+            if position > start:
+                runs.append((start, position - 1))
+            position += 1
+        if position < len(old):
+            runs.append((position, len(old) - 1))
+        return runs
+
+
+class CompletionPopup(QListView):
+    """Popup de autocompletado único, compartido por todas las pestañas."""
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Devuelve el popup compartido, creándolo la primera vez."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self.editor = None  # Pestaña que muestra el popup ahora mismo
+        self.setWindowFlags(Qt.ToolTip)
+        self.setUniformItemSizes(True)  # Permite calcular el diseño sin medir cada fila
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.completion_model = CompletionModel(self)
+        self.setModel(self.completion_model)
+        self.clicked.connect(self.on_clicked)
+
+    def show_for(self, editor, suggestions):
+        """Muestra las sugerencias debajo del cursor del editor indicado."""
+        self.editor = editor
+        if self.font() != editor.font():
+            self.setFont(editor.font())
+        self.completion_model.set_items(suggestions)
+
+        items = self.completion_model.items
+        metrics = self.fontMetrics()
+        visible = items[:MAX_VISIBLE_ROWS]
+        popup_width = max(metrics.horizontalAdvance(s) for s in visible) + 20
+        popup_height = min(len(items), MAX_VISIBLE_ROWS) * metrics.height() + 4
+        position = editor.mapToGlobal(editor.cursorRect().bottomLeft())
+        self.setGeometry(position.x(), position.y(), popup_width, popup_height)
+        self.setCurrentIndex(self.completion_model.index(0))
+        self.show()
+
+    def is_visible_for(self, editor):
+        """Indica si el popup está visible y pertenece al editor indicado."""
+        return self.isVisible() and self.editor is editor
+
+    def current_text(self):
+        """Devuelve la sugerencia seleccionada o None."""
+        index = self.currentIndex()
+        return self.completion_model.items[index.row()] if index.isValid() else None
+
+    def move_selection(self, delta):
+        """Mueve la selección delta filas sin salirse de la lista."""
+        row = self.currentIndex().row() + delta
+        if 0 <= row < self.completion_model.rowCount():
+            self.setCurrentIndex(self.completion_model.index(row))
+
+    def on_clicked(self, index):
+        if self.editor is not None:
+            self.editor.insert_completion(self.completion_model.items[index.row()])
@@ -7,16 +7,33 @@
 #)
 #from PyQt5.QtGui import QIcon, QColor, QSyntaxHighlighter, QTextCharFormat, QFont, QTextFormat, QPainter, QPen, QKeyEvent
 #from PyQt5.QtCore import Qt, QRegExp, QRect, QSize
+import os
 import re
 import ast
-import importlib
-import inspect
+import time
+import hashlib
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
 
-from PyQt5.QtWidgets import QWidget, QPlainTextEdit, QTextEdit, QListWidget, QListWidgetItem
+from PyQt5.QtWidgets import QWidget, QPlainTextEdit, QTextEdit
 from PyQt5.QtGui import QSyntaxHighlighter, QColor, QFont, QTextFormat, QTextCharFormat, QPainter, QTextCursor
-from PyQt5.QtCore import Qt, QRect, pyqtSignal
+from PyQt5.QtCore import Qt, QRect, QPoint, QTimer, pyqtSignal
 
 from config.Config import config
+from classes.ParseCache import ParseCache
+from classes.CompletionIndex import CompletionIndex
+from classes.MatchIndex import MatchIndex
+from classes.FileLoader import FileLoader
+from classes.CompletionPopup import CompletionPopup
+from classes.FuzzyMatcher import FuzzyMatcher, usage_stats
+from classes.TypeInference import TypeInference
+from classes.ModuleInspector import module_inspector
+from classes.WorkspaceIndex import workspace_index
+from extras.site_index import resolve_import
+from extras.workspace_index import module_name
+from classes.PythonLexer import (
+    PythonLexer, bracket_depth, KEYWORD, FUNCTION, ATTRIBUTE, OPERATOR, STRING, FSTRING_FIELD, COMMENT
+)
 
 class LineNumberArea(QWidget):
     def __init__(self, editor):
@@ -31,119 +48,237 @@ class LineNumberArea(QWidget):
         self.editor.line_number_area_paint_event(event)
 
 
+PENDING_STATE = -2  # Bloque aún sin resaltar en modo diferido
+LAZY_INITIAL_BLOCKS = 200  # Bloques resaltados al cargar, antes de conocer el área visible
+LAZY_MARGIN_BLOCKS = 100  # Margen alrededor del área visible
+LAZY_CHUNK_BLOCKS = 500  # Bloques por tramo en segundo plano
+LAZY_CHUNK_SECONDS = 0.008  # Tiempo máximo por pasada del temporizador
+
+_theme_formats = None
+
+
+def theme_formats():
+    """
+    Formato asociado a cada tipo de token del lexer. Se crea una vez y lo
+    comparten todos los resaltadores, así que es de solo lectura.
+    """
+    global _theme_formats
+    if _theme_formats is not None:
+        return _theme_formats
+
+    # Paleta de colores para el tema oscuro
+    dark_blue = QColor("#81A1C1")  # Palabras clave
+    light_purple = QColor("#B48EAD")  # Nombres de funciones
+    light_sky_blue = QColor("#88C0D0")  # Métodos y atributos
+    dark_orange = QColor("#D08770")  # Operadores
+    gray = QColor("#7d7573")  # Comentarios
+    light_red = QColor("#BF616A")  # Cadenas
+    yellow = QColor("#EBCB8B")  # Variables en f-strings
+
+    # Formato para palabras clave
+    keyword_format = QTextCharFormat()
+    keyword_format.setForeground(dark_blue)
+    keyword_format.setFontWeight(QFont.Bold)
+
+    # Formato para nombres de funciones
+    function_format = QTextCharFormat()
+    function_format.setForeground(light_purple)
+    function_format.setFontItalic(True)
+
+    # Formato para nombres de métodos y atributos de objetos
+    object_method_format = QTextCharFormat()
+    object_method_format.setForeground(light_sky_blue)
+
+    # Formato para operadores y condicionales
+    operator_format = QTextCharFormat()
+    operator_format.setForeground(dark_orange)
+
+    # Formato para comentarios
+    comment_format = QTextCharFormat()
+    comment_format.setForeground(gray)
+
+    # Formato para cadenas
+    string_format = QTextCharFormat()
+    string_format.setForeground(light_red)
+
+    # Formato para variables dentro de cadenas formateadas
+    fstring_variable_format = QTextCharFormat()
+    fstring_variable_format.setForeground(yellow)
+
+    _theme_formats = MappingProxyType({
+        KEYWORD: keyword_format,
+        FUNCTION: function_format,
+        ATTRIBUTE: object_method_format,
+        OPERATOR: operator_format,
+        STRING: string_format,
+        FSTRING_FIELD: fstring_variable_format,
+        COMMENT: comment_format,
+    })
+    return _theme_formats
+
+
+# Lexer común a todos los resaltadores (solo guarda la caché de tokens compartida)
+shared_lexer = PythonLexer()
+
 class PythonHighlighter(QSyntaxHighlighter):
     def __init__(self, document):
         super().__init__(document)
+        self.formats = theme_formats()  # Tabla común, de solo lectura
+        self.lexer = shared_lexer
+
+        # Resaltado diferido: solo se procesan los bloques ya recorridos por el
+        # temporizador y los visibles; el resto queda pendiente.
+        self.lazy = False
+        self.highlighted_until = -1  # Último bloque resaltado de forma contigua
+        self.visible_range = (0, -1)
+        self.lazy_timer = QTimer(self)
+        self.lazy_timer.setInterval(0)  # Se ejecuta cuando el bucle de eventos está libre
+        self.lazy_timer.timeout.connect(self.highlight_next_chunk)
+        self.appending = False  # Añadiendo un tramo cargado: sus bloques quedan pendientes sin más
+
+    def start_lazy(self):
+        """Activa el resaltado diferido; se llama antes de cargar el texto."""
+        self.lazy = True
+        self.highlighted_until = -1
+        self.visible_range = (0, LAZY_INITIAL_BLOCKS)
+        self.lazy_timer.start()
+
+    def pause_lazy(self):
+        """Detiene el trabajo en segundo plano (pestaña no visible)."""
+        self.lazy_timer.stop()
+
+    def resume_lazy(self):
+        """Reanuda el trabajo en segundo plano si quedan bloques pendientes."""
+        if self.lazy:
+            self.lazy_timer.start()
+
+    def append_pending(self, cursor, text):
+        """
+        Inserta text con cursor al final del documento (carga por tramos) dejando
+        pendientes sus bloques y el último que ya había; el resaltado diferido
+        los recorrerá sin repetir lo ya resaltado.
+        """
+        self.highlighted_until = min(self.highlighted_until, self.document().blockCount() - 2)
+        self.appending = True
+        try:
+            cursor.insertText(text)
+        finally:
+            self.appending = False
+        if not self.lazy:
+            self.lazy = True
+            self.lazy_timer.start()
+
+    def stop_lazy(self):
+        """Cancela el resaltado diferido (pestaña cerrada)."""
+        self.lazy_timer.stop()
+        self.lazy = False
+
+    def highlight_visible(self, first, last):
+        """Resalta de inmediato los bloques visibles más un margen alrededor."""
+        if not self.lazy:
+            return
+        first = max(0, first - LAZY_MARGIN_BLOCKS)
+        last = last + LAZY_MARGIN_BLOCKS
+        if last <= self.highlighted_until:
+            return
+        self.visible_range = (first, last)
+        self._rehighlight_pending(first, last)
+
+    def highlight_next_chunk(self):
+        """Resalta bloques pendientes durante un tiempo acotado."""
+        document = self.document()
+        if not self.lazy or document is None:
+            self.lazy_timer.stop()
+            return
 
-        # Paleta de colores para el tema oscuro
-        dark_blue = QColor("#81A1C1")  # Palabras clave
-        light_purple = QColor("#B48EAD")  # Nombres de funciones
-        light_sky_blue = QColor("#88C0D0")  # Métodos y atributos
-        dark_orange = QColor("#D08770")  # Operadores
-        gray = QColor("#7d7573")  # Comentarios
-        light_red = QColor("#BF616A")  # Cadenas
-        yellow = QColor("#EBCB8B")  # Variables en f-strings
-
-        # Formato para palabras clave
-        self.keyword_format = QTextCharFormat()
-        self.keyword_format.setForeground(dark_blue)
-        self.keyword_format.setFontWeight(QFont.Bold)
-
-        # Formato para nombres de funciones
-        self.function_format = QTextCharFormat()
-        self.function_format.setForeground(light_purple)
-        self.function_format.setFontItalic(True)
-
-        # Formato para nombres de métodos y atributos de objetos
-        self.object_method_format = QTextCharFormat()
-        self.object_method_format.setForeground(light_sky_blue)
-
-        # Formato para operadores y condicionales
-        self.operator_format = QTextCharFormat()
-        self.operator_format.setForeground(dark_orange)
-
-        # Formato para comentarios
-        self.comment_format = QTextCharFormat()
-        self.comment_format.setForeground(gray)
-
-        # Formato para cadenas
-        self.string_format = QTextCharFormat()
-        self.string_format.setForeground(light_red)
-
-        # Formato para variables dentro de cadenas formateadas
-        self.fstring_variable_format = QTextCharFormat()
-        self.fstring_variable_format.setForeground(yellow)
-
-        # Palabras clave
-        self.keywords = [
-            "def", "class", "import", "from", "return", "if", "else", "elif",
-            "for", "while", "try", "except", "finally", "with", "as", "yield", "lambda", "pass",
-        ]
-
-        # Operadores y condicionales
-        self.operators = [
-            r"=", r"==", r"\(", r"\)", r"\.", r"\:", r"<", r">", r"<=", r">=", r"\+", r"-", r"\*", r"/", r"%", r",", r"\[", r"\]", r"\{", r"\}",
-        ]
+        deadline = time.perf_counter() + LAZY_CHUNK_SECONDS
+        last_block = document.blockCount() - 1
+        while self.highlighted_until < last_block and time.perf_counter() < deadline:
+            first = self.highlighted_until + 1
+            self.highlighted_until = min(first + LAZY_CHUNK_BLOCKS, last_block)
+            self._rehighlight_pending(first, self.highlighted_until)
+
+        if self.highlighted_until >= last_block:
+            self.stop_lazy()
+
+    def _rehighlight_pending(self, first, last):
+        """Resalta los bloques pendientes del rango indicado."""
+        # Qt continúa por los bloques siguientes mientras cambie el estado, así
+        # que basta con lanzar el resaltado en el primer bloque pendiente de
+        # cada tramo.
+        block = self.document().findBlockByNumber(first)
+        number = first
+        while block.isValid() and number <= last:
+            if block.userState() == PENDING_STATE:
+                self.rehighlightBlock(block)
+            block = block.next()
+            number += 1
 
     def highlightBlock(self, text):
-        # Resaltado de palabras clave
-        for keyword in self.keywords:
-            for match in re.finditer(rf"\b{keyword}\b", text):
-                start, end = match.span()
-                self.setFormat(start, end - start, self.keyword_format)
-
-        # Resaltado de nombres de funciones (palabras seguidas de `(`)
-        for match in re.finditer(r"\b\w+(?=\()", text):
-            start, end = match.span()
-            self.setFormat(start, end - start, self.function_format)
-
-        # Resaltado de métodos y atributos de objetos (solo lo que sigue a un punto '.')
-        for match in re.finditer(r"\.\w+", text):
-            start, end = match.span()
-            self.setFormat(start + 1, end - start - 1, self.object_method_format)  # Excluir el '.' del resaltado
-
-        # Resaltado de operadores y condicionales
-        for operator in self.operators:
-            for match in re.finditer(operator, text):
-                start, end = match.span()
-                self.setFormat(start, end - start, self.operator_format)
-
-        # Resaltado de cadenas (incluyendo cadenas formateadas con f-string)
-        for match in re.finditer(r'f"[^"]*"|f\'[^\']*\'|"[^\"]*"|\'[^\']*\'', text):
-            start, end = match.span()
-            self.setFormat(start, end - start, self.string_format)
-
-            # Si es una f-string, resaltar variables dentro de llaves
-            if text[start] == "f":
-                for var_match in re.finditer(r"\{[^{}]*\}", text[start:end]):
-                    var_start, var_end = var_match.span()
-                    var_start += 1  # Ajustar a la posición relativa
-                    var_end -= 1  # Excluir las llaves
-                    self.setFormat(var_start + start -1, var_end - var_start + 2, self.fstring_variable_format)
-
-        # Resaltado de comentarios
-        for match in re.finditer(r"#.*", text):
-            start, end = match.span()
-            self.setFormat(start, end - start, self.comment_format)
-                
+        """Aplica un único formato a cada token de la línea (una sola pasada)."""
+        if self.appending:
+            self.setCurrentBlockState(PENDING_STATE)
+            return
+        if self.lazy:
+            number = self.currentBlock().blockNumber()
+            first_visible, last_visible = self.visible_range
+            if number > self.highlighted_until and not first_visible <= number <= last_visible:
+                self.setCurrentBlockState(PENDING_STATE)
+                return
+
+        # El estado del bloque anterior indica si venimos de una cadena triple
+        # o de corchetes abiertos. Qt solo sigue re-resaltando los bloques
+        # siguientes mientras el estado final cambie.
+        spans, state = self.lexer.lex_line(text, self.previousBlockState())
+        formats = self.formats
+        for start, length, kind in spans:
+            self.setFormat(start, length, formats[kind])
+        self.setCurrentBlockState(state)
+
+    @staticmethod
+    def opens_bracket(block):
+        """Indica si la línea deja más corchetes abiertos de los que encontró."""
+        return bracket_depth(block.userState()) > bracket_depth(block.previous().userState())
 
 
+# Expresión ("obj" o "a.b") seguida de un punto y el nombre a medio escribir, al final del texto
+ATTRIBUTE_ACCESS = re.compile(r"([A-Za-z_][\w.]*?)\.(\w*)$")
+
+# Palabras clave para autocompletar; un frozenset para que todos los índices compartan el mismo
+COMPLETION_KEYWORDS = frozenset((
+    "def", "class", "import", "from", "for", "while", "if", "else",
+    "elif", "return", "yield", "try", "except", "finally", "with",
+    "as", "pass", "break", "continue", "True", "False", "None", "lambda", "self",
+))
+
+# Un único hilo para el autocompletado de todas las pestañas
+completion_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="completion")
+
 class EditorTab(QPlainTextEdit):
     content_changed = pyqtSignal()
+    tab_state_changed = pyqtSignal()  # Cambió el estado guardado/sin guardar o la ruta (no en cada tecla)
+    completion_ready = pyqtSignal(int, object)  # (generación, sugerencias) desde el hilo de trabajo
+    definition_requested = pyqtSignal(str, int, int)  # (ruta, línea, columna) de una definición en otro archivo
+    load_progress = pyqtSignal(int)  # Porcentaje cargado del archivo que se lee por tramos
+    load_finished = pyqtSignal(str)  # Fin de la carga por tramos y mensaje de error (vacío si terminó bien)
     def __init__(self, file_path=""):
         super().__init__()
         self.file_path = file_path
         
         self.highlighter = PythonHighlighter(self.document())  # Asocia el resaltador de sintaxis
+        self.parse_cache = ParseCache(self.document(), self)  # Árbol AST compartido por el autocompletado
+        self.match_index = MatchIndex(self.document(), self)  # Coincidencias de la búsqueda activa
         self.line_number_area = LineNumberArea(self)
 
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
         self.cursorPositionChanged.connect(self.highlight_current_line)
+        self.verticalScrollBar().valueChanged.connect(self.highlight_visible_blocks)
+        self.verticalScrollBar().valueChanged.connect(self.highlight_visible_matches)
+        self.horizontalScrollBar().valueChanged.connect(self.highlight_visible_matches)
+        self.match_index.changed.connect(self.highlight_current_line)
         
-        self.completion_popup = QListWidget()  # Popup para el autocompletador
-        self.completion_popup.setWindowFlags(Qt.ToolTip)
-        self.completion_popup.itemClicked.connect(self.insert_completion)
+        self.completion_popup = CompletionPopup.instance()  # Popup del autocompletador (compartido)
         
         self.update_settings()
         self.line_number_area.update()  # Redibuja el área de números de línea
@@ -151,46 +286,114 @@ class EditorTab(QPlainTextEdit):
         self.update_line_number_area_width(0)
         self.highlight_current_line()
         
-        self.original_content = "" # Guarda el contenido original del archivo
+        # Estado guardado: longitud y resumen del texto, en vez de una segunda copia del archivo
+        self.saved_length = 0
+        self.saved_digest = content_digest("")
+        self.checked_revision = -1  # Revisión del documento ya comparada con el resumen guardado
+        self.clean_check_timer = QTimer(self)  # Comprueba si se volvió a escribir el texto guardado
+        self.clean_check_timer.setSingleShot(True)
+        self.clean_check_timer.setInterval(config.parse_debounce_ms)
+        self.clean_check_timer.timeout.connect(self.is_modified)
         self.textChanged.connect(self.notify_content_change)
+        self.modificationChanged.connect(self.tab_state_changed)
+
+        # Carga por tramos de archivos grandes: solo lectura y sin deshacer hasta terminar
+        self.file_loader = FileLoader(self)
+        self.file_loader.chunk_loaded.connect(self.on_chunk_loaded)
+        self.file_loader.load_finished.connect(self.on_load_finished)
+        self.loading = False
+        self.load_size = 0
+        self.load_percent = 0
+        self.load_hasher = None  # Resumen del texto cargado, calculado tramo a tramo
+        self.pending_position = None  # go_to_position() pedido para una línea que aún no llegó
         
         font = QFont("Arial", config.font_size)
         self.line_number_area.setFont(font) 
         
         self.completion_prefix = ""
-        self.imported_modules = {}
-        self.user_defined_elements = []
-        self.keywords = [
-            "def", "class", "import", "from", "for", "while", "if", "else", 
-            "elif", "return", "yield", "try", "except", "finally", "with", 
-            "as", "pass", "break", "continue", "True", "False", "None", "lambda", "self"
-        ]  # Lista de palabras clave para autocompletar
+        self.completion_generation = 0  # Aumenta con cada tecla; descarta resultados viejos
+        self.completion_timer = QTimer(self)
+        self.completion_timer.setSingleShot(True)
+        self.completion_timer.setInterval(config.completion_delay_ms)
+        self.completion_timer.timeout.connect(self.start_completion)
+        self.completion_ready.connect(self.on_completion_ready)
+        self.keywords = COMPLETION_KEYWORDS  # Palabras clave para autocompletar (comunes a todas las pestañas)
+
+        # Índice ordenado de candidatos; se actualiza con cada árbol nuevo
+        self.completion_index = CompletionIndex()
+        self.completion_index.set_source("keywords", self.keywords)
+        self.fuzzy_matcher = FuzzyMatcher()  # Solo se usa desde el hilo de autocompletado
+        self.type_inference = TypeInference(self.module_members, self.class_members)  # Ídem
+        self.indexed_modules = set()
+        self.parse_cache.parsed.connect(self.update_completion_index)
+        module_inspector.module_ready.connect(self.on_module_ready)
+
+        # Proyecto del archivo: aporta al autocompletado los nombres de los demás archivos
+        self.workspace_root = None
+        workspace_index.root_indexed.connect(self.on_workspace_indexed)
+        if file_path:
+            self.set_file_path(file_path)
   
 
     def trigger_completion(self):
+        """Programa el autocompletado: la pulsación de tecla no espera a las sugerencias."""
+        self.completion_generation += 1
         cursor = self.textCursor()
         cursor.select(QTextCursor.WordUnderCursor)
         self.completion_prefix = cursor.selectedText()
+        if not self.completion_prefix.isidentifier():
+            self.completion_prefix = ""
 
-        if not self.completion_prefix:
-            self.completion_popup.hide()
+        # Justo después de un punto se sugieren los miembros aunque no haya prefijo
+        if not self.completion_prefix and not self.text_before_cursor().endswith("."):
+            self.completion_timer.stop()
+            self.hide_completion_popup()
             return
 
-        suggestions = self.get_suggestions()
+        self.completion_timer.start()  # Se reinicia con cada tecla
+
+    def start_completion(self):
+        """Toma una instantánea del contexto y genera las sugerencias fuera del hilo de la interfaz."""
+        completion_executor.submit(
+            self.compute_suggestions,
+            self.completion_generation,
+            self.completion_prefix,
+            self.text_before_cursor(),
+            self.textCursor().blockNumber() + 1,
+            self.parse_cache.get_tree(),
+        )
+
+    def compute_suggestions(self, generation, prefix, text_before_cursor, line, tree):
+        """Se ejecuta en el hilo de trabajo: no debe tocar widgets ni el documento."""
+        if generation != self.completion_generation:
+            return  # Ya se ha pedido algo más reciente
+        try:
+            suggestions = self.get_suggestions(prefix, text_before_cursor, line, tree)
+        except Exception as e:
+            print(f"Error al generar sugerencias: {e}")
+            suggestions = []
+        try:
+            self.completion_ready.emit(generation, suggestions)
+        except RuntimeError:
+            pass  # La pestaña se cerró mientras tanto
+
+    def on_completion_ready(self, generation, suggestions):
+        """Muestra las sugerencias si siguen correspondiendo a lo último que se escribió."""
+        if generation != self.completion_generation:
+            return
         if suggestions:
             self.show_completion_popup(suggestions)
         else:
-            self.completion_popup.hide()
+            self.hide_completion_popup()
 
-    def get_suggestions(self):
+    def get_suggestions(self, prefix, text_before_cursor, line, tree):
         """Genera sugerencias basadas en contexto actual."""
-        text_before_cursor = self.text_before_cursor()
-        if "." in text_before_cursor:
-            return self.get_attribute_suggestions(text_before_cursor)
+        if ATTRIBUTE_ACCESS.search(text_before_cursor):
+            return self.get_attribute_suggestions(text_before_cursor, line, tree)
         elif "(" in text_before_cursor:
-            return self.get_function_arguments(text_before_cursor)
+            return self.get_function_arguments(text_before_cursor, tree)
         else:
-            return self.get_general_suggestions()
+            return self.get_general_suggestions(prefix)
 
     def text_before_cursor(self):
         """Obtiene el texto antes del cursor."""
@@ -198,91 +401,130 @@ class EditorTab(QPlainTextEdit):
         cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.KeepAnchor)
         return cursor.selectedText()
 
-    def get_general_suggestions(self):
+    def get_general_suggestions(self, prefix):
         """Sugerencias generales: palabras clave, definiciones locales y bibliotecas."""
-        keyword_suggestions = [kw for kw in ["def", "class", "import", "from", "if", "else", "return"] if kw.startswith(self.completion_prefix)]
-        user_defined_suggestions = self.get_user_defined_elements()
-        library_suggestions = self.get_library_suggestions()
-        return sorted(set(keyword_suggestions + user_defined_suggestions + library_suggestions))
+        return self.fuzzy_matcher.rank(prefix, self.completion_index.names, limit=config.completion_max_results)
 
-    def get_user_defined_elements(self):
-        """Obtiene elementos definidos por el usuario en el contexto actual."""
+    def update_completion_index(self, tree):
+        """Actualiza el índice de autocompletado con un árbol recién parseado."""
         try:
-            tree = ast.parse(self.toPlainText())
-            elements = []
-
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    elements.append(node.name)
-                elif isinstance(node, ast.ClassDef):
-                    elements.append(node.name)
-                elif isinstance(node, ast.Assign):
-                    for target in node.targets:
-                        if isinstance(target, ast.Name):
-                            elements.append(target.id)
-
-            return [e for e in elements if e.startswith(self.completion_prefix)]
+            self.completion_index.set_source("user", self.get_user_defined_elements(tree))
+
+            modules = set(self.get_imported_module_names(tree))
+            for module_name in self.indexed_modules - modules:
+                self.completion_index.remove_source("module:" + module_name)
+            for module_name in modules - self.indexed_modules:
+                self.completion_index.set_source("module:" + module_name, self.get_module_members(module_name))
+            self.indexed_modules = modules
         except Exception as e:
-            print(f"Error al obtener elementos definidos por el usuario: {e}")
-            return []
-
-    def get_library_suggestions(self):
-        """Obtiene sugerencias de bibliotecas importadas."""
-        try:
-            tree = ast.parse(self.toPlainText())
-            imported = []
-
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        imported.append(alias.name)
-                elif isinstance(node, ast.ImportFrom):
-                    imported.append(node.module)
-
-            suggestions = []
-            for module_name in imported:
-                if module_name not in self.imported_modules:
-                    try:
-                        self.imported_modules[module_name] = importlib.import_module(module_name)
-                    except ImportError:
-                        continue
-
-                module = self.imported_modules[module_name]
-                suggestions.extend(dir(module))
-
-            return [s for s in suggestions if s.startswith(self.completion_prefix)]
-        except Exception as e:
-            print(f"Error al obtener sugerencias de bibliotecas: {e}")
-            return []
-
-    def get_attribute_suggestions(self, text):
-        """Obtiene sugerencias de atributos/métodos de un objeto."""
+            print(f"Error al actualizar el índice de autocompletado: {e}")
+
+    def get_user_defined_elements(self, tree):
+        """Obtiene elementos definidos por el usuario en el árbol del documento."""
+        elements = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.FunctionDef):
+                elements.append(node.name)
+            elif isinstance(node, ast.ClassDef):
+                elements.append(node.name)
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        elements.append(target.id)
+        return elements
+
+    def get_imported_module_names(self, tree):
+        """Obtiene los nombres de los módulos importados en el árbol del documento."""
+        imported = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    imported.append(alias.name)
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                imported.append(node.module)
+        return imported
+
+    def get_module_members(self, module_name):
+        """Obtiene los nombres de los miembros de un módulo importado (vacío mientras se inspecciona)."""
+        if self.workspace_root:
+            members = workspace_index.module_members(module_name, self.workspace_root)
+            if members is not None:
+                return list(members)
+        # Los del intérprete vienen en un frozenset común: el índice lo comparte en vez de copiarlo
+        return module_inspector.member_names(module_name) or []
+
+    def module_members(self, module_name):
+        """Miembros de un módulo: primero los del proyecto, si no los del intérprete."""
+        if self.workspace_root:
+            members = workspace_index.module_members(module_name, self.workspace_root)
+            if members is not None:
+                return members
+        return module_inspector.members(module_name)
+
+    def class_members(self, module_name, class_name):
+        """Miembros de una clase de un módulo: primero los del proyecto, si no los del intérprete."""
+        if self.workspace_root:
+            members = workspace_index.class_members(module_name, class_name, self.workspace_root)
+            if members is not None:
+                return members
+        return module_inspector.class_members(module_name, class_name)
+
+    def on_workspace_indexed(self, root):
+        """Actualiza los nombres del proyecto en el índice de autocompletado."""
+        if root != self.workspace_root:
+            return
+        self.completion_index.set_source("workspace", workspace_index.completion_names(root))
+        for module_name in self.indexed_modules:
+            members = workspace_index.module_members(module_name, root)
+            if members is not None:
+                self.completion_index.set_source("module:" + module_name, list(members))
+
+    def on_module_ready(self, module_name):
+        """Añade al índice los miembros de un módulo que acaba de inspeccionarse."""
+        if module_name in self.indexed_modules:
+            self.completion_index.set_source("module:" + module_name, self.get_module_members(module_name))
+
+    def find_imported_member(self, name):
+        """Busca un miembro de los módulos importados (o de builtins) y devuelve su descripción."""
+        for module_name in [*self.indexed_modules, "builtins"]:
+            members = self.module_members(module_name)
+            if members and name in members:
+                return members[name]
+        return None
+
+    def get_attribute_suggestions(self, text, line, tree):
+        """Obtiene sugerencias de atributos/métodos de un objeto, deduciendo su tipo sin ejecutar código."""
         try:
-            obj_name = text.split(".")[-2]
-            tree = ast.parse(self.toPlainText())
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Assign):
-                    for target in node.targets:
-                        if isinstance(target, ast.Name) and target.id == obj_name:
-                            obj = eval(node.value)
-                            return dir(obj)
-            return []
+            expression, partial = ATTRIBUTE_ACCESS.search(text).groups()
+            if tree is None:
+                return []
+            module, is_package = "", False
+            if self.workspace_root and self.file_path:
+                module = module_name(self.workspace_root, self.file_path)
+                is_package = self.file_path.endswith("__init__.py")
+            members = self.type_inference.members(tree, expression, line, module, is_package)
+            # Los privados solo se sugieren si se han empezado a escribir
+            return sorted(
+                name for name in members
+                if name.startswith(partial) and (partial.startswith("_") or not name.startswith("_"))
+            )
         except Exception as e:
             print(f"Error al obtener atributos: {e}")
             return []
 
-    def get_function_arguments(self, text):
+    def get_function_arguments(self, text, tree):
         """Obtiene los argumentos de una función."""
-        func_name = text.split("(")[-2].strip()
+        func_name = re.split(r"\W+", text.split("(")[-2].strip())[-1]
         try:
-            tree = ast.parse(self.toPlainText())
+            if tree is None:
+                return []
             for node in ast.walk(tree):
                 if isinstance(node, ast.FunctionDef) and node.name == func_name:
                     return [arg.arg for arg in node.args.args]
-            if func_name in self.imported_modules:
-                func = eval(func_name)
-                if callable(func):
-                    return list(inspect.signature(func).parameters.keys())
+            member = self.find_imported_member(func_name)
+            if member:
+                kind, signature, params = member
+                return params or []
             return []
         except Exception as e:
             print(f"Error al obtener argumentos: {e}")
@@ -290,49 +532,40 @@ class EditorTab(QPlainTextEdit):
 
     def show_completion_popup(self, suggestions):
         """Muestra el popup de sugerencias."""
-        self.completion_popup.clear()
-        for suggestion in suggestions:
-            item = QListWidgetItem(suggestion)
-            self.completion_popup.addItem(item)
-
-        popup_width = max(self.fontMetrics().horizontalAdvance(s) for s in suggestions) + 20
-        popup_height = min(len(suggestions) * self.fontMetrics().height(), 300)
-        cursor_rect = self.cursorRect()
-        popup_position = self.mapToGlobal(cursor_rect.bottomLeft())
-        self.completion_popup.setGeometry(popup_position.x(), popup_position.y(), popup_width, popup_height)
-        self.completion_popup.setCurrentRow(0)
-        self.completion_popup.show()
-
-    def insert_completion(self, item):
+        self.completion_popup.show_for(self, suggestions)
+
+    def hide_completion_popup(self):
+        """Oculta el popup si lo está usando este editor."""
+        if self.completion_popup.editor is self:
+            self.completion_popup.hide()
+
+    def insert_completion(self, text):
         """Inserta la sugerencia seleccionada."""
         cursor = self.textCursor()
         cursor.select(QTextCursor.WordUnderCursor)
-        cursor.insertText(item.text())
+        if not cursor.selectedText().isidentifier():
+            cursor = self.textCursor()  # Justo tras un punto: no hay prefijo que sustituir
+        cursor.insertText(text)
         self.setTextCursor(cursor)
         self.completion_popup.hide()
+        usage_stats.record(text)
 
-
-
-
-  
     def keyPressEvent(self, event):
         cursor = self.textCursor()
 
-        if self.completion_popup.isVisible():
+        if self.completion_popup.is_visible_for(self):
             if event.key() in (Qt.Key_Return, Qt.Key_Enter, Qt.Key_Tab):  # Seleccionar opción del popup
-                current_item = self.completion_popup.currentItem()
-                if current_item:
-                    self.insert_completion(current_item)
+                current_text = self.completion_popup.current_text()
+                if current_text:
+                    self.insert_completion(current_text)
                     event.accept()
                     return
             elif event.key() == Qt.Key_Down:  # Navegar hacia abajo en el popup
-                current_row = self.completion_popup.currentRow()
-                self.completion_popup.setCurrentRow(current_row + 1)
+                self.completion_popup.move_selection(1)
                 event.accept()
                 return
             elif event.key() == Qt.Key_Up:  # Navegar hacia arriba en el popup
-                current_row = self.completion_popup.currentRow()
-                self.completion_popup.setCurrentRow(current_row - 1)
+                self.completion_popup.move_selection(-1)
                 event.accept()
                 return
             elif event.key() == Qt.Key_Escape:  # Cerrar el popup
@@ -373,6 +606,8 @@ class EditorTab(QPlainTextEdit):
             #    indent += "    "  # Aumentamos un nivel de tabulación
             if current_line[:cursor_position_in_block].strip().endswith(":") or current_line[:cursor_position_in_block].strip().endswith("{"):
                 indent += "    "
+            elif cursor.atBlockEnd() and self.highlighter.opens_bracket(cursor.block()):
+                indent += "    "  # Continuación dentro de un corchete abierto
             cursor.insertText("\n" + indent)  # Insertamos una nueva línea con la misma indentación
             event.accept()  # Aceptamos el evento
         else:
@@ -454,6 +689,8 @@ class EditorTab(QPlainTextEdit):
         cr = self.contentsRect()
         self.line_number_area.setGeometry(QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height()))
         self.viewport().update()
+        self.highlight_visible_blocks()
+        self.highlight_visible_matches()
         #print(f"Viewport: {self.viewport().geometry()}")
         #print(f"Line Number Area: {self.line_number_area.geometry()}")
     
@@ -502,16 +739,137 @@ class EditorTab(QPlainTextEdit):
             selection.cursor.clearSelection()
             extra_selections.append(selection)
 
+        extra_selections.extend(self.visible_match_selections())
         self.setExtraSelections(extra_selections)
 
+    def set_search_pattern(self, pattern):
+        """Resalta las coincidencias de pattern (re compilado) en el área visible; None las quita."""
+        self.match_index.set_pattern(pattern)
+
+    def highlight_visible_matches(self, *_):
+        """Actualiza el resaltado de coincidencias al desplazar la vista."""
+        if self.match_index.pattern is not None:
+            self.highlight_current_line()
+
+    def visible_match_selections(self):
+        """Selecciones extra para las coincidencias de la búsqueda que se ven en pantalla."""
+        if not self.match_index.count():
+            return []
+        start = self.firstVisibleBlock().position()
+        viewport = self.viewport()
+        last_block = self.cursorForPosition(QPoint(viewport.width(), viewport.height())).block()
+        end = last_block.position() + last_block.length()
+
+        match_format = QTextCharFormat()
+        match_format.setBackground(QColor("#EBCB8B").darker(160))  # Fondo de las coincidencias
+        selections = []
+        for match_start, match_end in self.match_index.matches_in(start, end):
+            selection = QTextEdit.ExtraSelection()
+            selection.format = match_format
+            selection.cursor = QTextCursor(self.document())
+            selection.cursor.setPosition(match_start)
+            selection.cursor.setPosition(match_end, QTextCursor.KeepAnchor)
+            selections.append(selection)
+        return selections
+
     def set_file_path(self, path):
         """Asigna una nueva ruta de archivo."""
         self.file_path = path
+        self.tab_state_changed.emit()
+        root = workspace_index.add_path(path) if path else None
+        if root != self.workspace_root:
+            self.workspace_root = root
+            self.completion_index.set_source("workspace", workspace_index.completion_names(root) if root else ())
+
+    def go_to_definition(self):
+        """Salta a la definición del nombre bajo el cursor, en este archivo o en otro del proyecto."""
+        cursor = self.textCursor()
+        cursor.select(QTextCursor.WordUnderCursor)
+        name = cursor.selectedText()
+        if not name.isidentifier():
+            return
+        tree = self.parse_cache.get_tree()
+
+        location = self.find_local_definition(name, tree)
+        if location:
+            self.go_to_position(*location)
+            return
+        location = self.find_workspace_definition(name, tree)
+        if location:
+            self.definition_requested.emit(*location)
+
+    def find_local_definition(self, name, tree):
+        """(línea, columna) de la definición de name en este documento, o None."""
+        if tree is None:
+            return None
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.name == name:
+                return node.lineno, node.col_offset
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name) and target.id == name:
+                        return target.lineno, target.col_offset
+        return None
+
+    def find_workspace_definition(self, name, tree):
+        """(ruta, línea, columna) de la definición de name en el proyecto, o None."""
+        if not self.workspace_root:
+            return None
+        # Si el nombre se importa, la definición está en ese módulo
+        current_module = module_name(self.workspace_root, self.file_path)
+        is_package = self.file_path.endswith("__init__.py")
+        for node in ast.walk(tree) if tree is not None else ():
+            if isinstance(node, ast.ImportFrom):
+                module = resolve_import(current_module, is_package, node)
+                for alias in node.names:
+                    if (alias.asname or alias.name) == name:
+                        definitions = workspace_index.definitions(alias.name, module, self.workspace_root, limit=1)
+                        if definitions:
+                            return definitions[0]
+                        path = workspace_index.module_path(f"{module}.{alias.name}", self.workspace_root)
+                        if path:
+                            return path, 1, 0
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if (alias.asname or alias.name) == name:
+                        path = workspace_index.module_path(alias.name, self.workspace_root)
+                        if path:
+                            return path, 1, 0
+
+        # Si no, cualquier definición con ese nombre, primero las de este proyecto
+        definitions = workspace_index.definitions(name, root=self.workspace_root, limit=1)
+        return definitions[0] if definitions else None
+
+    def go_to_position(self, line, column=0, length=0):
+        """Mueve el cursor a una línea (desde 1) y columna, seleccionando length caracteres, y la centra en pantalla."""
+        if self.loading and line >= self.document().blockCount():
+            self.pending_position = (line, column, length)  # Se aplica cuando la línea llegue completa
+            return
+        self.pending_position = None
+        block = self.document().findBlockByNumber(max(0, line - 1))
+        cursor = self.textCursor()
+        position = block.position() + min(column, block.length() - 1)
+        cursor.setPosition(position)
+        if length:
+            cursor.setPosition(min(position + length, self.document().characterCount() - 1), QTextCursor.KeepAnchor)
+        self.setTextCursor(cursor)
+        self.centerCursor()
 
     def get_file_path(self):
         """Devuelve la ruta del archivo asociada."""
         return self.file_path
 
+    def view_state(self):
+        """Posición del cursor (línea desde 1 y columna) y desplazamiento, para guardarlos en la sesión."""
+        cursor = self.textCursor()
+        return {"line": cursor.blockNumber() + 1, "column": cursor.positionInBlock(), "scroll": self.verticalScrollBar().value()}
+
+    def restore_view_state(self, state):
+        """Recupera la vista de view_state() (si aún se está cargando, solo el cursor)."""
+        self.go_to_position(state.get("line", 1), state.get("column", 0))
+        if not self.loading:
+            self.verticalScrollBar().setValue(state.get("scroll", 0))
+
     def wheelEvent(self, event):
         """Maneja el zoom con Ctrl + rueda del ratón."""
         if event.modifiers() == Qt.ControlModifier:  # Verifica si Ctrl está presionado
@@ -535,20 +893,133 @@ class EditorTab(QPlainTextEdit):
         
     def load_content(self, content):
         """Carga el contenido inicial del archivo y lo guarda como estado original."""
-        self.original_content = content
+        self.set_text(content)
+        self.mark_as_saved(content)
+
+    def load_file(self, path):
+        """
+        Carga path por tramos en segundo plano. La pestaña se puede recorrer y
+        buscar mientras llega el resto; queda en solo lectura hasta terminar.
+        """
+        self.loading = True
+        self.load_size = os.path.getsize(path)
+        self.load_percent = 0
+        self.load_hasher = new_content_hasher()
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)  # Sin una pila de deshacer del tamaño del archivo
+        self.highlighter.start_lazy()
+        self.file_loader.start(path, config.encoding_files)
+
+    def on_chunk_loaded(self, generation):
+        if not self.file_loader.is_current(generation):
+            return
+        text, bytes_read = self.file_loader.next_chunk()
+        document = self.document()
+        first_chunk = document.isEmpty()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        self.highlighter.append_pending(cursor, text)
+        document.setModified(False)
+        self.load_hasher.update(text.encode("utf-8", "surrogatepass"))
+        if first_chunk:
+            self.moveCursor(QTextCursor.Start)
+        self.highlight_visible_blocks()
+        if self.pending_position and self.pending_position[0] < document.blockCount():
+            self.go_to_position(*self.pending_position)
+        self.load_percent = min(100, bytes_read * 100 // max(1, self.load_size))
+        self.load_progress.emit(self.load_percent)
+
+    def on_load_finished(self, generation, error):
+        if not self.file_loader.is_current(generation):
+            return
+        self.loading = False
+        self.setReadOnly(False)
+        self.setUndoRedoEnabled(True)
+        if not error:
+            self.saved_length = self.document().characterCount() - 1
+            self.saved_digest = self.load_hasher.digest()
+            self.document().setModified(False)
+            if self.pending_position:
+                self.go_to_position(*self.pending_position)
+        self.load_hasher = None
+        self.load_finished.emit(error)
+
+    def cancel_loading(self):
+        """Abandona la carga en curso (lo cargado hasta ahora queda en solo lectura)."""
+        if self.loading:
+            self.file_loader.cancel()
+            self.loading = False
+            self.load_hasher = None
+            self.pending_position = None
+
+    def set_text(self, content):
+        """Sustituye el texto; en documentos grandes el resaltado se hace de forma diferida."""
+        if content.count("\n") >= config.lazy_highlight_threshold:
+            self.highlighter.start_lazy()
         self.setPlainText(content)
+        self.highlight_visible_blocks()
+
+    def highlight_visible_blocks(self, *_):
+        """Pide al resaltador los bloques visibles (solo actúa en modo diferido)."""
+        if not self.highlighter.lazy:
+            return
+        first = self.firstVisibleBlock().blockNumber()
+        visible_lines = self.viewport().height() // max(1, self.fontMetrics().height())
+        self.highlighter.highlight_visible(first, first + visible_lines)
 
     def is_modified(self):
-        """Devuelve True si el contenido actual difiere del original."""
-        return self.toPlainText() != self.original_content
+        """
+        Devuelve True si el contenido actual difiere del guardado. La pila de
+        deshacer del documento lo sabe sin mirar el texto (deshacer hasta el punto
+        guardado lo deja limpio); solo si dice que hay cambios y la longitud
+        coincide con la guardada se compara el resumen, una vez por revisión.
+        """
+        document = self.document()
+        if not document.isModified():
+            return False
+        if document.characterCount() - 1 != self.saved_length:
+            return True
+        if document.revision() != self.checked_revision:
+            self.checked_revision = document.revision()
+            if content_digest(self.toPlainText()) == self.saved_digest:
+                document.setModified(False)  # Se volvió a escribir lo guardado: limpio
+                return False
+        return document.isModified()
 
     def notify_content_change(self):
         """Emite la señal cuando hay cambios en el contenido."""
+        document = self.document()
+        if document.isModified() and document.characterCount() - 1 == self.saved_length:
+            self.clean_check_timer.start()  # Puede ser el texto guardado: is_modified() lo confirma
         self.content_changed.emit()
         
-    def mark_as_saved(self):
-        """Marca el contenido actual como guardado."""
-        self.original_content = self.toPlainText()
+    def mark_as_saved(self, content=None):
+        """Marca el contenido actual (content, si ya se tiene el texto) como guardado."""
+        if content is None:
+            content = self.toPlainText()
+        self.saved_length = self.document().characterCount() - 1
+        self.saved_digest = content_digest(content)
+        self.document().setModified(False)
+
+    def set_saved_state(self, length, digest, revision):
+        """
+        Registra un guardado hecho en segundo plano a partir de una instantánea de
+        la revisión revision. Si se ha seguido escribiendo desde entonces la
+        pestaña sigue con cambios, salvo que se vuelva a dejar como se guardó.
+        """
+        self.saved_length = length
+        self.saved_digest = digest
+        self.checked_revision = -1
+        if self.document().revision() == revision:
+            self.document().setModified(False)
+        elif self.document().isModified() and self.document().characterCount() - 1 == length:
+            self.clean_check_timer.start()
+
+    def copy_saved_state(self, editor):
+        """Toma el estado guardado de otro editor con el mismo texto (al mover la pestaña de ventana)."""
+        self.saved_length = editor.saved_length
+        self.saved_digest = editor.saved_digest
+        self.document().setModified(editor.is_modified())
 
     def reinitialize(self):
         """Reinicia las configuraciones esenciales después de mover el EditorTab."""
@@ -557,6 +1028,17 @@ class EditorTab(QPlainTextEdit):
         self.viewport().update()  # Actualiza el área de texto
         self.line_number_area.update()  # Actualiza el área de números de línea
 
+def new_content_hasher():
+    """Resumen vacío al que se van añadiendo tramos de texto codificados como en content_digest()."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def content_digest(text):
+    """Resumen del texto para reconocer el contenido guardado sin conservar una copia."""
+    hasher = new_content_hasher()
+    hasher.update(text.encode("utf-8", "surrogatepass"))
+    return hasher.digest()
+
 def count_leading_spaces(text):
     """Cuenta cuántos espacios hay al inicio del texto."""
     return len(text) - len(text.lstrip(' '))
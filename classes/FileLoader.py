@@ -0,0 +1,78 @@
+import codecs
+import io
+import queue
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from config.Config import config
+
+QUEUE_SIZE = 4  # Tramos leídos que pueden esperar a la interfaz; limita la memoria si ella va más lenta
+POLL_INTERVAL = 0.05  # Segundos entre comprobaciones de cancelación mientras la cola está llena
+
+
+class FileLoader(QObject):
+    """
+    Lee un archivo en un hilo aparte y lo decodifica por tramos de
+    config.load_chunk_bytes (con los saltos de línea normalizados, como open()).
+    Cada tramo se deja en una cola acotada y se avisa con chunk_loaded; la
+    interfaz lo recoge con next_chunk(). Cada carga nueva deja obsoleta la anterior.
+    """
+    chunk_loaded = pyqtSignal(int)  # Carga con un tramo nuevo en la cola
+    load_finished = pyqtSignal(int, str)  # Carga y mensaje de error (vacío si terminó bien)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0  # Carga vigente
+        self.chunks = queue.Queue(QUEUE_SIZE)
+
+    def start(self, path, encoding):
+        """Empieza a leer path y devuelve el número de la carga."""
+        self.generation += 1
+        self.chunks = queue.Queue(QUEUE_SIZE)
+        thread = threading.Thread(
+            target=self._run, args=(self.generation, self.chunks, path, encoding, config.load_chunk_bytes),
+            name="file-loader", daemon=True,
+        )
+        thread.start()
+        return self.generation
+
+    def cancel(self):
+        """Deja obsoleta la carga en curso; el hilo deja de leer en cuanto lo nota."""
+        self.generation += 1
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def next_chunk(self):
+        """Devuelve el siguiente tramo como (texto, bytes leídos hasta ahora)."""
+        return self.chunks.get_nowait()
+
+    def _run(self, generation, chunks, path, encoding, chunk_bytes):
+        error = ""
+        try:
+            decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+            with open(path, "rb") as f:
+                while generation == self.generation:
+                    data = f.read(chunk_bytes)
+                    text = decoder.decode(data, final=not data)
+                    if text and not self._put(generation, chunks, (text, f.tell())):
+                        return
+                    if not data:
+                        break
+        except (OSError, UnicodeDecodeError, LookupError) as e:
+            print(f"Error al cargar el archivo {path}: {e}")
+            error = str(e)
+        if generation == self.generation:
+            self.load_finished.emit(generation, error)
+
+    def _put(self, generation, chunks, chunk):
+        """Espera sitio en la cola; devuelve False si la carga se canceló mientras tanto."""
+        while generation == self.generation:
+            try:
+                chunks.put(chunk, timeout=POLL_INTERVAL)
+            except queue.Full:
+                continue
+            self.chunk_loaded.emit(generation)
+            return True
+        return False
@@ -0,0 +1,101 @@
+import multiprocessing
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from config.Config import config
+from extras.file_search import portable_pattern, find_files, search_files
+
+FILES_PER_TASK = 32  # Archivos por tarea: menos viajes entre procesos sin desequilibrar el reparto
+POLL_INTERVAL = 0.05  # Segundos entre comprobaciones de cancelación mientras buscan los procesos
+
+
+class FileSearch(QObject):
+    """
+    Busca un patrón en los archivos de una carpeta. La lista de archivos se
+    obtiene en un hilo aparte y la búsqueda se reparte entre un grupo de
+    procesos que se conserva entre búsquedas; los resultados se envían por
+    archivo a medida que llegan. Si se cancela o se agota config.search_timeout_ms,
+    los procesos se terminan (y se crean otros en la siguiente búsqueda).
+    """
+    file_matched = pyqtSignal(int, str, list)  # Búsqueda, ruta, [(línea, columna, longitud, texto)]
+    search_finished = pyqtSignal(int, int, str)  # Búsqueda, archivos revisados, mensaje de error
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0  # Búsqueda vigente
+        self.pool = None
+        self.running = 0  # Hilos de búsqueda que aún usan los procesos
+        self.lock = threading.Lock()
+
+    def start(self, root, pattern):
+        """Empieza a buscar pattern (re compilado) bajo root y devuelve el número de la búsqueda."""
+        self.cancel()
+        with self.lock:
+            self.running += 1
+        source, flags, engine = portable_pattern(pattern, config.encoding_files)
+        thread = threading.Thread(
+            target=self._run, args=(self.generation, root, (source, flags, engine, config.encoding_files)),
+            name="find-in-files", daemon=True,
+        )
+        thread.start()
+        return self.generation
+
+    def cancel(self):
+        """Deja obsoleta la búsqueda en curso y termina los procesos si aún la estaban atendiendo."""
+        self.generation += 1
+        if self.running:
+            self._terminate_pool()
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def shutdown(self):
+        """Termina los procesos de búsqueda; se llama al cerrar la aplicación."""
+        self.cancel()
+        self._terminate_pool()
+
+    def _get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(processes=config.find_in_files_workers)
+            return self.pool
+
+    def _terminate_pool(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.terminate()
+
+    def _run(self, generation, root, pattern_data):
+        deadline = time.monotonic() + config.search_timeout_ms / 1000
+        error = ""
+        files = []
+        try:
+            files = find_files(root)
+            tasks = [(files[i:i + FILES_PER_TASK],) + pattern_data for i in range(0, len(files), FILES_PER_TASK)]
+            results = self._get_pool().imap_unordered(search_files, tasks)
+            while True:
+                if generation != self.generation:
+                    return  # cancel() ya terminó los procesos con sus tareas pendientes
+                if time.monotonic() > deadline:
+                    self._terminate_pool()
+                    error = f"La búsqueda superó el tiempo máximo ({config.search_timeout_ms} ms)."
+                    break
+                try:
+                    group = results.next(POLL_INTERVAL)
+                except multiprocessing.TimeoutError:
+                    continue
+                except StopIteration:
+                    break
+                for path, matches in group:
+                    self.file_matched.emit(generation, path, matches)
+        except Exception as e:
+            print(f"Error al buscar en los archivos de {root}: {e}")
+            error = str(e)
+        finally:
+            with self.lock:
+                self.running -= 1
+        if generation == self.generation:
+            self.search_finished.emit(generation, len(files), error)
@@ -0,0 +1,258 @@
+import mmap
+import threading
+import time
+
+from PyQt5.QtWidgets import QAbstractScrollArea, QMessageBox
+from PyQt5.QtGui import QPainter, QColor, QFontDatabase
+from PyQt5.QtCore import Qt, pyqtSignal
+
+from config.Config import config
+from extras.file_search import portable_pattern
+from extras.large_file import LineIndex, map_file, find_in_file, find_process
+from extras.search import DocumentPositions, SearchTimeout, can_hang, process_results
+
+GUTTER_PADDING = 8  # Píxeles entre los números de línea y el texto
+
+
+class LargeFileViewer(QAbstractScrollArea):
+    """
+    Vista de solo lectura para archivos demasiado grandes para el editor. El
+    archivo se proyecta en memoria, el índice de líneas se construye en un
+    hilo aparte y solo se decodifican y dibujan las líneas visibles, así que
+    la memoria apenas depende del tamaño del archivo.
+    """
+    index_progress = pyqtSignal()  # El índice de líneas avanzó (desde el hilo que lo construye)
+    match_found = pyqtSignal(int, int, int, str)  # Búsqueda, inicio y fin en bytes (-1 si no hay) y error
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.encoding = config.encoding_files
+        self.data = map_file(file_path)
+        self.index = LineIndex(self.data)
+        self.closed = False
+        self.selection = None  # Coincidencia seleccionada (inicio, fin) en bytes
+        self.pending_selection = None  # Selección en una parte del archivo aún sin indexar
+        self.pending_position = None  # go_to_position() para una línea aún sin indexar
+        self.search_generation = 0
+        self.text_width = 0  # Ancho de la línea más larga dibujada hasta ahora
+
+        font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        if 0 < config.font_size < 100:
+            font.setPointSize(config.font_size)
+        self.setFont(font)
+        self.viewport().setCursor(Qt.IBeamCursor)
+
+        self.index_progress.connect(self.on_index_progress)
+        self.match_found.connect(self.on_match_found)
+        thread = threading.Thread(target=self._build_index, name="line-index", daemon=True)
+        thread.start()
+        self.update_scrollbars()
+
+    def get_file_path(self):
+        """Devuelve la ruta del archivo asociada."""
+        return self.file_path
+
+    def view_state(self):
+        """Primera línea visible, para guardarla en la sesión."""
+        first = self.verticalScrollBar().value()
+        return {"line": first + 1, "column": 0, "scroll": first}
+
+    def restore_view_state(self, state):
+        """Vuelve a mostrar la primera línea visible de view_state() (en cuanto esté indexada)."""
+        self.go_to_position(state.get("scroll", 0) + self.visible_lines() // 2 + 1)
+
+    def close_file(self):
+        """Libera la proyección del archivo; se llama al cerrar la pestaña."""
+        self.closed = True
+        self.search_generation += 1
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def _build_index(self):
+        try:
+            self.index.build(self.file_path, lambda: self.closed, self.index_progress.emit)
+        except OSError as e:
+            print(f"Error al indexar las líneas de {self.file_path}: {e}")
+        if not self.closed:
+            self.index_progress.emit()
+
+    def on_index_progress(self):
+        if self.closed:
+            return
+        self.update_scrollbars()
+        if self.pending_position:
+            self.go_to_position(*self.pending_position)
+        elif self.pending_selection:
+            self.select_bytes(*self.pending_selection)
+        self.viewport().update()
+
+    # Geometría
+
+    def line_height(self):
+        return self.fontMetrics().lineSpacing()
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.line_height())
+
+    def gutter_width(self):
+        digits = len(str(max(1, self.index.line_count())))
+        return self.fontMetrics().horizontalAdvance("9") * digits + 2 * GUTTER_PADDING
+
+    def update_scrollbars(self):
+        visible = self.visible_lines()
+        self.verticalScrollBar().setPageStep(visible)
+        self.verticalScrollBar().setRange(0, max(0, self.index.line_count() - visible))
+        text_area = self.viewport().width() - self.gutter_width()
+        self.horizontalScrollBar().setPageStep(max(1, text_area))
+        self.horizontalScrollBar().setRange(0, max(0, self.text_width - text_area))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def keyPressEvent(self, event):
+        if event.modifiers() & Qt.ControlModifier and event.key() in (Qt.Key_Home, Qt.Key_End):
+            scrollbar = self.verticalScrollBar()
+            scrollbar.setValue(scrollbar.minimum() if event.key() == Qt.Key_Home else scrollbar.maximum())
+            return
+        super().keyPressEvent(event)
+
+    def paintEvent(self, event):
+        """Dibuja solo las líneas visibles, decodificándolas al vuelo."""
+        if self.closed:
+            return
+        painter = QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        height = self.line_height()
+        gutter = self.gutter_width()
+        x_offset = gutter - self.horizontalScrollBar().value()
+        painter.fillRect(0, 0, gutter - GUTTER_PADDING // 2, self.viewport().height(), QColor("#3B4252"))
+
+        first = self.verticalScrollBar().value()
+        last = min(first + self.visible_lines() + 1, self.index.line_count())
+        widest = self.text_width
+        for number in range(first, last):
+            start = self.index.line_start(number)
+            if start is None:
+                break
+            text = self.index.line_text(start, self.encoding).expandtabs(config.tab_size)
+            top = (number - first) * height
+            if self.selection:
+                self.paint_selection(painter, start, x_offset, top, height)
+            painter.setClipRect(gutter, 0, self.viewport().width(), self.viewport().height())
+            painter.setPen(self.palette().text().color())
+            painter.drawText(x_offset, top + metrics.ascent(), text)
+            painter.setClipping(False)
+            painter.setPen(QColor("#D8DEE9"))  # Color de los números de línea
+            painter.drawText(0, top, gutter - GUTTER_PADDING, height, Qt.AlignRight, str(number + 1))
+            widest = max(widest, metrics.horizontalAdvance(text))
+        if widest != self.text_width:
+            self.text_width = widest
+            self.update_scrollbars()
+
+    def paint_selection(self, painter, line_start, x_offset, top, height):
+        """Resalta la parte de la coincidencia seleccionada que cae en esta línea."""
+        selection_start, selection_end = self.selection
+        line_end = self.index.line_end(line_start)
+        if selection_end <= line_start or selection_start > line_end:
+            return  # Fuera de la línea o más allá de lo que se muestra de ella
+        metrics = self.fontMetrics()
+        # Columnas: se decodifica el prefijo de la línea hasta cada extremo
+        prefix = self.data[line_start:max(line_start, selection_start)].decode(self.encoding, "replace")
+        selected = self.data[max(line_start, selection_start):min(line_end, selection_end)].decode(self.encoding, "replace")
+        left = metrics.horizontalAdvance(prefix.expandtabs(config.tab_size))
+        width = max(metrics.horizontalAdvance(selected), metrics.horizontalAdvance(" "))
+        painter.fillRect(x_offset + left, top, width, height, QColor("#4C566A"))
+
+    # Navegación
+
+    def scroll_to_line(self, line):
+        """Centra line (desde 0) en la vista."""
+        self.verticalScrollBar().setValue(line - self.visible_lines() // 2)
+
+    def go_to_position(self, line, column=0, length=0):
+        """Muestra una línea (desde 1) seleccionando length caracteres desde column."""
+        if line > self.index.line_count() and not self.index.complete:
+            self.pending_position = (line, column, length)  # Se aplica cuando se indexe la línea
+            return
+        self.pending_position = None
+        line = min(line, self.index.line_count())
+        start = self.index.line_start(max(0, line - 1))
+        text = self.index.line_text(start, self.encoding)
+        # column y length vienen en unidades UTF-16, como en el editor
+        positions = DocumentPositions(text)
+        first, last = positions.to_text(column), positions.to_text(column + length)
+        selection_start = start + len(text[:first].encode(self.encoding, "replace"))
+        selection_end = start + len(text[:last].encode(self.encoding, "replace"))
+        self.selection = (selection_start, selection_end) if length else None
+        self.scroll_to_line(line - 1)
+        self.viewport().update()
+
+    def select_bytes(self, start, end):
+        """Selecciona los bytes start:end y los muestra (en cuanto esa parte esté indexada)."""
+        self.selection = (start, end)
+        line = self.index.line_of(start)
+        if line is None:
+            self.pending_selection = (start, end)
+            return
+        self.pending_selection = None
+        self.scroll_to_line(line)
+        self.viewport().update()
+
+    # Búsqueda sobre los bytes proyectados
+
+    def find(self, pattern, backward=False):
+        """
+        Busca pattern (compilado por compile_search) desde la selección actual o
+        la primera línea visible. Las expresiones que re no puede interrumpir se
+        buscan en un proceso aparte que se termina si se agota config.search_timeout_ms.
+        """
+        if self.selection:
+            start = self.selection[0] if backward else self.selection[1]
+        else:
+            start = self.index.line_start(self.verticalScrollBar().value()) or 0
+        self.search_generation += 1
+        thread = threading.Thread(
+            target=self._run_search,
+            args=(self.search_generation, portable_pattern(pattern, self.encoding), can_hang(pattern), start, backward),
+            name="viewer-search", daemon=True,
+        )
+        thread.start()
+
+    def _run_search(self, generation, pattern_data, in_process, start, backward):
+        deadline = time.monotonic() + config.search_timeout_ms / 1000
+        error = ""
+        span = None
+        try:
+            if in_process:
+                span = self._search_in_process(generation, pattern_data, start, backward, deadline)
+            else:
+                span = find_in_file(self.file_path, pattern_data, start, backward, deadline, self.encoding)
+        except SearchTimeout:
+            error = f"La búsqueda superó el tiempo máximo ({config.search_timeout_ms} ms)."
+        except Exception as e:
+            print(f"Error al buscar en {self.file_path}: {e}")
+            error = str(e)
+        if generation == self.search_generation:
+            self.match_found.emit(generation, *(span or (-1, -1)), error)
+
+    def _search_in_process(self, generation, pattern_data, start, backward, deadline):
+        results = process_results(
+            find_process, (self.file_path, pattern_data, start, backward, self.encoding),
+            lambda: generation == self.search_generation, deadline,
+        )
+        try:
+            return next(results, None)
+        finally:
+            results.close()
+
+    def on_match_found(self, generation, start, end, error):
+        if generation != self.search_generation or self.closed:
+            return
+        if error:
+            QMessageBox.warning(self, "Buscar", error)
+        elif start == -1:
+            QMessageBox.information(self, "Buscar", "No se encontró el texto.")
+        else:
+            self.select_bytes(start, end)
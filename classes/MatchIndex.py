@@ -0,0 +1,289 @@
+import time
+from array import array
+from bisect import bisect_left
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from config.Config import config
+from classes.SearchWorker import SearchWorker
+from extras.search import DocumentPositions, SearchTimeout, can_hang, iter_matches, spans_lines
+
+CHUNK_SIZE = 512  # Coincidencias por tramo: una edición desplaza tramos, no coincidencias sueltas
+NARROW_LIMIT = 20000  # Con más coincidencias que comprobar compensa buscar de nuevo en segundo plano
+LINE_SCAN_BUDGET = 0.05  # Segundos para volver a buscar en las líneas editadas antes de pasar a segundo plano
+
+
+class _Chunk:
+    """Tramo de coincidencias consecutivas; las posiciones se guardan relativas a offset."""
+    __slots__ = ("offset", "starts", "ends")
+
+    def __init__(self, offset, starts, ends):
+        self.offset = offset
+        self.starts = starts
+        self.ends = ends
+
+    def first(self):
+        return self.offset + self.starts[0]
+
+    def last(self):
+        return self.offset + self.starts[-1]
+
+
+class MatchIndex(QObject):
+    """
+    Posiciones de las coincidencias de una búsqueda en un documento, en arrays
+    compactos repartidos en tramos con un desplazamiento propio. Al cambiar la
+    búsqueda se recorre el texto en segundo plano y las coincidencias llegan por
+    lotes; al editar solo se vuelven a buscar las líneas modificadas y a los
+    tramos posteriores se les suma la diferencia de longitud, sin tocar sus
+    coincidencias una a una.
+    """
+    changed = pyqtSignal()
+    scan_finished = pyqtSignal(str)  # Fin del recorrido completo, con el error si lo hubo
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self.document = document
+        self.pattern = None
+        self.length = 0  # Longitud del documento tras el último cambio procesado
+        self.chunks = []
+        self.total = 0
+        self.scanning = False  # Hay un recorrido completo en segundo plano
+        self.error = ""  # Error del último recorrido (p. ej. tiempo agotado)
+
+        self.worker = SearchWorker(self)
+        self.worker.batch_found.connect(self.on_batch_found)
+        self.worker.search_finished.connect(self.on_search_finished)
+
+        # Los patrones que cruzan líneas obligan a recorrerlo todo: se espera a que se deje de escribir
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(config.parse_debounce_ms)
+        self.rescan_timer.timeout.connect(self.rescan)
+
+        document.contentsChange.connect(self.on_contents_change)
+
+    def set_pattern(self, pattern):
+        """Busca pattern (re compilado) en todo el documento; None deja de buscar."""
+        if pattern == self.pattern:
+            return
+        self.pattern = pattern
+        self.rescan()
+
+    def narrow(self, pattern, suffix_pattern, suffix_length):
+        """
+        Cambia a un patrón literal que alarga el actual (ver extras.search.narrows):
+        sus coincidencias están entre las que ya había, así que solo se comprueba
+        si tras cada una sigue el texto añadido (suffix_pattern, de suffix_length
+        caracteres), sin recorrer el documento. Si aún se está buscando o hay
+        demasiadas que comprobar en el hilo de la interfaz, busca de nuevo.
+        """
+        if self.scanning or self.pattern is None or self.total > NARROW_LIMIT:
+            self.set_pattern(pattern)
+            return
+        character_at = self.document.characterAt
+        starts, ends = [], []
+        last_end = 0
+        for chunk in self.chunks:
+            offset = chunk.offset
+            for start, end in zip(chunk.starts, chunk.ends):
+                start += offset
+                if start < last_end:
+                    continue  # Como finditer, las coincidencias no se solapan
+                end += offset
+                if suffix_length == 1:
+                    following = character_at(end)  # Lo habitual: se ha escrito una letra más
+                else:
+                    following = "".join(character_at(end + index) for index in range(suffix_length))
+                if suffix_pattern.fullmatch(following):
+                    last_end = end + suffix_length
+                    starts.append(start)
+                    ends.append(last_end)
+        self.pattern = pattern
+        self.chunks = self._make_chunks(starts, ends)
+        self.total = len(starts)
+        self.changed.emit()
+
+    def clear(self):
+        self.set_pattern(None)
+
+    def rescan(self):
+        """Vuelve a buscar en todo el documento (en segundo plano)."""
+        self.rescan_timer.stop()
+        self.length = self.document.characterCount() - 1
+        self.chunks = []
+        self.total = 0
+        self.error = ""
+        self.scanning = self.pattern is not None
+        if self.scanning:
+            self.worker.start(self.pattern, self.document.toPlainText())
+        else:
+            self.worker.cancel()
+        self.changed.emit()
+
+    def on_batch_found(self, generation, starts, ends, _replacements):
+        if not self.worker.is_current(generation):
+            return
+        # Los lotes llegan en orden: sus tramos van detrás de los que ya hay
+        self.chunks.extend(self._make_chunks(starts, ends))
+        self.total += len(starts)
+        self.changed.emit()
+
+    def on_search_finished(self, generation, error):
+        if not self.worker.is_current(generation):
+            return
+        self.scanning = False
+        self.error = error
+        self.scan_finished.emit(error)
+
+    def count(self):
+        """Número de coincidencias (sin recorrer nada)."""
+        return self.total
+
+    def matches_in(self, start, end):
+        """Devuelve [(inicio, fin)] de las coincidencias que empiezan entre start y end, en orden."""
+        result = []
+        index = self._first_chunk(start)
+        while index < len(self.chunks) and self.chunks[index].first() < end:
+            chunk = self.chunks[index]
+            offset = chunk.offset
+            first = bisect_left(chunk.starts, start - offset)
+            last = bisect_left(chunk.starts, end - offset)
+            result.extend((offset + s, offset + e) for s, e in zip(chunk.starts[first:last], chunk.ends[first:last]))
+            index += 1
+        return result
+
+    def next_match(self, position, backward=False):
+        """(inicio, fin) de la primera coincidencia desde position hacia delante (o hacia atrás), o None."""
+        index = self._first_chunk(position)
+        if backward:
+            # La última que empieza antes de position: en este tramo o al final del anterior
+            if index < len(self.chunks):
+                chunk = self.chunks[index]
+                low = bisect_left(chunk.starts, position - chunk.offset)
+                if low:
+                    return chunk.offset + chunk.starts[low - 1], chunk.offset + chunk.ends[low - 1]
+            if index == 0:
+                return None
+            chunk = self.chunks[index - 1]
+            return chunk.offset + chunk.starts[-1], chunk.offset + chunk.ends[-1]
+        if index == len(self.chunks):
+            return None
+        chunk = self.chunks[index]
+        low = bisect_left(chunk.starts, position - chunk.offset)
+        return chunk.offset + chunk.starts[low], chunk.offset + chunk.ends[low]
+
+    def on_contents_change(self, position, removed, added):
+        if self.pattern is None:
+            return
+        if self.scanning or spans_lines(self.pattern) or can_hang(self.pattern):
+            # Las posiciones del recorrido en curso (o las de un patrón multilínea) dejan de valer, y
+            # una expresión que no se puede interrumpir no se busca en el hilo de la interfaz
+            self.worker.cancel()
+            self.chunks = []
+            self.total = 0
+            self.scanning = True
+            self.rescan_timer.start()
+            self.changed.emit()
+            return
+        document = self.document
+        new_length = document.characterCount() - 1
+        # Las búsquedas no cruzan líneas: basta con volver a buscar en las líneas editadas
+        first = document.findBlock(position)
+        last = document.findBlock(position + added)
+        if not first.isValid() or not last.isValid():
+            self.rescan()
+            return
+        region_start = first.position()
+        region_end = last.position() + last.length() - 1
+        delta = new_length - self.length
+        self.length = new_length
+
+        lines = []
+        block = first
+        while block.isValid():
+            lines.append(block.text())
+            if block == last:
+                break
+            block = block.next()
+        try:
+            starts, ends = self._scan("\n".join(lines), region_start)
+        except SearchTimeout:
+            self.rescan()
+            return
+        self._replace_region(region_start, region_end - delta, delta, starts, ends)
+        self.changed.emit()
+
+    def _first_chunk(self, position):
+        """Índice del primer tramo cuya última coincidencia empieza en position o después."""
+        low, high = 0, len(self.chunks)
+        while low < high:
+            middle = (low + high) // 2
+            if self.chunks[middle].last() < position:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _replace_region(self, start, old_end, delta, new_starts, new_ends):
+        """Sustituye las coincidencias entre start y old_end (posiciones viejas) por las nuevas."""
+        chunks = self.chunks
+        first = index = self._first_chunk(start)
+        before = after = None
+        while index < len(chunks) and chunks[index].first() < old_end:
+            chunk = chunks[index]
+            low = bisect_left(chunk.starts, start - chunk.offset)
+            high = bisect_left(chunk.starts, old_end - chunk.offset)
+            if index == first and low:
+                before = _Chunk(chunk.offset, chunk.starts[:low], chunk.ends[:low])
+            if high < len(chunk.starts):
+                after = _Chunk(chunk.offset + delta, chunk.starts[high:], chunk.ends[high:])
+            index += 1
+
+        replacement = ([before] if before else []) + self._make_chunks(new_starts, new_ends)
+        replacement += [after] if after else []
+        chunks[first:index] = replacement
+        for chunk in chunks[first + len(replacement):]:
+            chunk.offset += delta
+        self._merge_small(max(0, first - 1), first + len(replacement) + 1)
+        self.total = sum(len(chunk.starts) for chunk in chunks)
+
+    def _merge_small(self, first, last):
+        """Une tramos vecinos que caben en uno, para que las ediciones no los fragmenten."""
+        chunks = self.chunks
+        index = first
+        while index < min(last, len(chunks) - 1):
+            current, following = chunks[index], chunks[index + 1]
+            if len(current.starts) + len(following.starts) > CHUNK_SIZE:
+                index += 1
+                continue
+            shift = following.offset - current.offset
+            current.starts.extend(value + shift for value in following.starts)
+            current.ends.extend(value + shift for value in following.ends)
+            del chunks[index + 1]
+            last -= 1
+
+    @staticmethod
+    def _make_chunks(starts, ends):
+        """Reparte posiciones absolutas en tramos de CHUNK_SIZE."""
+        chunks = []
+        for index in range(0, len(starts), CHUNK_SIZE):
+            offset = starts[index]
+            chunks.append(_Chunk(
+                offset,
+                array("q", (value - offset for value in starts[index:index + CHUNK_SIZE])),
+                array("q", (value - offset for value in ends[index:index + CHUNK_SIZE])),
+            ))
+        return chunks
+
+    def _scan(self, text, offset):
+        """Devuelve (inicios, finales) de las coincidencias de text, que empieza en la posición offset."""
+        positions = DocumentPositions(text)
+        starts, ends = [], []
+        for match in iter_matches(self.pattern, text, deadline=time.monotonic() + LINE_SCAN_BUDGET):
+            start, end = match.span()
+            if start == end:
+                continue  # Las coincidencias vacías no se pueden resaltar
+            starts.append(offset + positions.to_document(start))
+            ends.append(offset + positions.to_document(end))
+        return starts, ends
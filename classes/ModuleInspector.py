@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import threading
+import multiprocessing
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from config.Config import config
+from extras.introspection import inspect_module, interpreter_version
+from extras.member_cache import MemberCache
+from extras.site_index import SiteIndex
+
+
+class ModuleInspector(QObject):
+    """
+    Obtiene los miembros de los módulos. Primero consulta el índice estático
+    de sys.path (sin importar nada); para lo que no está ahí (p. ej. módulos
+    compilados) importa el módulo en procesos aparte, para no ejecutar código
+    ajeno en el IDE ni bloquear la interfaz, y guarda los resultados en disco
+    para usarlos de inmediato en el siguiente arranque. Lo ya resuelto se
+    guarda en una caché acotada común a todas las pestañas.
+    """
+    module_ready = pyqtSignal(str)  # Nombre del módulo cuyos miembros ya están disponibles
+    result_received = pyqtSignal(object)  # Uso interno: trae el resultado al hilo de la interfaz
+    request_needed = pyqtSignal(str)  # Uso interno: lleva al hilo de la interfaz los módulos que hay que pedir
+
+    def __init__(self, cache_path=None, parent=None):
+        super().__init__(parent)
+        self.cache_path = cache_path or os.path.join(config.cache_dir, "modules.json")
+        self.site_index = SiteIndex(os.path.join(config.cache_dir, "site_index.bin"))
+        self.version = interpreter_version()
+        self.entries = {}  # Nombre del módulo -> descripción obtenida por el proceso de trabajo
+        self.member_cache = MemberCache(config.member_cache_bytes)  # Miembros ya resueltos (de solo lectura)
+        self.failed = set()  # Módulos que no se pudieron importar en esta sesión
+        self.pending = {}  # Módulo pedido -> momento límite para recibir su descripción
+        self.pool = None
+        self.generation = 0  # Aumenta al sustituir el grupo de procesos; descarta los resultados del anterior
+        self.cache_loaded = False
+        self.cache_lock = threading.Lock()  # load_cache() también se llama desde el hilo del autocompletado
+
+        self.result_received.connect(self._store_result)
+        self.request_needed.connect(self.request)
+
+        # Da por fallidas las importaciones que se cuelgan
+        self.watchdog = QTimer(self)
+        self.watchdog.setInterval(1000)
+        self.watchdog.timeout.connect(self.check_deadlines)
+
+        # Agrupa varias escrituras de la caché en disco en una sola
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(1000)
+        self.save_timer.timeout.connect(self.save_cache)
+
+    def members(self, module_name):
+        """
+        Devuelve los miembros conocidos del módulo ({nombre: [tipo, firma, parámetros]})
+        o None si todavía no se conocen; en ese caso los pide a los procesos de trabajo
+        y emite module_ready cuando lleguen. Los miembros se comparten: no se deben modificar.
+        Se puede llamar desde el hilo del autocompletado: ahí solo se consulta, y
+        la petición la hace request() en el hilo de la interfaz.
+        """
+        members = self.member_cache.get(module_name)
+        if members is not None:
+            return members
+        members = self.site_index.members(module_name)
+        if members is not None:
+            return self.member_cache.put(module_name, members)
+
+        self.load_cache()
+        entry = self.entries.get(module_name)
+        if entry is not None and self._is_valid(entry):
+            return self.member_cache.put(module_name, entry["members"])
+        if module_name not in self.failed:
+            self.request_needed.emit(module_name)
+        return None
+
+    def member_names(self, module_name):
+        """Nombres de los miembros del módulo (un frozenset común a todas las pestañas) o None."""
+        members = self.members(module_name)
+        if members is None:
+            return None
+        names = self.member_cache.names(module_name)
+        return names if names is not None else frozenset(members)  # Ya se descartó de la caché
+
+    def class_members(self, module_name, class_name):
+        """Devuelve los miembros de una clase según el índice estático, o None."""
+        key = (module_name, class_name)
+        members = self.member_cache.get(key)
+        if members is None:
+            members = self.site_index.class_members(module_name, class_name)
+            if members is not None:
+                members = self.member_cache.put(key, members)
+        return members
+
+    def build_site_index(self):
+        """Reconstruye el índice estático en segundo plano si está desactualizado."""
+        self.site_index.build_in_background(on_finished=self.member_cache.clear)
+
+    def request(self, module_name):
+        """Pide de forma asíncrona la descripción de un módulo (solo desde el hilo de la interfaz)."""
+        if module_name in self.pending:
+            return
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(processes=config.inspector_workers)
+        self.pending[module_name] = time.monotonic() + config.inspector_timeout_ms / 1000
+        generation = self.generation
+        self.pool.apply_async(
+            inspect_module, (module_name,),
+            callback=lambda entry: self._on_result(entry, generation),
+            error_callback=lambda e: self._on_error(module_name, generation, e),
+        )
+        # Si un import termina el proceso, el grupo lo sustituye pero su resultado no
+        # llega nunca: el módulo se da por fallido al agotarse su tiempo
+        if not self.watchdog.isActive():
+            self.watchdog.start()
+
+    def _on_result(self, entry, generation):
+        # Se ejecuta en un hilo del pool: la señal lleva el resultado al hilo de la interfaz
+        entry["generation"] = generation
+        self.result_received.emit(entry)
+
+    def _on_error(self, module_name, generation, error):
+        print(f"Error al inspeccionar el módulo {module_name}: {error}")
+        self._on_result({"name": module_name, "error": str(error)}, generation)
+
+    def _store_result(self, entry):
+        name = entry["name"]
+        if entry.pop("generation", self.generation) != self.generation and entry["error"]:
+            return  # Fallo de un grupo ya sustituido: el módulo se puede volver a pedir
+        self.pending.pop(name, None)
+        if entry["error"]:
+            self.failed.add(name)
+            return
+        self.entries[name] = entry
+        self.member_cache.discard(name)
+        self.save_timer.start()
+        self.module_ready.emit(name)
+
+    def check_deadlines(self):
+        """Da por fallidos los módulos que superaron config.inspector_timeout_ms y sustituye el grupo de procesos."""
+        now = time.monotonic()
+        expired = [name for name, deadline in self.pending.items() if deadline < now]
+        if not self.pending:
+            self.watchdog.stop()
+        if not expired:
+            return
+        for name in expired:
+            print(f"Error al inspeccionar el módulo {name}: se agotó el tiempo")
+            self.failed.add(name)
+        self.recycle_pool()
+
+    def recycle_pool(self):
+        """
+        Termina el grupo de procesos (con un import colgado o que ya no
+        responde); el siguiente request() crea otro. Los demás módulos que
+        esperaban se olvidan para que se vuelvan a pedir.
+        """
+        self.generation += 1
+        self.pending.clear()
+        self.watchdog.stop()
+        self._terminate_pool()
+
+    def _terminate_pool(self):
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.terminate()  # También interrumpe un import colgado
+
+    def _is_valid(self, entry):
+        """Una entrada vale si es del mismo intérprete y el archivo no ha cambiado."""
+        if entry.get("version") != self.version:
+            return False
+        origin = entry.get("origin")
+        if not origin:
+            return True  # Módulos integrados: solo dependen del intérprete
+        try:
+            return os.path.getmtime(origin) == entry.get("mtime")
+        except OSError:
+            return False
+
+    def load_cache(self):
+        """Carga la caché en disco la primera vez que se necesita."""
+        if self.cache_loaded:
+            return
+        with self.cache_lock:
+            if self.cache_loaded:
+                return  # La cargó otro hilo mientras se esperaba
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as file:
+                    data = json.load(file)
+            except FileNotFoundError:
+                data = {}
+            except (OSError, ValueError) as e:
+                print(f"Error al leer la caché de módulos: {e}")
+                data = {}
+            for name, entry in data.get("modules", {}).items():
+                self.entries.setdefault(name, entry)  # Lo inspeccionado en esta sesión es más reciente
+            self.cache_loaded = True  # Solo cuando entries ya está completo
+
+    def save_cache(self):
+        """Guarda en disco las entradas válidas, de forma atómica."""
+        modules = {name: entry for name, entry in self.entries.items() if entry.get("version") == self.version}
+        temp_path = self.cache_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump({"modules": modules}, file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Error al guardar la caché de módulos: {e}")
+
+    def shutdown(self):
+        """Cancela el trabajo pendiente y guarda la caché; se llama al cerrar la aplicación."""
+        if self.save_timer.isActive():
+            self.save_timer.stop()
+            self.save_cache()
+        self.watchdog.stop()
+        self._terminate_pool()
+
+
+# Instancia compartida por todas las pestañas
+module_inspector = ModuleInspector()
@@ -0,0 +1,65 @@
+import ast
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from config.Config import config
+
+
+class ParseCache(QObject):
+    """Árbol AST de un documento, re-parseado como mucho una vez por ráfaga de escritura."""
+    parsed = pyqtSignal(object)  # Se emite con cada árbol nuevo válido
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self.document = document
+        self.revision = 0  # Aumenta con cada cambio de texto
+        self.parsed_revision = -1  # Revisión del último intento de parseo
+        self.tree = None  # Último árbol válido
+        self.error = None  # Error del último intento, si falló
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(config.parse_debounce_ms)
+        self.debounce_timer.timeout.connect(self.parse_now)
+
+        # contentsChange (y no contentsChanged) para ignorar los cambios de formato del resaltador
+        document.contentsChange.connect(self.invalidate)
+
+    def invalidate(self, position=0, chars_removed=0, chars_added=0):
+        """Marca el árbol como desactualizado y reinicia la espera."""
+        if not chars_removed and not chars_added:
+            return
+        self.revision += 1
+        self.debounce_timer.start()
+
+    def is_current(self):
+        """Indica si el último parseo corresponde al texto actual."""
+        return self.parsed_revision == self.revision
+
+    def parse_now(self):
+        """Parsea el documento si ha cambiado y devuelve el último árbol válido."""
+        self.debounce_timer.stop()
+        if self.is_current():
+            return self.tree
+
+        self.parsed_revision = self.revision
+        try:
+            tree = ast.parse(self.document.toPlainText())
+        except (SyntaxError, ValueError) as e:
+            # Mientras se escribe el código suele ser inválido: se conserva el último árbol bueno
+            self.error = e
+            return self.tree
+
+        self.tree = tree
+        self.error = None
+        self.parsed.emit(tree)
+        return tree
+
+    def get_tree(self):
+        """
+        Devuelve el último árbol válido sin esperar a la ráfaga de escritura
+        en curso. Solo parsea en el momento si todavía no se ha intentado nunca.
+        """
+        if self.parsed_revision < 0:
+            return self.parse_now()
+        return self.tree
@@ -0,0 +1,226 @@
+import re
+from collections import OrderedDict
+
+from config.Config import config
+
+# Tipos de token que el resaltador sabe formatear
+KEYWORD = "keyword"
+FUNCTION = "function"
+ATTRIBUTE = "attribute"
+OPERATOR = "operator"
+STRING = "string"
+FSTRING_FIELD = "fstring_field"
+COMMENT = "comment"
+
+KEYWORDS = (
+    "def", "class", "import", "from", "return", "if", "else", "elif",
+    "for", "while", "try", "except", "finally", "with", "as", "yield", "lambda", "pass",
+)
+
+# Estado de bloque: bits 0-1 comillas de la cadena triple abierta (0 ninguna),
+# bit 2 si esa cadena es una f-string y el resto la profundidad de corchetes.
+STATE_NORMAL = 0
+SINGLE_TRIPLE = 1
+DOUBLE_TRIPLE = 2
+_QUOTE_MASK = 0b011
+_FSTRING_FLAG = 0b100
+_DEPTH_SHIFT = 3
+MAX_BRACKET_DEPTH = 0xFF
+
+_STRING_PREFIX = r"(?<!\w)[rRbBuUfF]{0,2}"
+
+# Patrón maestro: el orden de las alternativas define la precedencia.
+# Comentarios y cadenas ganan a todo (primero las triples cerradas en la misma
+# línea, luego las triples que continúan en la siguiente); después palabras
+# clave, atributos (lo que sigue a un '.'), funciones (palabras seguidas de
+# '('), números y nombres (que se consumen sin formato) y, por último, operadores.
+MASTER_PATTERN = re.compile(
+    r"(?P<comment>#.*)"
+    rf"|(?P<triple>{_STRING_PREFIX}(?:'''(?:[^\\]|\\.)*?'''|\"\"\"(?:[^\\]|\\.)*?\"\"\"))"
+    rf"|(?P<triple_open>{_STRING_PREFIX}(?:'''|\"\"\"))"
+    rf"|(?P<string>{_STRING_PREFIX}(?:'(?:[^'\\]|\\.)*'?|\"(?:[^\"\\]|\\.)*\"?))"
+    rf"|(?P<keyword>\b(?:{'|'.join(KEYWORDS)})\b)"
+    r"|(?P<attribute>(?<=\.)\w+)"
+    r"|(?P<function>\w+(?=\())"
+    r"|(?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?\w*)"
+    r"|(?P<name>\w+)"
+    r"|(?P<operator>==|<=|>=|[=().:<>+\-*/%,\[\]{}])"
+)
+
+# Cierre de una cadena triple que viene de un bloque anterior
+_TRIPLE_END_PATTERNS = {
+    SINGLE_TRIPLE: re.compile(r"(?:[^\\]|\\.)*?'''"),
+    DOUBLE_TRIPLE: re.compile(r'(?:[^\\]|\\.)*?"""'),
+}
+
+# Líneas de nivel superior en las que se da por cerrado cualquier corchete.
+# Evitan que un '(' sin cerrar obligue a re-analizar el resto del archivo.
+_RESYNC_PATTERN = re.compile(r"(?:async\s+)?def\b|class\b|@")
+
+# Variables dentro de las llaves de una f-string
+FSTRING_FIELD_PATTERN = re.compile(r"\{[^{}]*\}")
+
+# Grupos que se reconocen pero no reciben formato
+_UNFORMATTED = frozenset(("number", "name"))
+
+_OPENING_BRACKETS = "([{"
+_CLOSING_BRACKETS = ")]}"
+
+
+def make_state(quote=0, fstring=False, depth=0):
+    """Codifica el estado de fin de bloque en un entero."""
+    depth = min(max(depth, 0), MAX_BRACKET_DEPTH)
+    return quote | (_FSTRING_FLAG if fstring else 0) | (depth << _DEPTH_SHIFT)
+
+
+def open_string_quote(state):
+    """Comillas de la cadena triple abierta al final del bloque (0 si no hay)."""
+    return max(state, 0) & _QUOTE_MASK
+
+
+def bracket_depth(state):
+    """Corchetes abiertos al final del bloque."""
+    return max(state, 0) >> _DEPTH_SHIFT
+
+
+class TokenCache:
+    """Caché LRU acotada de (texto de línea, estado de entrada) -> (tramos, estado final)."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Devuelve el resultado guardado o None, marcándolo como usado recientemente."""
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        """Guarda un resultado, descartando el menos usado si se supera el tamaño."""
+        self.entries[key] = result
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """Vacía la caché y reinicia los contadores."""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Devuelve tamaño, aciertos, fallos y tasa de acierto."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Caché compartida por todos los resaltadores (todas las pestañas)
+token_cache = TokenCache(config.token_cache_size)
+
+
+class PythonLexer:
+    """Tokeniza una línea de Python en una sola pasada."""
+
+    def __init__(self, cache=token_cache):
+        self.cache = cache
+
+    def lex_line(self, text, state=STATE_NORMAL):
+        """
+        Devuelve los tramos (inicio, longitud, tipo) de la línea, sin
+        solapamientos, y el estado con el que termina a partir del estado
+        con el que empieza.
+        """
+        key = (text, max(state, 0))
+        result = self.cache.get(key)
+        if result is None:
+            result = self._lex_line(text, key[1])
+            self.cache.put(key, result)
+        return result
+
+    def _lex_line(self, text, state):
+        """Tokeniza la línea sin pasar por la caché."""
+        quote = state & _QUOTE_MASK
+        fstring = bool(state & _FSTRING_FLAG)
+        depth = state >> _DEPTH_SHIFT
+        spans = []
+        position = 0
+
+        if quote:
+            # Continuación de una cadena triple abierta en un bloque anterior
+            match = _TRIPLE_END_PATTERNS[quote].match(text)
+            if not match:
+                self._add_string(spans, text, 0, len(text), fstring)
+                return tuple(spans), state
+            position = match.end()
+            self._add_string(spans, text, 0, position, fstring)
+            quote, fstring = 0, False
+        elif _RESYNC_PATTERN.match(text):
+            depth = 0
+
+        for match in MASTER_PATTERN.finditer(text, position):
+            kind = match.lastgroup
+            if kind in _UNFORMATTED:
+                continue
+            start, end = match.span()
+            if kind == "triple_open":
+                # La cadena sigue en el siguiente bloque
+                fstring = self._is_fstring(text, start)
+                quote = SINGLE_TRIPLE if text[end - 1] == "'" else DOUBLE_TRIPLE
+                self._add_string(spans, text, start, len(text), fstring)
+                break
+            if kind == STRING or kind == "triple":
+                self._add_string(spans, text, start, end, self._is_fstring(text, start))
+                continue
+            if kind == OPERATOR:
+                char = text[start]
+                if char in _OPENING_BRACKETS:
+                    depth += 1
+                elif char in _CLOSING_BRACKETS and depth:
+                    depth -= 1
+            self._add_span(spans, start, end - start, kind)
+
+        return tuple(spans), make_state(quote, fstring, depth)
+
+    @staticmethod
+    def _is_fstring(text, start):
+        """Indica si la cadena que empieza en start lleva el prefijo f."""
+        prefix = text[start:start + 3]
+        return "f" in prefix[:len(prefix) - len(prefix.lstrip("rRbBuUfF"))].lower()
+
+    def _add_string(self, spans, text, start, end, fstring):
+        """Añade una cadena, separando los campos de las f-strings."""
+        if not fstring:
+            self._add_span(spans, start, end - start, STRING)
+            return
+
+        position = start
+        for field in FSTRING_FIELD_PATTERN.finditer(text, start, end):
+            field_start, field_end = field.span()
+            self._add_span(spans, position, field_start - position, STRING)
+            self._add_span(spans, field_start, field_end - field_start, FSTRING_FIELD)
+            position = field_end
+        self._add_span(spans, position, end - position, STRING)
+
+    @staticmethod
+    def _add_span(spans, start, length, kind):
+        """Añade un tramo, uniéndolo al anterior si es contiguo y del mismo tipo."""
+        if length <= 0:
+            return
+        if spans:
+            last_start, last_length, last_kind = spans[-1]
+            if last_kind == kind and last_start + last_length == start:
+                spans[-1] = (last_start, last_length + length, kind)
+                return
+        spans.append((start, length, kind))
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from config.Config import config
+from classes.EditorTab import content_digest
+from extras.atomic_write import write_atomically
+
+
+class SaveService(QObject):
+    """
+    Guarda las pestañas en segundo plano. En el hilo de la interfaz solo se
+    toma una instantánea del texto; codificarlo, escribirlo en un temporal,
+    forzarlo al disco (config.fsync_on_save) y sustituir el archivo se hace en
+    un grupo de hilos, así que guardar muchas pestañas a la vez (o en una
+    unidad de red lenta) no bloquea el editor. Los guardados de una misma ruta
+    se hacen de uno en uno; si llegan varios mientras tanto, solo se escribe el último.
+    """
+    job_done = pyqtSignal(object, str)  # Trabajo terminado y mensaje de error (desde el grupo de hilos)
+    file_saved = pyqtSignal(str, str)  # Ruta y mensaje de error (vacío si se guardó)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.executor = None
+        self.in_flight = set()  # Rutas que se están escribiendo
+        self.queued = {}  # Ruta -> último trabajo que espera a que termine el anterior
+        self.job_done.connect(self.on_job_done)
+
+    def save(self, editor, path=None):
+        """Guarda el texto actual de editor en path (por defecto su ruta) sin esperar a que termine."""
+        document = editor.document()
+        job = {
+            "editor": editor,
+            "path": path or editor.get_file_path(),
+            "content": editor.toPlainText(),
+            "length": document.characterCount() - 1,
+            "revision": document.revision(),
+        }
+        if job["path"] in self.in_flight:
+            self.queued[job["path"]] = job
+        else:
+            self._submit(job)
+
+    def _submit(self, job):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=config.save_workers, thread_name_prefix="save")
+        self.in_flight.add(job["path"])
+        self.executor.submit(self._write, job, config.encoding_files, config.fsync_on_save)
+
+    def _write(self, job, encoding, fsync):
+        error = ""
+        try:
+            write_atomically(job["path"], job["content"], encoding, fsync)
+            job["digest"] = content_digest(job["content"])
+        except (OSError, UnicodeError) as e:
+            print(f"Error al guardar el archivo {job['path']}: {e}")
+            error = str(e)
+        job["content"] = None  # La instantánea ya no hace falta
+        self.job_done.emit(job, error)
+
+    def on_job_done(self, job, error):
+        path = job["path"]
+        self.in_flight.discard(path)
+        if not error:
+            job["editor"].set_saved_state(job["length"], job["digest"], job["revision"])
+        following = self.queued.pop(path, None)
+        if following is not None:
+            self._submit(following)
+        self.file_saved.emit(path, error)
+
+    def shutdown(self):
+        """Espera a que terminen las escrituras en curso; se llama al cerrar la aplicación."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        # Los que esperaban turno ya no recibirán el aviso del anterior: se escriben aquí
+        for job in self.queued.values():
+            try:
+                write_atomically(job["path"], job["content"], config.encoding_files, config.fsync_on_save)
+            except (OSError, UnicodeError) as e:
+                print(f"Error al guardar el archivo {job['path']}: {e}")
+        self.queued = {}
+
+
+# Instancia compartida por todas las ventanas
+save_service = SaveService()
@@ -0,0 +1,81 @@
+import os
+import time
+
+from PyQt5.QtWidgets import QDockWidget, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget, QLabel
+from PyQt5.QtCore import Qt, pyqtSignal
+
+from config.Config import config
+
+
+class SearchResultsPanel(QDockWidget):
+    """Panel con los resultados de Buscar en archivos: un nodo por archivo y una fila por coincidencia."""
+    match_activated = pyqtSignal(str, int, int, int)  # Ruta, línea (desde 1), columna y longitud
+
+    def __init__(self, parent=None):
+        super().__init__("Resultados de la búsqueda", parent)
+        self.setObjectName("search_results")
+        self.root = ""
+        self.started = 0.0
+        self.match_count = 0
+        self.file_count = 0
+
+        self.summary_label = QLabel("")
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)  # Evita medir cada fila al añadir miles
+        self.tree.itemActivated.connect(self.on_item_activated)
+        self.tree.itemClicked.connect(self.on_item_activated)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.tree)
+        container = QWidget()
+        container.setLayout(layout)
+        self.setWidget(container)
+
+    def start(self, root, search_text):
+        """Vacía el panel para una búsqueda nueva."""
+        self.root = root
+        self.started = time.perf_counter()
+        self.match_count = 0
+        self.file_count = 0
+        self.tree.clear()
+        self.summary_label.setText(f"Buscando «{search_text}» en {root}…")
+        self.show()
+        self.raise_()
+
+    def add_file(self, path, matches):
+        """Añade las coincidencias de un archivo (hasta config.find_in_files_max_results en total)."""
+        self.file_count += 1
+        self.match_count += len(matches)
+        shown = max(0, config.find_in_files_max_results - (self.match_count - len(matches)))
+        if not shown:
+            return
+        file_item = QTreeWidgetItem([f"{os.path.relpath(path, self.root)} ({len(matches)})"])
+        file_item.setData(0, Qt.UserRole, (path, 1, 0, 0))
+        file_item.setToolTip(0, path)
+        for line, column, length, preview in matches[:shown]:
+            item = QTreeWidgetItem([f"{line}: {preview}"])
+            item.setData(0, Qt.UserRole, (path, line, column, length))
+            file_item.addChild(item)
+        self.tree.addTopLevelItem(file_item)
+        file_item.setExpanded(True)
+        self.summary_label.setText(f"Buscando… {self.match_count} coincidencias en {self.file_count} archivos")
+
+    def finish(self, searched, error):
+        """Muestra el resumen de la búsqueda terminada."""
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        summary = (
+            f"{self.match_count} coincidencias en {self.file_count} de {searched} archivos ({elapsed_ms:.0f} ms)"
+        )
+        if self.match_count > config.find_in_files_max_results:
+            summary += f"; se muestran las primeras {config.find_in_files_max_results}"
+        if error:
+            summary += f". {error}"
+        self.summary_label.setText(summary)
+
+    def on_item_activated(self, item, _column=0):
+        data = item.data(0, Qt.UserRole)
+        if data:
+            self.match_activated.emit(*data)
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from config.Config import config
+from extras.search import InvalidPattern, SearchTimeout, can_hang, find_batches, process_results, search_process
+
+
+class SearchWorker(QObject):
+    """
+    Busca un patrón en una copia del texto en segundo plano y envía las
+    coincidencias por lotes a medida que aparecen. Cada búsqueda nueva deja
+    obsoleta la anterior: sus resultados se descartan y deja de buscarse.
+    Las búsquedas que superan config.search_timeout_ms se abandonan; las
+    expresiones que re no puede interrumpir se buscan en un proceso aparte,
+    que se termina si se agota el tiempo.
+    """
+    batch_found = pyqtSignal(int, list, list, list)  # Búsqueda, inicios, finales, reemplazos (posiciones del documento)
+    search_finished = pyqtSignal(int, str)  # Búsqueda y mensaje de error (vacío si terminó bien)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0  # Búsqueda vigente
+
+    def start(self, pattern, text, start=0, end=None, template=None, use_regex=False):
+        """
+        Empieza a buscar entre las posiciones del documento start y end y devuelve
+        el número de la búsqueda. Con template también calcula el texto de cada reemplazo.
+        """
+        self.generation += 1
+        thread = threading.Thread(
+            target=self._run, args=(self.generation, pattern, text, start, end, template, use_regex),
+            name="search", daemon=True,
+        )
+        thread.start()
+        return self.generation
+
+    def cancel(self):
+        """Deja obsoleta la búsqueda en curso."""
+        self.generation += 1
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def _run(self, generation, pattern, text, start, end, template, use_regex):
+        deadline = time.monotonic() + config.search_timeout_ms / 1000
+        error = ""
+        try:
+            if can_hang(pattern):
+                batches = process_results(
+                    search_process, (pattern, text, start, end, template, use_regex),
+                    lambda: generation == self.generation, deadline,
+                )
+            else:
+                batches = find_batches(pattern, text, start, end, template, use_regex, deadline)
+            for starts, ends, replacements in batches:
+                if generation != self.generation:
+                    return
+                self.batch_found.emit(generation, starts, ends, replacements)
+        except SearchTimeout:
+            error = f"La búsqueda superó el tiempo máximo ({config.search_timeout_ms} ms)."
+        except InvalidPattern as e:
+            error = f"Reemplazo no válido: {e}"
+        except Exception as e:
+            print(f"Error al buscar: {e}")
+            error = str(e)
+        if generation == self.generation:
+            self.search_finished.emit(generation, error)
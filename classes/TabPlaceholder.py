@@ -0,0 +1,23 @@
+from PyQt5.QtWidgets import QLabel
+from PyQt5.QtCore import Qt
+
+
+class TabPlaceholder(QLabel):
+    """
+    Pestaña de una sesión restaurada que aún no se ha visitado: solo guarda la
+    ruta y la vista (cursor y desplazamiento). La ventana la sustituye por el
+    editor la primera vez que se activa.
+    """
+
+    def __init__(self, file_path, state, parent=None):
+        super().__init__("", parent)
+        self.file_path = file_path
+        self.state = state
+        self.setAlignment(Qt.AlignCenter)
+
+    def get_file_path(self):
+        """Devuelve la ruta del archivo asociada."""
+        return self.file_path
+
+    def view_state(self):
+        return self.state
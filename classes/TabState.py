@@ -0,0 +1,55 @@
+import os
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class TabStateUpdater(QObject):
+    """
+    Agrupa los cambios de estado de los editores (guardado/sin guardar, ruta) y
+    los aplica una sola vez por vuelta del bucle de eventos, solo a los editores
+    que cambiaron. apply(editor) decide cómo se muestra en cada ventana.
+    """
+
+    def __init__(self, apply, parent=None):
+        super().__init__(parent)
+        self.apply = apply
+        self.pending = {}  # Editores por actualizar, en orden de llegada
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.flush)
+
+    def watch(self, editor):
+        editor.tab_state_changed.connect(self.on_tab_state_changed)
+
+    def unwatch(self, editor):
+        try:
+            editor.tab_state_changed.disconnect(self.on_tab_state_changed)
+        except TypeError:
+            pass  # No estaba conectado
+        self.pending.pop(editor, None)
+
+    def on_tab_state_changed(self):
+        self.schedule(self.sender())
+
+    def schedule(self, editor):
+        """Pide actualizar editor en la próxima vuelta del bucle de eventos."""
+        self.pending[editor] = None
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        pending, self.pending = self.pending, {}
+        for editor in pending:
+            self.apply(editor)
+
+
+def tab_state(editor):
+    """Devuelve (nombre, ruta, modificado) de un editor; nombre es None si no tiene archivo."""
+    path = editor.get_file_path() or ""
+    return (os.path.basename(path) if path else None), path, editor.is_modified()
+
+
+def window_title(editor):
+    """Título de la ventana para editor; [*] marca los cambios sin guardar (setWindowModified)."""
+    return f"{editor.get_file_path() or 'Untitled'}[*]"
@@ -0,0 +1,342 @@
+import io
+import ast
+import time
+import builtins
+
+from config.Config import config
+from extras.site_index import resolve_import
+
+# Tipos que produce cada literal
+LITERAL_TYPES = {
+    ast.List: list, ast.ListComp: list, ast.Dict: dict, ast.DictComp: dict, ast.Set: set, ast.SetComp: set,
+    ast.Tuple: tuple, ast.JoinedStr: str,
+}
+# Funciones integradas cuyo resultado no es una instancia de sí mismas
+BUILTIN_RESULTS = {"open": io.TextIOWrapper}
+# Anotaciones que envuelven al tipo real: Optional[X], Final[X]...
+WRAPPER_ANNOTATIONS = {"Optional", "Final", "ClassVar", "Annotated"}
+MAX_ALIAS_DEPTH = 5  # Reexportaciones que se siguen como máximo (from .a import X en un __init__...)
+
+_PENDING = object()  # Marca en la memoria de una inferencia en curso (evita ciclos)
+
+
+class _Timeout(Exception):
+    pass
+
+
+class TypeInference:
+    """
+    Deduce sin ejecutar nada el tipo de una expresión a partir del árbol del
+    documento: literales, llamadas a clases, importaciones y anotaciones. Los
+    miembros de los módulos y clases externos salen de los índices (proyecto e
+    intérprete). Los resultados se memorizan por (ámbito, nombre, definición
+    elegida en el ámbito más interno) mientras no cambie el árbol y cada
+    consulta tiene un tiempo máximo.
+
+    Los tipos se representan como tuplas:
+      ("builtin", tipo) | ("module", nombre) | ("class", módulo, nombre) | ("local", ClassDef)
+    """
+
+    def __init__(self, module_members, class_members):
+        self.module_members = module_members  # nombre -> {miembro: info} o None
+        self.class_members = class_members  # (módulo, clase) -> {miembro: info} o None
+        self.tree = None
+        self.memo = {}
+        self.deadline = 0.0
+        self.module = ""
+        self.is_package = False
+
+    def members(self, tree, expression, line, module="", is_package=False):
+        """Miembros del valor de expression ("obj" o "a.b") visto desde la línea indicada."""
+        if tree is not self.tree:
+            self.tree = tree
+            self.memo = {}
+        self.module, self.is_package = module, is_package
+        self.deadline = time.monotonic() + config.inference_budget_ms / 1000
+        try:
+            node = ast.parse(expression, mode="eval").body
+            inferred = self.infer(node, self.scope_chain(tree, line), line)
+            return self.members_of(inferred) if inferred else set()
+        except _Timeout:
+            return set()
+        except SyntaxError:
+            return set()
+
+    # Ámbitos
+
+    @staticmethod
+    def scope_chain(tree, line):
+        """Módulo, clases y funciones que contienen la línea, de fuera hacia dentro."""
+        chain = [tree]
+        body = tree.body
+        while True:
+            for node in body:
+                if (isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                        and node.lineno <= line <= node.end_lineno):
+                    chain.append(node)
+                    body = node.body
+                    break
+            else:
+                return chain
+
+    @staticmethod
+    def scope_key(chain):
+        return ".".join(getattr(scope, "name", "") for scope in chain)
+
+    @staticmethod
+    def statements(scope):
+        """Sentencias de un ámbito, entrando en if/for/with/try pero no en definiciones anidadas."""
+        pending = list(reversed(scope.body))
+        while pending:
+            node = pending.pop()
+            yield node
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            for field in ("body", "orelse", "finalbody", "handlers"):
+                pending.extend(reversed(getattr(node, field, ())))
+
+    # Inferencia
+
+    def check_time(self):
+        if time.monotonic() > self.deadline:
+            raise _Timeout()
+
+    def infer(self, node, chain, line):
+        """Tipo del valor de una expresión o None."""
+        self.check_time()
+        if isinstance(node, ast.Constant):
+            return None if node.value is None else ("builtin", type(node.value))
+        if type(node) in LITERAL_TYPES:
+            return "builtin", LITERAL_TYPES[type(node)]
+        if isinstance(node, ast.Name):
+            return self.infer_name(node.id, chain, line)
+        if isinstance(node, ast.Attribute):
+            return self.infer_attribute(self.infer(node.value, chain, line), node.attr)
+        if isinstance(node, ast.Call):
+            return self.infer_call(node, chain, line)
+        return None
+
+    def infer_call(self, node, chain, line):
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id in BUILTIN_RESULTS and self.lookup(func.id, chain, line) is None:
+                return "builtin", BUILTIN_RESULTS[func.id]
+            # Función del documento con tipo de retorno anotado
+            definition = self.find_function(func.id, chain)
+            if definition is not None:
+                return self.infer_annotation(definition.returns, chain, line) if definition.returns else None
+        # Llamar a una clase devuelve una instancia, con los mismos miembros
+        callee = self.infer(func, chain, line)
+        if callee and (callee[0] in ("class", "local") or (callee[0] == "builtin" and callee[1] is not type)):
+            return callee
+        return None
+
+    def infer_attribute(self, base, attribute):
+        if base is None:
+            return None
+        kind = base[0]
+        if kind == "module":
+            return self.member_type(base[1], attribute)
+        if kind == "local":
+            return self.infer_instance_attribute(base[1], attribute)
+        return None
+
+    def infer_instance_attribute(self, class_node, attribute):
+        """Tipo de self.attribute según las asignaciones en los métodos de la clase."""
+        for method in class_node.body:
+            if not isinstance(method, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            for node in ast.walk(method):
+                if isinstance(node, (ast.Assign, ast.AnnAssign)):
+                    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                    for target in targets:
+                        if (isinstance(target, ast.Attribute) and target.attr == attribute
+                                and isinstance(target.value, ast.Name) and target.value.id == "self"):
+                            chain = self.scope_chain(self.tree, method.lineno)
+                            if isinstance(node, ast.AnnAssign):
+                                return self.infer_annotation(node.annotation, chain, node.lineno)
+                            return self.infer(node.value, chain, node.lineno)
+        return None
+
+    def infer_annotation(self, node, chain, line):
+        """Tipo descrito por una anotación."""
+        self.check_time()
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            try:
+                node = ast.parse(node.value, mode="eval").body
+            except SyntaxError:
+                return None
+        if isinstance(node, ast.Subscript):
+            name = node.value.attr if isinstance(node.value, ast.Attribute) else getattr(node.value, "id", "")
+            if name in WRAPPER_ANNOTATIONS:
+                inner = node.slice.elts[0] if isinstance(node.slice, ast.Tuple) else node.slice
+                return self.infer_annotation(inner, chain, line)
+            node = node.value  # list[int] -> list
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+            # X | None
+            for side in (node.left, node.right):
+                if not (isinstance(side, ast.Constant) and side.value is None):
+                    return self.infer_annotation(side, chain, line)
+        if isinstance(node, (ast.Name, ast.Attribute)):
+            return self.infer(node, chain, line)
+        return None
+
+    def infer_name(self, name, chain, line):
+        """Tipo de un nombre buscado desde el ámbito más interno (memorizado por ámbito, nombre y definición)."""
+        # En el ámbito más interno la definición depende de la línea (x = [] ... x = {}):
+        # se incluye la elegida para no reutilizar el tipo calculado desde otra línea
+        selected = self.select_definition(name, chain[-1], chain, line)
+        key = (self.scope_key(chain), name, selected[0] if selected else None)
+        cached = self.memo.get(key)
+        if cached is _PENDING:
+            return None  # Definición circular
+        if key in self.memo:
+            return cached
+        self.memo[key] = _PENDING
+        try:
+            result = self.lookup(name, chain, line)
+        except _Timeout:
+            del self.memo[key]
+            raise
+        self.memo[key] = result
+        return result
+
+    def lookup(self, name, chain, line):
+        innermost = len(chain) - 1
+        for index in range(innermost, -1, -1):
+            scope = chain[index]
+            # Desde un método no se ven los nombres del cuerpo de la clase
+            if isinstance(scope, ast.ClassDef) and index != innermost:
+                continue
+            if isinstance(scope, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                inferred = self.infer_parameter(name, scope, chain[:index + 1])
+                if inferred is not None:
+                    return inferred
+            inferred = self.infer_in_scope(name, scope, chain[:index + 1], line if index == innermost else None)
+            if inferred is not None:
+                return inferred
+
+        value = getattr(builtins, name, None)
+        if isinstance(value, type):
+            return "builtin", value
+        return None
+
+    def infer_parameter(self, name, function, chain):
+        args = function.args
+        parameters = args.posonlyargs + args.args + args.kwonlyargs
+        for position, arg in enumerate(parameters):
+            if arg.arg != name:
+                continue
+            if arg.annotation is not None:
+                return self.infer_annotation(arg.annotation, chain[:-1], function.lineno)
+            # self (o cls) en un método: la clase que lo contiene
+            is_static = any(getattr(d, "id", None) == "staticmethod" for d in function.decorator_list)
+            if position == 0 and len(chain) >= 2 and isinstance(chain[-2], ast.ClassDef) and not is_static:
+                return "local", chain[-2]
+            return None
+        return None
+
+    def infer_in_scope(self, name, scope, chain, line):
+        """Tipo de la definición de name que elige select_definition(), o None."""
+        selected = self.select_definition(name, scope, chain, line)
+        return selected[1]() if selected else None
+
+    def select_definition(self, name, scope, chain, line):
+        """
+        Busca la definición de name en las sentencias del ámbito; con line, la
+        última antes de ella. Devuelve (sentencia, función que calcula el tipo) o None.
+        """
+        found = None
+        for node in self.statements(scope):
+            if line is not None and found is not None and node.lineno > line:
+                break
+            candidate = self.definition_type(name, node, chain)
+            if candidate is not None:
+                found = node, candidate
+        return found
+
+    def definition_type(self, name, node, chain):
+        """Si node define name, devuelve una función que calcula su tipo (se evalúa solo la elegida)."""
+        if isinstance(node, ast.ClassDef) and node.name == name:
+            return lambda: ("local", node)
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id == name:
+                    return lambda: self.infer(node.value, chain, node.lineno)
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.target.id == name:
+            return lambda: self.infer_annotation(node.annotation, chain, node.lineno)
+        elif isinstance(node, (ast.With, ast.AsyncWith)):
+            for item in node.items:
+                if isinstance(item.optional_vars, ast.Name) and item.optional_vars.id == name:
+                    return lambda: self.infer(item.context_expr, chain, node.lineno)
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname == name:
+                    return lambda: ("module", alias.name)
+                if not alias.asname and alias.name.split(".")[0] == name:
+                    return lambda: ("module", name)
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if (alias.asname or alias.name) == name:
+                    module = resolve_import(self.module, self.is_package, node)
+                    return lambda: self.member_type(module, alias.name)
+        return None
+
+    def member_type(self, module, name, depth=0):
+        """Tipo de module.name (submódulo o clase), siguiendo los nombres reexportados."""
+        self.check_time()
+        info = (self.module_members(module) or {}).get(name)
+        if info is not None and info[0] == "class":
+            return "class", module, name
+        if info is not None and info[0] == "alias" and info[1] and depth < MAX_ALIAS_DEPTH:
+            origin_module, _, origin_name = info[1].rpartition(".")
+            return self.member_type(origin_module, origin_name, depth + 1)
+        if self.module_members(f"{module}.{name}") is not None:
+            return "module", f"{module}.{name}"
+        if self.class_members(module, name):
+            return "class", module, name
+        return None
+
+    def find_function(self, name, chain):
+        for scope in reversed(chain):
+            for node in self.statements(scope):
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == name:
+                    return node
+        return None
+
+    # Miembros
+
+    def members_of(self, inferred, depth=0):
+        """Nombres de los miembros de un tipo inferido."""
+        kind = inferred[0]
+        if kind == "builtin":
+            return set(dir(inferred[1]))
+        if kind == "module":
+            return set(self.module_members(inferred[1]) or ())
+        if kind == "class":
+            return set(self.class_members(inferred[1], inferred[2]) or ())
+        return self.local_class_members(inferred[1], depth)
+
+    def local_class_members(self, class_node, depth):
+        """Métodos, atributos de clase y atributos self.x de una clase del documento y sus bases."""
+        names = set()
+        for node in class_node.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names.add(node.name)
+            elif isinstance(node, ast.Assign):
+                names.update(target.id for target in node.targets if isinstance(target, ast.Name))
+            elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+                names.add(node.target.id)
+        for node in ast.walk(class_node):
+            if (isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Store)
+                    and isinstance(node.value, ast.Name) and node.value.id == "self"):
+                names.add(node.attr)
+
+        if depth < 5:
+            chain = self.scope_chain(self.tree, class_node.lineno)[:-1]
+            for base in class_node.bases:
+                self.check_time()
+                inferred = self.infer(base, chain, class_node.lineno)
+                if inferred is not None and inferred != ("builtin", object):
+                    names |= self.members_of(inferred, depth + 1)
+        return names
@@ -0,0 +1,121 @@
+import os
+import queue
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from config.Config import config
+from extras.workspace_index import WorkspaceDatabase, find_root
+
+
+class WorkspaceIndex(QObject):
+    """
+    Índice de los proyectos de los archivos abiertos, para el autocompletado
+    entre archivos y para ir a la definición. Se sincroniza en un hilo aparte
+    (la primera vez analiza el proyecto en paralelo con varios procesos) y se
+    guarda en disco, así que en los siguientes arranques solo se analiza lo
+    que ha cambiado.
+    """
+    root_indexed = pyqtSignal(str)  # Raíz del proyecto cuyo índice se acaba de actualizar
+
+    def __init__(self, db_path=None, parent=None):
+        super().__init__(parent)
+        self.database = WorkspaceDatabase(db_path or os.path.join(config.cache_dir, "workspace.sqlite3"))
+        self.roots = set()  # Proyectos ya sincronizados en esta sesión
+        self.names = {}  # Raíz -> nombres de nivel de módulo (se calculan en el hilo del índice)
+        self.queue = queue.Queue()
+        self.queued = set()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = False
+
+    def add_path(self, path):
+        """Registra el proyecto de un archivo y lo sincroniza si es la primera vez. Devuelve la raíz."""
+        root = find_root(path)
+        if root not in self.roots:
+            self.roots.add(root)
+            self.refresh(root)
+        return root
+
+    def refresh(self, root):
+        """Programa una sincronización del proyecto (p. ej. tras guardar un archivo)."""
+        with self.lock:
+            if root in self.queued or self.stopping:
+                return
+            self.queued.add(root)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="workspace-index", daemon=True)
+                self.thread.start()
+        self.queue.put(root)
+
+    def refresh_path(self, path):
+        """Sincroniza el proyecto al que pertenece un archivo."""
+        self.refresh(self.add_path(path))
+
+    def _run(self):
+        while True:
+            root = self.queue.get()
+            if root is None:
+                break
+            with self.lock:
+                self.queued.discard(root)
+            try:
+                self.database.update_root(root, config.workspace_workers, lambda: self.stopping)
+                self.names[root] = self.database.top_level_names(root)
+            except Exception as e:
+                print(f"Error al indexar el proyecto {root}: {e}")
+                continue
+            if self.stopping:
+                break
+            self.root_indexed.emit(root)
+        self.database.close()
+
+    # Consultas: se hacen desde el hilo de la interfaz con su propia conexión
+
+    def completion_names(self, root):
+        """Nombres definidos a nivel de módulo en el proyecto (vacío hasta que termine la primera sincronización)."""
+        return self.names.get(root, [])
+
+    def module_members(self, module, root=None):
+        """Miembros de un módulo del proyecto o None si no es del proyecto."""
+        try:
+            return self.database.module_members(module, root)
+        except Exception as e:
+            print(f"Error al consultar el índice del proyecto: {e}")
+            return None
+
+    def class_members(self, module, class_name, root=None):
+        """Miembros de una clase de un módulo del proyecto, o None."""
+        try:
+            return self.database.class_members(module, class_name, root)
+        except Exception as e:
+            print(f"Error al consultar el índice del proyecto: {e}")
+            return None
+
+    def definitions(self, name, module=None, root=None, limit=None):
+        """Definiciones de name como [(ruta, línea, columna)], primero las del proyecto root."""
+        try:
+            return self.database.definitions(name, module, root, limit)
+        except Exception as e:
+            print(f"Error al consultar el índice del proyecto: {e}")
+            return []
+
+    def module_path(self, module, root=None):
+        """Ruta del archivo de un módulo, preferentemente del proyecto root, o None."""
+        try:
+            return self.database.module_path(module, root)
+        except Exception as e:
+            print(f"Error al consultar el índice del proyecto: {e}")
+            return None
+
+    def shutdown(self):
+        """Detiene la sincronización en curso; se llama al cerrar la aplicación."""
+        with self.lock:
+            self.stopping = True
+            running = self.thread is not None
+        if running:
+            self.queue.put(None)
+
+
+# Instancia compartida por todas las pestañas
+workspace_index = WorkspaceIndex()
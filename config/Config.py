@@ -1,3 +1,5 @@
+import os
+
 class Config:
     def __init__(self):
         self.window_size = (800,600)
@@ -6,6 +8,28 @@ class Config:
         self.font_size = 16
         self.encoding_files = "utf-8"
         self.tab_size = 4
+        self.lazy_highlight_threshold = 5000  # Líneas a partir de las cuales el resaltado es diferido
+        self.token_cache_size = 50000  # Líneas tokenizadas que se guardan entre pestañas
+        self.member_cache_bytes = 32 * 1024 * 1024  # Memoria para los miembros de módulos ya resueltos, compartida entre pestañas
+        self.parse_debounce_ms = 400  # Espera sin escribir antes de volver a parsear el documento
+        self.completion_delay_ms = 60  # Espera tras la última tecla antes de buscar sugerencias
+        self.completion_max_results = 200  # Sugerencias que se muestran como máximo
+        self.inference_budget_ms = 50  # Tiempo máximo para deducir el tipo de una expresión tras un punto
+        self.inspector_workers = 2  # Procesos que importan módulos para el autocompletado
+        self.inspector_timeout_ms = 15000  # Tiempo máximo para importar un módulo; al agotarse se da por fallido
+        self.search_as_you_type_delay_ms = 80  # Espera tras la última tecla en el campo de búsqueda antes de buscar
+        self.search_timeout_ms = 5000  # Tiempo máximo de una búsqueda; al agotarse se abandona
+        self.find_in_files_workers = None  # Procesos para buscar en archivos (None: uno por núcleo)
+        self.find_in_files_max_results = 10000  # Coincidencias que se muestran como máximo en el panel de resultados
+        self.stream_load_threshold = 2 * 1024 * 1024  # Bytes a partir de los cuales un archivo se carga por tramos
+        self.large_file_threshold = 100 * 1024 * 1024  # Bytes a partir de los cuales se abre en el visor de solo lectura
+        self.load_chunk_bytes = 256 * 1024  # Bytes que se leen y se añaden al documento en cada tramo
+        self.save_workers = 8  # Hilos que escriben archivos a la vez al guardar (Guardar todo)
+        self.fsync_on_save = True  # Forzar al disco cada archivo guardado antes de darlo por guardado
+        self.workspace_workers = None  # Procesos para indexar el proyecto la primera vez (None: uno por núcleo)
+        self.cache_dir = os.path.join(os.path.expanduser("~"), ".notepadgpt")  # Cachés persistentes
+        self.session_file = os.path.join(self.cache_dir, "session.json")  # Pestañas abiertas al cerrar, para reabrirlas
+        self.restore_session = True  # Reabrir al iniciar las pestañas de la última sesión
         
         self.keep_console_open = True
     
@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+
+# Permisos de los archivos nuevos: los habituales menos la máscara del proceso
+# (se lee una vez al importar: os.umask() no es seguro entre hilos).
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def write_atomically(path, content, encoding, fsync=True):
+    """
+    Escribe content en path a través de un archivo temporal en la misma carpeta
+    que luego sustituye al original con os.replace(), así que un fallo a mitad
+    (disco lleno, codificación, corte de red) deja intacto el archivo anterior.
+    Con fsync se fuerza el contenido (y en POSIX la carpeta) al disco antes de
+    dar el guardado por hecho. Devuelve la ruta real escrita.
+    """
+    path = os.path.realpath(path)  # Se sustituye el destino de un enlace, no el enlace
+    directory, name = os.path.split(path)
+    descriptor, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(descriptor, "w", encoding=encoding) as file:
+            file.write(content)
+            file.flush()
+            if fsync:
+                os.fsync(file.fileno())
+        try:
+            shutil.copymode(path, temp_path)  # Conserva los permisos del archivo que se sustituye
+        except FileNotFoundError:
+            os.chmod(temp_path, 0o666 & ~UMASK)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    if fsync and os.name == "posix":
+        directory_descriptor = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_descriptor)  # Que el cambio de nombre también sobreviva a un corte
+        finally:
+            os.close(directory_descriptor)
+    return path
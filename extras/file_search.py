@@ -0,0 +1,231 @@
+import os
+import re
+import mmap
+from functools import lru_cache
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+# Buscar en archivos: se recorre la carpeta con os.scandir respetando los
+# .gitignore, y cada proceso de trabajo busca en un grupo de archivos
+# proyectados en memoria con mmap. Los literales ASCII que distinguen
+# mayúsculas se buscan sin decodificar (el patrón se compila en bytes y solo
+# se decodifican las líneas con coincidencias); cualquier otro patrón se busca
+# sobre el texto decodificado, porque en bytes las mayúsculas, \w, \b y las
+# clases de caracteres no entienden los caracteres de varios bytes (ñ, é...).
+
+VCS_DIRS = {".git", ".hg", ".svn"}
+BINARY_SNIFF_SIZE = 8192  # Bytes iniciales en los que un NUL delata un archivo binario
+MAX_MATCHES_PER_FILE = 1000  # Coincidencias que se devuelven como máximo de un archivo
+MAX_PREVIEW_LENGTH = 200  # Caracteres de la línea que se muestran en los resultados
+LITERAL_ESCAPE = re.compile(r"\\[^0-9A-Za-z]")  # Signo escapado: literal también en bytes
+REGEX_SYNTAX = re.compile(r"[\\.^$*+?{}\[\]|()]")  # Lo que queda con significado especial
+
+
+def translate_gitignore(pattern):
+    """Traduce un patrón de .gitignore (sin '!' ni '/' final) a una expresión sobre rutas relativas."""
+    anchored = "/" in pattern  # Con una barra el patrón es relativo a la carpeta del .gitignore
+    pattern = pattern.lstrip("/")
+    parts = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+        elif pattern[index] == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            parts.append("[^/]")
+            index += 1
+        elif pattern[index] == "[" and pattern.find("]", index + 2) != -1:
+            end = pattern.find("]", index + 2)  # Un ']' justo tras '[' es literal
+            body = pattern[index + 1:end]
+            parts.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+            index = end + 1
+        elif pattern[index] == "\\" and index + 1 < len(pattern):
+            parts.append(re.escape(pattern[index + 1]))
+            index += 2
+        else:
+            parts.append(re.escape(pattern[index]))
+            index += 1
+    return re.compile(("" if anchored else "(?:.*/)?") + "".join(parts) + r"\Z", re.DOTALL)
+
+
+def parse_gitignore(path):
+    """Devuelve las reglas de un .gitignore como [(expresión, negada, solo_carpetas)]; [] si no existe."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            lines = file.read().splitlines()
+    except OSError:
+        return []
+    rules = []
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        if line:
+            rules.append((translate_gitignore(line), negated, directory_only))
+    return rules
+
+
+def is_ignored(rule_sets, path, is_dir):
+    """Aplica las reglas de cada .gitignore (de la raíz hacia dentro; la última que encaja decide)."""
+    ignored = False
+    for base, rules in rule_sets:
+        relative = path[len(base) + 1:].replace(os.sep, "/")  # path siempre está dentro de base
+        for expression, negated, directory_only in rules:
+            if directory_only and not is_dir:
+                continue
+            if expression.match(relative):
+                ignored = not negated
+    return ignored
+
+
+def find_files(root):
+    """Devuelve las rutas de los archivos de root que no ignora ningún .gitignore."""
+    root = os.path.abspath(root)
+    root_rules = parse_gitignore(os.path.join(root, ".git", "info", "exclude"))
+    found = []
+    pending = [(root, [(root, root_rules)] if root_rules else [])]
+    while pending:
+        directory, rule_sets = pending.pop()
+        rules = parse_gitignore(os.path.join(directory, ".gitignore"))
+        if rules:
+            rule_sets = rule_sets + [(directory, rules)]
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in VCS_DIRS and not is_ignored(rule_sets, entry.path, True):
+                        pending.append((entry.path, rule_sets))
+                elif entry.is_file() and not is_ignored(rule_sets, entry.path, False):
+                    found.append(entry.path)
+            except OSError:
+                continue
+    found.sort()
+    return found
+
+
+def matches_as_bytes(pattern):
+    """Indica si pattern es un literal ASCII que distingue mayúsculas: en bytes encuentra lo mismo que en texto."""
+    source = pattern.pattern
+    return (
+        source.isascii()
+        and not pattern.flags & re.IGNORECASE
+        and not REGEX_SYNTAX.search(LITERAL_ESCAPE.sub("", source))
+    )
+
+
+def portable_pattern(pattern, encoding):
+    """
+    Datos para compilar pattern (str) en los procesos de trabajo: el origen va
+    en bytes si matches_as_bytes(), y si no tal cual, para buscar sobre texto.
+    """
+    engine = "regex" if regex is not None and isinstance(pattern, regex.Pattern) else "re"
+    source = pattern.pattern.encode(encoding) if matches_as_bytes(pattern) else pattern.pattern
+    return source, pattern.flags, engine
+
+
+@lru_cache(maxsize=32)
+def compile_portable(source, flags, engine):
+    """Compila el patrón de portable_pattern(), en bytes o en texto según el origen."""
+    module = regex if engine == "regex" else re
+    if isinstance(source, bytes):
+        flags &= ~module.UNICODE
+    return module.compile(source, flags)
+
+
+def search_file(path, pattern, encoding):
+    """Devuelve [(línea, columna, longitud, texto de la línea)] de las coincidencias de un archivo de texto."""
+    try:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if b"\0" in data[:BINARY_SNIFF_SIZE]:
+                    return []
+                if isinstance(pattern.pattern, str):
+                    return _collect_text_matches(pattern, data[:].decode(encoding, "replace"))
+                return _collect_matches(pattern, data, encoding)
+    except (OSError, ValueError):
+        return []
+
+
+def _collect_matches(pattern, data, encoding):
+    matches = []
+    line = 1
+    counted = 0  # Hasta dónde se han contado los saltos de línea
+    for match in pattern.finditer(data):
+        start, end = match.span()
+        if start == end:
+            continue
+        line += data[counted:start].count(b"\n")
+        counted = start
+        line_start = data.rfind(b"\n", 0, start) + 1
+        line_end = data.find(b"\n", start)
+        if line_end == -1:
+            line_end = len(data)
+        prefix = data[line_start:start].decode(encoding, "replace")
+        matched = data[start:end].decode(encoding, "replace")
+        preview = data[line_start:line_end].decode(encoding, "replace").rstrip("\r")
+        # Columna y longitud en unidades UTF-16, como las posiciones del editor
+        matches.append((
+            line, utf16_length(prefix), utf16_length(matched), preview.strip()[:MAX_PREVIEW_LENGTH],
+        ))
+        if len(matches) >= MAX_MATCHES_PER_FILE:
+            break
+    return matches
+
+
+def _collect_text_matches(pattern, text):
+    matches = []
+    line = 1
+    counted = 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue
+        line += text.count("\n", counted, start)
+        counted = start
+        line_start = text.rfind("\n", 0, start) + 1
+        line_end = text.find("\n", start)
+        if line_end == -1:
+            line_end = len(text)
+        preview = text[line_start:line_end].rstrip("\r")
+        matches.append((
+            line, utf16_length(text[line_start:start]), utf16_length(match.group()),
+            preview.strip()[:MAX_PREVIEW_LENGTH],
+        ))
+        if len(matches) >= MAX_MATCHES_PER_FILE:
+            break
+    return matches
+
+
+def utf16_length(text):
+    return len(text.encode("utf-16-le")) // 2
+
+
+def search_files(task):
+    """Busca en un grupo de archivos (en un proceso de trabajo) y devuelve [(ruta, coincidencias)] de los que tienen alguna."""
+    paths, source, flags, engine, encoding = task
+    pattern = compile_portable(source, flags, engine)
+    results = []
+    for path in paths:
+        matches = search_file(path, pattern, encoding)
+        if matches:
+            results.append((path, matches))
+    return results
@@ -0,0 +1,70 @@
+import os
+import sys
+import inspect
+import importlib
+
+# Este módulo se ejecuta en los procesos de trabajo: no debe importar Qt ni nada del IDE.
+
+
+def interpreter_version():
+    """Identifica el intérprete con el que se obtuvieron los miembros."""
+    return f"{sys.implementation.name}-{sys.version}"
+
+
+def member_kind(value):
+    """Clasifica un miembro de un módulo."""
+    if inspect.ismodule(value):
+        return "module"
+    if inspect.isclass(value):
+        return "class"
+    if inspect.isroutine(value):
+        return "function"
+    return "variable"
+
+
+def member_signature(value):
+    """Devuelve (firma, parámetros) de un objeto invocable o (None, None)."""
+    if not callable(value):
+        return None, None
+    try:
+        signature = inspect.signature(value)
+    except (TypeError, ValueError):
+        return None, None
+    return str(signature), list(signature.parameters)
+
+
+def inspect_module(module_name):
+    """Importa un módulo (en el proceso de trabajo) y describe sus miembros."""
+    entry = {
+        "name": module_name,
+        "origin": None,
+        "mtime": None,
+        "version": interpreter_version(),
+        "members": {},
+        "error": None,
+    }
+    try:
+        module = importlib.import_module(module_name)
+    except BaseException as e:  # El código de importación puede hacer cualquier cosa
+        entry["error"] = f"{type(e).__name__}: {e}"
+        return entry
+
+    origin = getattr(module, "__file__", None)
+    if origin:
+        entry["origin"] = origin
+        try:
+            entry["mtime"] = os.path.getmtime(origin)
+        except OSError:
+            pass
+
+    members = {}
+    for name in dir(module):
+        try:
+            value = getattr(module, name)
+        except Exception:
+            members[name] = ["variable", None, None]
+            continue
+        signature, params = member_signature(value)
+        members[name] = [member_kind(value), signature, params]
+    entry["members"] = members
+    return entry
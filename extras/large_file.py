@@ -0,0 +1,218 @@
+import mmap
+from array import array
+from bisect import bisect_left
+
+from extras.file_search import compile_portable
+from extras.search import iter_matches
+
+# Visor de archivos enormes: el archivo se proyecta en memoria con mmap y solo
+# se guarda, por cada bloque de INDEX_BLOCK_SIZE bytes, cuántos saltos de
+# línea hay hasta su final. Para llegar a una línea se busca su bloque y se
+# recorren como mucho los saltos de ese bloque, así que la memoria depende del
+# número de bloques y no del de líneas.
+
+INDEX_BLOCK_SIZE = 64 * 1024  # Bytes por entrada del índice de líneas
+PROGRESS_BLOCKS = 256  # Bloques indexados entre avisos de progreso (16 MiB)
+CACHE_WALK = 256  # Líneas que se avanzan desde la última consultada antes de ir al índice
+MAX_LINE_BYTES = 16 * 1024  # Bytes de una línea que se muestran como máximo
+SEARCH_SEGMENT = 4 * 1024 * 1024  # Bytes por tramo al buscar hacia atrás
+
+
+def map_file(path):
+    """Proyecta path en memoria (solo lectura); un archivo vacío se representa con b""."""
+    with open(path, "rb") as file:
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b""  # mmap no admite archivos vacíos
+
+
+class LineIndex:
+    """
+    Índice disperso de líneas de un archivo proyectado. build() lo completa
+    (normalmente en otro hilo); mientras tanto se puede consultar lo indexado.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+        self.counts = array("q")  # Saltos de línea desde el principio hasta el final de cada bloque
+        self.complete = self.size == 0
+        self.cached = (0, 0)  # (línea, byte de inicio) de la última línea consultada
+
+    def build(self, path, cancelled=None, progress=None):
+        """
+        Cuenta los saltos de línea bloque a bloque leyendo path con un búfer
+        reutilizado (recorrer la proyección dejaría todo el archivo en la
+        memoria del proceso). progress() se llama cada PROGRESS_BLOCKS bloques.
+        """
+        buffer = bytearray(INDEX_BLOCK_SIZE)
+        view = memoryview(buffer)
+        total = self.counts[-1] if self.counts else 0
+        position = len(self.counts) * INDEX_BLOCK_SIZE
+        with open(path, "rb") as file:
+            file.seek(position)
+            while position < self.size:
+                if cancelled is not None and cancelled():
+                    return
+                read = file.readinto(view[:min(INDEX_BLOCK_SIZE, self.size - position)])
+                if not read:
+                    break  # El archivo se acortó después de proyectarlo
+                total += buffer.count(b"\n", 0, read)
+                position += read
+                self.counts.append(total)
+                if progress is not None and len(self.counts) % PROGRESS_BLOCKS == 0:
+                    progress()
+        self.complete = True
+
+    def indexed_bytes(self):
+        return min(len(self.counts) * INDEX_BLOCK_SIZE, self.size)
+
+    def line_count(self):
+        """Líneas conocidas: las completas ya indexadas, más la última al terminar."""
+        newlines = self.counts[-1] if self.counts else 0
+        return newlines + 1 if self.complete else newlines
+
+    def line_start(self, line):
+        """Byte donde empieza line (desde 0), o None si aún no está indexada."""
+        if line == 0:
+            return 0
+        if line >= self.line_count() + (0 if self.complete else 1):
+            return None
+        data = self.data
+        cached_line, position = self.cached
+        if not 0 <= line - cached_line <= CACHE_WALK:
+            # Bloque donde está el salto de línea número line, y cuántos hay antes de él
+            block = bisect_left(self.counts, line)
+            cached_line = self.counts[block - 1] if block else 0
+            position = block * INDEX_BLOCK_SIZE
+        for _ in range(line - cached_line):
+            position = data.find(b"\n", position) + 1
+        self.cached = (line, position)
+        return position
+
+    def line_end(self, start):
+        """Byte donde termina lo que se muestra de la línea que empieza en start (sin el salto; como mucho MAX_LINE_BYTES)."""
+        end = self.data.find(b"\n", start, start + MAX_LINE_BYTES)
+        return min(self.size, start + MAX_LINE_BYTES) if end == -1 else end
+
+    def line_of(self, offset):
+        """Línea (desde 0) que contiene el byte offset, o None si aún no está indexado."""
+        if offset >= self.indexed_bytes() and not self.complete:
+            return None
+        block = offset // INDEX_BLOCK_SIZE
+        before = self.counts[block - 1] if block else 0
+        return before + self.data[block * INDEX_BLOCK_SIZE:offset].count(b"\n")
+
+    def line_text(self, start, encoding):
+        """Texto de la línea que empieza en start (como mucho MAX_LINE_BYTES bytes), sin el salto de línea."""
+        text = self.data[start:self.line_end(start)].decode(encoding, "replace")
+        return text[:-1] if text.endswith("\r") else text
+
+
+def find_in_data(pattern, data, start, backward=False, deadline=None):
+    """
+    Primera coincidencia (no vacía) de pattern (bytes) desde start, o la última
+    que termina antes de start si backward; devuelve (inicio, fin) o None.
+    """
+    if not backward:
+        for match in iter_matches(pattern, data, start, len(data), deadline):
+            if match.end() > match.start():
+                return match.span()
+        return None
+    end = start
+    while end > 0:
+        segment_start = max(0, end - SEARCH_SEGMENT)
+        last = None
+        # Las coincidencias que empiezan en el tramo pueden acabar en el siguiente (hasta otro tramo más)
+        for match in iter_matches(pattern, data, segment_start, min(start, end + SEARCH_SEGMENT), deadline):
+            if match.start() >= end:
+                break
+            if match.end() > match.start():
+                last = match
+        if last is not None:
+            return last.span()
+        end = segment_start
+    return None
+
+
+def line_boundary(data, offset):
+    """Primer inicio de línea en offset o después (o el final de data)."""
+    if offset >= len(data):
+        return len(data)
+    end = data.find(b"\n", offset)
+    return len(data) if end == -1 else end + 1
+
+
+def find_in_text(pattern, data, start, encoding, backward=False, deadline=None):
+    """
+    Como find_in_data(), pero pattern (str) se busca sobre el texto decodificado,
+    por tramos de líneas completas; las posiciones se devuelven en bytes. Con
+    surrogateescape los bytes no válidos se decodifican y vuelven a codificarse sin cambios.
+    """
+    def decode(first, last):
+        return data[first:last].decode(encoding, "surrogateescape")
+
+    def span(base, text, match):
+        return (
+            base + len(text[:match.start()].encode(encoding, "surrogateescape")),
+            base + len(text[:match.end()].encode(encoding, "surrogateescape")),
+        )
+
+    size = len(data)
+    if not backward:
+        position = start
+        while position < size:
+            segment_end = line_boundary(data, position + SEARCH_SEGMENT)
+            head = decode(position, segment_end)
+            # Las coincidencias que empiezan en el tramo pueden acabar en el siguiente
+            text = head + decode(segment_end, line_boundary(data, segment_end + SEARCH_SEGMENT))
+            for match in iter_matches(pattern, text, 0, len(text), deadline):
+                if match.start() >= len(head):
+                    break
+                if match.end() > match.start():
+                    return span(position, text, match)
+            position = segment_end
+        return None
+    end = start
+    while end > 0:
+        segment_start = 0 if end <= SEARCH_SEGMENT else data.rfind(b"\n", 0, end - SEARCH_SEGMENT) + 1
+        head = decode(segment_start, end)
+        text = head + decode(end, min(start, line_boundary(data, end + SEARCH_SEGMENT)))
+        last = None
+        for match in iter_matches(pattern, text, 0, len(text), deadline):
+            if match.start() >= len(head):
+                break
+            if match.end() > match.start():
+                last = match
+        if last is not None:
+            return span(segment_start, text, last)
+        end = segment_start
+    return None
+
+
+def find_in_file(path, pattern_data, start, backward=False, deadline=None, encoding="utf-8"):
+    """Busca en path con el patrón de portable_pattern() sin cargarlo entero: ver find_in_data() y find_in_text()."""
+    source, flags, engine = pattern_data
+    pattern = compile_portable(source, flags, engine)
+    data = map_file(path)
+    try:
+        if isinstance(source, str):
+            return find_in_text(pattern, data, start, encoding, backward, deadline)
+        return find_in_data(pattern, data, start, backward, deadline)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def find_process(connection, path, pattern_data, start, backward, encoding):
+    """Punto de entrada del proceso que busca una expresión de usuario en un archivo enorme."""
+    try:
+        span = find_in_file(path, pattern_data, start, backward, encoding=encoding)
+        if span is not None:
+            connection.send(("batch", span))
+        connection.send(("done", None))
+    except Exception as e:
+        connection.send(("error", str(e)))
+    finally:
+        connection.close()
@@ -0,0 +1,104 @@
+import sys
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+# Registro de miembros ya resueltos, compartido por todas las pestañas: cada
+# módulo (o clase) se decodifica una sola vez y todas reciben el mismo objeto
+# de solo lectura. El tamaño se estima en bytes y, al superar el límite, se
+# descartan los menos usados.
+
+
+def estimate_size(members, names):
+    """Bytes aproximados que ocupan los miembros y su conjunto de nombres."""
+    size = sys.getsizeof(members) + sys.getsizeof(names)
+    for name, info in members.items():
+        size += sys.getsizeof(name) + sys.getsizeof(info)
+        for value in info:
+            if isinstance(value, list):
+                size += sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+            elif value is not None:
+                size += sys.getsizeof(value)
+    return size
+
+
+class MemberCache:
+    """
+    Caché LRU de clave -> miembros ({nombre: [tipo, firma, parámetros]}),
+    acotada por bytes. Se consulta también desde el hilo del autocompletado,
+    así que cada operación se hace con el candado tomado.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # Clave -> (miembros, nombres, bytes)
+        self.lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Devuelve los miembros guardados (de solo lectura) o None."""
+        entry = self._get(key)
+        return entry[0] if entry else None
+
+    def names(self, key):
+        """Devuelve el frozenset de nombres de los miembros guardados o None."""
+        entry = self._get(key)
+        return entry[1] if entry else None
+
+    def _get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, members):
+        """Guarda members y devuelve la versión compartida, descartando las menos usadas si no caben."""
+        members = MappingProxyType(dict(members))
+        names = frozenset(members)
+        size = estimate_size(members, names)
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[2]
+            self.entries[key] = (members, names, size)
+            self.total_bytes += size
+            # La recién guardada se conserva aunque sola supere el límite
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted
+                self.evictions += 1
+        return members
+
+    def discard(self, key):
+        """Olvida una clave (p. ej. porque su módulo se volvió a inspeccionar)."""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry[2]
+
+    def clear(self):
+        """Vacía la caché (p. ej. tras reconstruir el índice estático)."""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Devuelve entradas, bytes ocupados y máximos, aciertos, fallos, descartes y tasa de acierto."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
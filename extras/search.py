@@ -0,0 +1,223 @@
+import multiprocessing
+import re
+import time
+import weakref
+from bisect import bisect_left
+from functools import lru_cache
+
+try:
+    import regex  # Opcional: permite abortar una coincidencia que tarda demasiado
+except ImportError:
+    regex = None
+
+PATTERN_ERRORS = (re.error, IndexError) + ((regex.error,) if regex is not None else ())
+
+# Búsqueda sobre el texto completo con re: una sola pasada devuelve todas las
+# coincidencias, en vez de mover un cursor del documento de una en una.
+
+ASTRAL = re.compile("[\U00010000-\U0010FFFF]")
+PATTERN_CACHE_SIZE = 128  # Patrones compilados que se conservan entre búsquedas
+BATCH_SIZE = 4096  # Coincidencias como máximo por lote
+BATCH_INTERVAL = 0.05  # Segundos como máximo entre lotes mientras se sigue buscando
+POLL_INTERVAL = 0.05  # Segundos entre comprobaciones de cancelación mientras busca otro proceso
+# Construcciones con las que una expresión regular puede abarcar varias líneas
+LINE_SPANNING = re.compile(r"\\[nsWD]|\\x0[aA]|\[\^|\(\?[a-zA-Z]*s")
+
+
+class InvalidPattern(ValueError):
+    """Expresión regular o plantilla de reemplazo no válida."""
+
+
+class SearchTimeout(TimeoutError):
+    """La búsqueda superó el tiempo máximo."""
+
+
+# Expresiones del usuario compiladas con re: re no suelta el GIL ni se puede
+# interrumpir a mitad de una coincidencia, así que se buscan en otro proceso
+UNBOUNDED_PATTERNS = weakref.WeakSet()
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_search(search_text, case_sensitive=False, whole_word=False, use_regex=False):
+    """
+    Compila el texto buscado con las mismas opciones que QTextDocument.find; con
+    use_regex se interpreta como expresión regular. Si está instalado el módulo
+    regex se usa para las expresiones, porque admite un tiempo máximo por búsqueda.
+    """
+    engine = regex if use_regex and regex is not None else re
+    pattern = search_text if use_regex else re.escape(search_text)
+    if whole_word:
+        pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+    flags = engine.MULTILINE if use_regex else 0  # ^ y $ marcan inicio y fin de línea, como en el resto de editores
+    if not case_sensitive:
+        flags |= engine.IGNORECASE
+    try:
+        compiled = engine.compile(pattern, flags)
+    except engine.error as e:
+        raise InvalidPattern(str(e)) from e
+    if use_regex and engine is re:
+        UNBOUNDED_PATTERNS.add(compiled)
+    return compiled
+
+
+def can_hang(pattern):
+    """Indica si una coincidencia de pattern podría no terminar sin poder interrumpirse."""
+    return pattern in UNBOUNDED_PATTERNS
+
+
+def narrows(previous, current):
+    """
+    Indica si las coincidencias de la búsqueda current (literal) están entre
+    las de previous, para filtrarlas en vez de volver a buscar. Hace falta que
+    current amplíe previous y que previous no pueda solaparse consigo mismo
+    (ningún prefijo propio es también sufijo): así las coincidencias de
+    previous son todas sus apariciones y ninguna de current queda fuera.
+    Cada carácter debe ocupar una sola posición del documento.
+    """
+    if not previous or len(current) <= len(previous) or not current.startswith(previous):
+        return False
+    if ASTRAL.search(current):
+        return False  # Se comparan posiciones del documento carácter a carácter
+    # Función de prefijos de KMP; en minúsculas para cubrir también la búsqueda sin distinguirlas
+    folded = previous.lower()
+    table = [0] * len(folded)
+    border = 0  # Longitud del mayor prefijo propio que también es sufijo
+    for index in range(1, len(folded)):
+        while border and folded[index] != folded[border]:
+            border = table[border - 1]
+        if folded[index] == folded[border]:
+            border += 1
+        table[index] = border
+    return border == 0
+
+
+def spans_lines(pattern):
+    """Indica si el patrón podría encontrar coincidencias que cruzan saltos de línea."""
+    return bool(pattern.flags & re.DOTALL) or bool(LINE_SPANNING.search(pattern.pattern))
+
+
+def iter_matches(pattern, text, start=0, end=None, deadline=None):
+    """
+    Recorre las coincidencias entre start y end. Lanza SearchTimeout si se pasa
+    de deadline (time.monotonic()): con re se comprueba entre coincidencias, con
+    el módulo regex también dentro de una coincidencia que no termina.
+    """
+    end = len(text) if end is None else end
+    if deadline is None:
+        yield from pattern.finditer(text, start, end)
+        return
+    options = {}
+    if regex is not None and isinstance(pattern, regex.Pattern):
+        options["timeout"] = max(0.0, deadline - time.monotonic())
+    try:
+        for match in pattern.finditer(text, start, end, **options):
+            if time.monotonic() > deadline:
+                raise SearchTimeout()
+            yield match
+    except TimeoutError as e:
+        raise SearchTimeout() from e
+
+
+def expand_replacement(match, template, use_regex=False):
+    """Texto que sustituye a match: en modo regex admite referencias a grupos (\\1, \\g<nombre>)."""
+    if not use_regex:
+        return template
+    try:
+        return match.expand(template)
+    except PATTERN_ERRORS as e:
+        raise InvalidPattern(str(e)) from e
+
+
+def find_batches(pattern, text, start=0, end=None, template=None, use_regex=False, deadline=None):
+    """
+    Busca entre las posiciones del documento start y end y devuelve por lotes
+    (inicios, finales, reemplazos) en posiciones del documento. Con template
+    calcula también el texto de cada reemplazo y conserva las coincidencias
+    vacías, que en un reemplazo cuentan; sin él se omiten porque no se ven.
+    """
+    positions = DocumentPositions(text)
+    end = len(text) if end is None else positions.to_text(end)
+    starts, ends, replacements = [], [], []
+    last_sent = time.monotonic()
+    for match in iter_matches(pattern, text, positions.to_text(start), end, deadline):
+        match_start, match_end = match.span()
+        if template is not None:
+            replacements.append(expand_replacement(match, template, use_regex))
+        elif match_start == match_end:
+            continue
+        starts.append(positions.to_document(match_start))
+        ends.append(positions.to_document(match_end))
+        if len(starts) >= BATCH_SIZE or time.monotonic() - last_sent > BATCH_INTERVAL:
+            yield starts, ends, replacements
+            starts, ends, replacements = [], [], []
+            last_sent = time.monotonic()
+    if starts:
+        yield starts, ends, replacements
+
+
+def search_process(connection, pattern, text, start, end, template, use_regex):
+    """Punto de entrada del proceso que busca una expresión de usuario: envía los lotes por connection."""
+    try:
+        for batch in find_batches(pattern, text, start, end, template, use_regex):
+            connection.send(("batch", batch))
+        connection.send(("done", None))
+    except InvalidPattern as e:
+        connection.send(("invalid", str(e)))
+    except Exception as e:
+        connection.send(("error", str(e)))
+    finally:
+        connection.close()
+
+
+def process_results(target, args, is_current, deadline):
+    """
+    Ejecuta target(connection, *args) en otro proceso y devuelve los valores de
+    sus mensajes ("batch", valor) hasta ("done", None). Termina el proceso en
+    cuanto is_current() deja de cumplirse, se agota deadline (SearchTimeout) o
+    se deja de recorrer el resultado.
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=target, args=(sender, *args), daemon=True)
+    process.start()
+    sender.close()
+    try:
+        while is_current():
+            if time.monotonic() > deadline:
+                raise SearchTimeout()
+            if not receiver.poll(POLL_INTERVAL):
+                continue
+            try:
+                kind, value = receiver.recv()
+            except EOFError:
+                raise RuntimeError("el proceso de búsqueda terminó inesperadamente")
+            if kind == "batch":
+                yield value
+            elif kind == "done":
+                return
+            elif kind == "invalid":
+                raise InvalidPattern(value)
+            else:
+                raise RuntimeError(value)
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+class DocumentPositions:
+    """
+    Convierte entre índices de Python (puntos de código) y posiciones de Qt
+    (unidades UTF-16): difieren a partir de cada carácter fuera del plano básico.
+    """
+
+    def __init__(self, text):
+        self.astral = [match.start() for match in ASTRAL.finditer(text)]
+        # Posición en el documento de cada carácter astral (cada uno ocupa dos unidades)
+        self.astral_positions = [index + count for count, index in enumerate(self.astral)]
+
+    def to_document(self, index):
+        return index + bisect_left(self.astral, index) if self.astral else index
+
+    def to_text(self, position):
+        return position - bisect_left(self.astral_positions, position) if self.astral else position
@@ -0,0 +1,38 @@
+import json
+import os
+
+# Sesión: las pestañas con archivo abiertas al cerrar la ventana, con la
+# posición del cursor y del desplazamiento de cada una, para reabrirlas.
+
+SESSION_VERSION = 1
+
+
+def load_session(path):
+    """Devuelve (pestañas, índice de la activa) de la sesión guardada, o None si no hay."""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Error al cargar la sesión: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("version") != SESSION_VERSION:
+        return None
+    tabs = [
+        tab for tab in data.get("tabs", [])
+        if isinstance(tab, dict) and isinstance(tab.get("path"), str)
+    ]
+    return tabs, data.get("current", 0)
+
+
+def save_session(path, tabs, current):
+    """Guarda la sesión de forma atómica; tabs es [{"path", "line", "column", "scroll"}]."""
+    temp_path = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": SESSION_VERSION, "tabs": tabs, "current": current}, file)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Error al guardar la sesión: {e}")
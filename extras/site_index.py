@@ -0,0 +1,359 @@
+import os
+import ast
+import sys
+import json
+import mmap
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Índice estático de los módulos del intérprete: se obtiene con ast, sin
+# importar nada, y se guarda en un archivo que se lee con mmap.
+#
+# Formato del archivo:
+#   MAGIC | <II: número de registros, longitud de los metadatos> | metadatos (JSON)
+#   | tabla de desplazamientos (uint32 por registro) | registros
+# Cada registro es una línea utf-8 "módulo\tnombre\ttipo\tparámetros\tfirma\n",
+# ordenadas por bytes (es decir, por módulo y luego por nombre). Los miembros de
+# las clases se guardan como "Clase.miembro". Los nombres importados con
+# "from ... import" son de tipo "alias" y llevan su origen ("módulo.nombre") en
+# el campo de la firma.
+
+MAGIC = b"NGSI2\0"
+HEADER = struct.Struct("<II")
+MAX_FILE_SIZE = 2 * 1024 * 1024  # Archivos más grandes suelen ser datos generados
+
+
+def index_metadata():
+    """Describe el intérprete y sus rutas; si cambia, el índice está desactualizado."""
+    # sys.path[0] es la carpeta del script (el propio IDE), no una ruta de bibliotecas
+    paths = [path for path in sys.path[1:] if path and os.path.isdir(path)]
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except OSError:
+            pass
+    return {"version": sys.version, "executable": sys.executable, "paths": paths, "mtimes": mtimes}
+
+
+def find_module_files(paths):
+    """Recorre las rutas y devuelve (módulo, archivo), quedándose con el primero de cada nombre."""
+    found = {}
+
+    def walk(directory, package):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            name = entry.name
+            if entry.is_file() and name.endswith(".py"):
+                module = name[:-3]
+                if module == "__init__" or not module.isidentifier():
+                    continue
+                found.setdefault(package + module, entry.path)
+            elif entry.is_dir() and name.isidentifier():
+                init = os.path.join(entry.path, "__init__.py")
+                if os.path.isfile(init):
+                    found.setdefault(package + name, init)
+                    walk(entry.path, package + name + ".")
+
+    for path in paths:
+        walk(path, "")
+    return found
+
+
+def format_arguments(args):
+    """Reconstruye la firma y la lista de parámetros a partir de un ast.arguments."""
+    parts, params = [], []
+    positional = args.posonlyargs + args.args
+    defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    for index, (arg, default) in enumerate(zip(positional, defaults)):
+        parts.append(arg.arg if default is None else f"{arg.arg}={ast.unparse(default)[:30]}")
+        params.append(arg.arg)
+        if args.posonlyargs and index == len(args.posonlyargs) - 1:
+            parts.append("/")
+    if args.vararg:
+        parts.append("*" + args.vararg.arg)
+        params.append(args.vararg.arg)
+    elif args.kwonlyargs:
+        parts.append("*")
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        parts.append(arg.arg if default is None else f"{arg.arg}={ast.unparse(default)[:30]}")
+        params.append(arg.arg)
+    if args.kwarg:
+        parts.append("**" + args.kwarg.arg)
+        params.append(args.kwarg.arg)
+    return "(" + ", ".join(parts) + ")", params
+
+
+def resolve_import(module, is_package, node):
+    """Nombre absoluto del módulo de un ImportFrom, resolviendo los relativos."""
+    if not node.level:
+        return node.module or ""
+    # El nivel 1 es el paquete del módulo (o el propio módulo si es un __init__)
+    base = module.split(".") if is_package else module.split(".")[:-1]
+    base = base[:len(base) - node.level + 1] if node.level - 1 <= len(base) else []
+    if node.module:
+        base.append(node.module)
+    return ".".join(part for part in base if part)
+
+
+def _literal_all(tree):
+    """Devuelve __all__ si está definido como lista o tupla literal."""
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets):
+            try:
+                return set(ast.literal_eval(node.value))
+            except (ValueError, TypeError, SyntaxError):
+                return None
+    return None
+
+
+def _definitions(body):
+    """Genera (nombre, tipo, nodo) de las definiciones de un cuerpo de módulo o clase."""
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node.name, "function", node
+        elif isinstance(node, ast.ClassDef):
+            yield node.name, "class", node
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    yield target.id, "variable", node
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            yield node.target.id, "variable", node
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.asname or alias.name.split(".")[0], "module", node
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name != "*":
+                    yield alias.asname or alias.name, "alias", node
+
+
+def _record(module, name, kind, node, is_package=False):
+    signature, params = "", []
+    if kind == "alias":
+        # El origen del nombre importado, para poder seguirlo
+        imported = next(alias.name for alias in node.names if (alias.asname or alias.name) == name.rpartition(".")[2])
+        signature = f"{resolve_import(module, is_package, node)}.{imported}"
+    elif kind == "function":
+        signature, params = format_arguments(node.args)
+    elif kind == "class":
+        # La firma de una clase es la de su __init__ sin self
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == "__init__":
+                signature, params = format_arguments(item.args)
+                params = params[1:]
+                break
+    return "\t".join((module, name, kind, ",".join(params), signature.replace("\t", " ").replace("\n", " ")))
+
+
+def index_file(item):
+    """Extrae los registros públicos de un archivo (se ejecuta en un proceso de trabajo)."""
+    module, path = item
+    is_package = os.path.basename(path) == "__init__.py"
+    try:
+        if os.path.getsize(path) > MAX_FILE_SIZE:
+            return []
+        with open(path, "rb") as file:
+            tree = ast.parse(file.read())
+    except (OSError, SyntaxError, ValueError, RecursionError):
+        return []
+
+    exported = _literal_all(tree)
+    records = []
+    if any(isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names) for node in tree.body):
+        # Con "import *" los nombres solo se conocen importando: se marca el módulo como incompleto
+        records.append("\t".join((module, "*", "star", "", "")))
+    for name, kind, node in _definitions(tree.body):
+        if exported is not None and name not in exported:
+            continue
+        if exported is None and (name.startswith("_") or kind == "module"):
+            continue
+        records.append(_record(module, name, kind, node, is_package))
+        if kind == "class":
+            for member, member_kind, member_node in _definitions(node.body):
+                if not member.startswith("_") or member == "__init__":
+                    records.append(_record(module, f"{name}.{member}", member_kind, member_node, is_package))
+    return records
+
+
+def build_index(index_path, workers=None):
+    """
+    Recorre sys.path e indexa todos los módulos en paralelo. Escribe un archivo
+    temporal y devuelve su ruta para que quien llama lo sustituya de forma atómica.
+    """
+    metadata = index_metadata()
+    modules = find_module_files(metadata["paths"])
+
+    records = set()
+    for module in modules:
+        # Los submódulos también son miembros de su paquete
+        package, _, name = module.rpartition(".")
+        if package in modules and not name.startswith("_"):
+            records.add("\t".join((package, name, "module", "", "")))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_records in executor.map(index_file, modules.items(), chunksize=32):
+            records.update(file_records)
+
+    data = sorted(line.encode("utf-8", "surrogatepass") + b"\n" for line in records)
+    meta = json.dumps(metadata).encode("utf-8")
+    offsets, position = [], 0
+    for line in data:
+        offsets.append(position)
+        position += len(line)
+
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    temp_path = index_path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(HEADER.pack(len(data), len(meta)))
+        file.write(meta)
+        file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        file.writelines(data)
+    return temp_path
+
+
+class SiteIndex:
+    """Lee el índice estático con mmap; la memoria no crece con el tamaño del índice."""
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.lock = threading.Lock()
+        self.file = None
+        self.map = None
+        self.offsets = None
+        self.data_start = 0
+        self.metadata = None
+        self.building = False
+
+    def is_ready(self):
+        """Indica si hay un índice cargado."""
+        with self.lock:
+            return self._open()
+
+    def is_stale(self):
+        """Indica si el índice no existe o corresponde a otro intérprete o a otras rutas."""
+        with self.lock:
+            if not self._open():
+                return True
+            return self.metadata != index_metadata()
+
+    def build_in_background(self, workers=None, on_finished=None):
+        """Reconstruye el índice en un hilo si está desactualizado."""
+        if self.building or not self.is_stale():
+            return
+        self.building = True
+
+        def run():
+            try:
+                temp_path = build_index(self.index_path, workers)
+                with self.lock:
+                    self._close()
+                    os.replace(temp_path, self.index_path)
+            except Exception as e:
+                print(f"Error al construir el índice de módulos: {e}")
+            finally:
+                self.building = False
+            if on_finished:
+                on_finished()
+
+        threading.Thread(target=run, name="site-index", daemon=True).start()
+
+    def members(self, module):
+        """
+        Devuelve los miembros de nivel superior del módulo ({nombre: [tipo, firma, parámetros]})
+        o None si el módulo no está en el índice o no se puede resolver sin importarlo.
+        """
+        records = self._module_records(module)
+        if records is None or any(name == "*" for name, info in records):
+            return None
+        return {name: info for name, info in records if "." not in name}
+
+    def class_members(self, module, class_name):
+        """Devuelve los miembros de una clase definida en el módulo, o None."""
+        records = self._module_records(module)
+        if records is None:
+            return None
+        prefix = class_name + "."
+        return {name[len(prefix):]: info for name, info in records if name.startswith(prefix)}
+
+    def _module_records(self, module):
+        with self.lock:
+            if not self._open():
+                return None
+            target = module.encode("utf-8")
+            index = self._first_record(target)
+            records = []
+            while index < len(self.offsets):
+                fields = self._record(index)
+                if fields[0] != target:
+                    break
+                name, kind, params, signature = (field.decode("utf-8", "surrogatepass") for field in fields[1:])
+                records.append((name, [kind, signature or None, params.split(",") if params else []]))
+                index += 1
+            return records or None
+
+    def _first_record(self, target):
+        # Búsqueda binaria sobre la tabla de desplazamientos
+        low, high = 0, len(self.offsets)
+        while low < high:
+            middle = (low + high) // 2
+            start = self.data_start + self.offsets[middle]
+            if self.map[start:self.map.find(b"\t", start)] < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _record(self, index):
+        start = self.data_start + self.offsets[index]
+        end = self.map.find(b"\n", start)
+        return self.map[start:end].split(b"\t")
+
+    def _open(self):
+        if self.map is not None:
+            return True
+        try:
+            self.file = open(self.index_path, "rb")
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._close()
+            return False
+        if self.map[:len(MAGIC)] != MAGIC:
+            self._close()
+            return False
+        position = len(MAGIC)
+        count, meta_length = HEADER.unpack_from(self.map, position)
+        position += HEADER.size
+        self.metadata = json.loads(self.map[position:position + meta_length])
+        position += meta_length
+        self.offsets = memoryview(self.map)[position:position + 4 * count].cast("I")
+        self.data_start = position + 4 * count
+        return True
+
+    def _close(self):
+        if self.offsets is not None:
+            self.offsets.release()
+            self.offsets = None
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.metadata = None
+
+
+if __name__ == "__main__":
+    # Uso: python -m extras.site_index [ruta del índice]
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config.Config import config
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(config.cache_dir, "site_index.bin")
+    os.replace(build_index(path), path)
+    print(f"Índice escrito en {path}")
@@ -1,10 +1,18 @@
+import os
+import time
+
 from PyQt5.QtWidgets import (
-    QDialog, QLabel, QLineEdit, QCheckBox, QPushButton, QVBoxLayout, QHBoxLayout, QGridLayout, QMessageBox, QAction, QSizePolicy
+    QDialog, QLabel, QLineEdit, QCheckBox, QPushButton, QVBoxLayout, QHBoxLayout, QGridLayout, QMessageBox, QAction, QSizePolicy,
+    QFileDialog
 )
 from PyQt5.QtGui import QTextCursor, QTextDocument, QIcon
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 
+from config.Config import config
 from classes.EditorTab import EditorTab
+from classes.LargeFileViewer import LargeFileViewer
+from classes.SearchWorker import SearchWorker
+from extras.search import compile_search, expand_replacement, narrows, DocumentPositions, InvalidPattern
 
 class FindReplaceDialog(QDialog):
     def __init__(self, parent=None):
@@ -14,6 +22,17 @@ class FindReplaceDialog(QDialog):
         self.parent_editor = None  # Editor asociado
         self.parent = parent
         self.all_tabs_editors = []  # Lista de editores abiertos (para búsqueda en todos los tabs)
+        self.editors_key = None  # (pestaña actual, nº de pestañas) con que se calculó all_tabs_editors
+        self.highlighted_editors = set()  # Editores con las coincidencias resaltadas
+        self.pending_actions = []  # Acciones que esperan a que terminen de buscarse las coincidencias
+        self.replace_jobs = {}  # Búsquedas de Reemplazar Todo en curso: trabajador -> datos del editor
+        self.replace_count = 0  # Reemplazos hechos por el último Reemplazar Todo
+        self.replace_errors = []
+        self.replace_started = 0.0
+        self.counted_editors = []  # Editores del último recuento
+        self.last_query = None  # Texto y opciones de la última búsqueda mientras se escribe
+        self.last_pattern = None
+        self.search_anchor = None  # Posición del cursor al empezar a escribir la búsqueda
         self.search_direction_down = True  # Dirección inicial: hacia abajo
 
         # Widgets principales
@@ -27,6 +46,13 @@ class FindReplaceDialog(QDialog):
         self.whole_word_checkbox = QCheckBox("Coincidencia de palabra completa")
         self.limit_to_selection_checkbox = QCheckBox("Limitar a selección")
         self.search_all_tabs_checkbox = QCheckBox("Buscar en todos los tabs")
+        self.regex_checkbox = QCheckBox("Expresión regular")
+        self.search_files_checkbox = QCheckBox("Buscar en archivos de:")
+        self.directory_input = QLineEdit()  # Carpeta para buscar en archivos
+        self.directory_chosen = False  # El usuario eligió la carpeta: ya no sigue al proyecto del editor
+        self.directory_button = QPushButton("…")
+        self.directory_button.setFixedWidth(40)
+        self.status_label = QLabel("")  # Recuento de coincidencias mientras se buscan
 
         # Botones principales
         self.find_button = QPushButton("Buscar")
@@ -53,6 +79,11 @@ class FindReplaceDialog(QDialog):
         main_layout.addWidget(self.whole_word_checkbox, 3, 0, 1, 4)
         main_layout.addWidget(self.limit_to_selection_checkbox, 4, 0, 1, 4)
         main_layout.addWidget(self.search_all_tabs_checkbox, 5, 0, 1, 4)
+        main_layout.addWidget(self.regex_checkbox, 6, 0, 1, 4)
+        main_layout.addWidget(self.search_files_checkbox, 7, 0)
+        main_layout.addWidget(self.directory_input, 7, 1, 1, 2)
+        main_layout.addWidget(self.directory_button, 7, 3)
+        main_layout.addWidget(self.status_label, 8, 0, 1, 4)
 
         # Layout horizontal para el botón de buscar y el de dirección
         self.find_layout = QHBoxLayout()
@@ -67,31 +98,86 @@ class FindReplaceDialog(QDialog):
         button_layout.addWidget(self.count_button)
         button_layout.addWidget(self.close_button)
         button_layout.addStretch()
-        main_layout.addLayout(button_layout, 0, 4, 7, 1)
+        main_layout.addLayout(button_layout, 0, 4, 9, 1)
 
         self.setLayout(main_layout)
 
         # Conexión de botones
         self.find_button.clicked.connect(self.find_text)
         self.direction_button.clicked.connect(self.toggle_direction)
+        self.directory_button.clicked.connect(self.choose_directory)
+        self.directory_input.textEdited.connect(self.on_directory_edited)
         self.replace_button.clicked.connect(self.replace_text)
         self.replace_all_button.clicked.connect(self.replace_all_text)
         self.count_button.clicked.connect(self.count_matches)
         self.close_button.clicked.connect(self.close)
 
+        # Búsqueda mientras se escribe
+        self.typing_timer = QTimer(self)
+        self.typing_timer.setSingleShot(True)
+        self.typing_timer.setInterval(config.search_as_you_type_delay_ms)
+        self.typing_timer.timeout.connect(self.search_as_you_type)
+        self.search_input.textChanged.connect(self.typing_timer.start)
+        for checkbox in (self.match_case_checkbox, self.whole_word_checkbox, self.regex_checkbox, self.search_all_tabs_checkbox):
+            checkbox.toggled.connect(self.typing_timer.start)
+
+        if parent is not None and hasattr(parent, "tabs"):
+            parent.tabs.currentChanged.connect(self.invalidate_editors)
+            parent.tabs.currentChanged.connect(self.on_tab_changed)
+            parent.tabs.tabBar().tabMoved.connect(self.invalidate_editors)
+
     def set_editor(self, editor):
         """Asocia un editor al cuadro de diálogo."""
         self.parent_editor = editor
+        self.update_default_directory()
+
+    def update_default_directory(self):
+        """Mientras el usuario no elija otra, se busca en archivos del proyecto del editor asociado."""
+        if self.directory_chosen:
+            return
+        editor = self.parent_editor
+        path = getattr(editor, "file_path", None)
+        directory = getattr(editor, "workspace_root", None) or (os.path.dirname(path) if path else os.getcwd())
+        if self.directory_input.text() != directory:
+            self.directory_input.setText(directory)
+
+    def on_directory_edited(self, text):
+        """Escribir la carpeta a mano cuenta como elegirla (borrarla vuelve a la del proyecto)."""
+        self.directory_chosen = bool(text)
+
+    def on_tab_changed(self, index):
+        """Sigue a la pestaña activa: buscar, reemplazar y contar actúan siempre sobre ella."""
+        self.parent_editor = self.parent.tabs.widget(index)
+        self.update_default_directory()
+        # La búsqueda mientras se escribe empieza de nuevo en el otro editor
+        self.last_query = None
+        self.last_pattern = None
+        self.search_anchor = None
+
+    def choose_directory(self):
+        """Elige la carpeta en la que buscar en archivos."""
+        directory = QFileDialog.getExistingDirectory(self, "Buscar en la carpeta", self.directory_input.text())
+        if directory:
+            self.directory_input.setText(directory)
+            self.directory_chosen = True
+            self.search_files_checkbox.setChecked(True)
 
     def set_all_tabs_editors(self):
-        """Asocia todos los editores abiertos para búsqueda en todos los tabs."""
-        editors = []
-        current_widget = self.parent.tabs.currentWidget() 
-        current_index = self.parent.tabs.indexOf(current_widget)
-        for i in range(current_index, self.parent.tabs.count()):
-            editors.append(self.parent.tabs.widget(i))
-        self.all_tabs_editors = editors
-        
+        """
+        Asocia los editores abiertos, desde la pestaña actual, para búsqueda en todos
+        los tabs. La lista se reutiliza mientras no cambien las pestañas.
+        """
+        tabs = self.parent.tabs
+        key = (tabs.currentIndex(), tabs.count())
+        if key == self.editors_key:
+            return
+        self.all_tabs_editors = [tabs.widget(i) for i in range(tabs.currentIndex(), tabs.count())]
+        self.editors_key = key
+
+    def invalidate_editors(self, *_):
+        """Obliga a recalcular la lista de editores (se cambió, movió, abrió o cerró una pestaña)."""
+        self.editors_key = None
+
     def get_search_flags(self):
         """Obtiene las banderas de búsqueda según las opciones seleccionadas."""
         flags = QTextDocument.FindFlags()
@@ -115,12 +201,36 @@ class FindReplaceDialog(QDialog):
             QMessageBox.warning(self, "Error", "Por favor, ingresa un texto para buscar.")
             return
 
+        if self.search_files_checkbox.isChecked():
+            self.find_in_files(search_text)
+            return
+        self.search_anchor = None  # La próxima búsqueda mientras se escribe parte de aquí
+
+        viewer = self.parent.tabs.currentWidget()
+        if isinstance(viewer, LargeFileViewer):
+            # El visor busca directamente en los bytes del archivo, desde la coincidencia anterior
+            pattern = self.get_search_pattern(search_text)
+            if pattern is not None:
+                viewer.find(pattern, backward=not self.search_direction_down)
+            return
+
         flags = self.get_search_flags()
         self.set_all_tabs_editors()
         editors = self.all_tabs_editors if self.search_all_tabs_checkbox.isChecked() else [self.parent.tabs.currentWidget()]
+        pattern = self.get_search_pattern(search_text)
+        if pattern is None:
+            return
+        for editor in editors:
+            self.highlight_matches(editor, pattern)
+
+        if self.regex_checkbox.isChecked():
+            self.find_in_match_index(editors)
+            return
 
         for i in range(len(editors)):
             editor = editors[i]
+            if not isinstance(editor, EditorTab):
+                continue
             #print(f"Estamos en position{i}/n")
             cursor = editor.textCursor()
 
@@ -150,44 +260,237 @@ class FindReplaceDialog(QDialog):
         # Si se recorrieron todos los editores sin encontrar coincidencia
         QMessageBox.information(self, "Buscar", "No se encontró el texto.")
 
+    def search_as_you_type(self):
+        """
+        Actualiza las coincidencias con cada tecla. Si la búsqueda solo se ha
+        alargado, filtra las coincidencias que ya había en vez de buscar de nuevo,
+        y selecciona la primera desde donde estaba el cursor al empezar a escribir.
+        """
+        search_text = self.search_input.text()
+        if not self.isVisible() or self.search_files_checkbox.isChecked():
+            return  # Buscar en archivos con cada tecla sería demasiado costoso
+        if not search_text:
+            self.clear_highlighted_matches()
+            return
+        pattern = self.get_search_pattern(search_text, quiet=True)
+        if pattern is None:
+            self.status_label.setText("Expresión regular no válida")
+            return
+
+        options = (self.match_case_checkbox.isChecked(), self.whole_word_checkbox.isChecked(), self.regex_checkbox.isChecked())
+        # Con palabra completa o expresiones, alargar la búsqueda no implica coincidir en menos sitios
+        refine = (
+            self.last_query is not None and self.last_query[1:] == options and not any(options[1:])
+            and narrows(self.last_query[0], search_text)
+        )
+        previous_pattern = self.last_pattern
+        if refine:
+            suffix = search_text[len(self.last_query[0]):]
+            suffix_pattern = compile_search(suffix, options[0])
+        self.last_query = (search_text,) + options
+        self.last_pattern = pattern
+
+        self.set_all_tabs_editors()
+        editors = self.all_tabs_editors if self.search_all_tabs_checkbox.isChecked() else [self.parent_editor]
+        for editor in editors:
+            if refine and isinstance(editor, EditorTab) and editor.match_index.pattern is previous_pattern:
+                editor.match_index.narrow(pattern, suffix_pattern, len(suffix))
+            else:
+                self.highlight_matches(editor, pattern)
+        self.update_status()
+        self.select_match_from_anchor()
+
+    def select_match_from_anchor(self):
+        """Selecciona la primera coincidencia desde el punto de partida (o desde el principio si no hay más)."""
+        editor = self.parent_editor
+        if not isinstance(editor, EditorTab):
+            return
+        if self.search_anchor is None:
+            self.search_anchor = editor.textCursor().selectionStart()
+        match = editor.match_index.next_match(self.search_anchor) or editor.match_index.next_match(0)
+        if match is None:
+            if editor.match_index.scanning:
+                self.wait_for_matches(self.select_match_from_anchor)
+            return
+        cursor = editor.textCursor()
+        cursor.setPosition(match[0])
+        cursor.setPosition(match[1], QTextCursor.KeepAnchor)
+        editor.setTextCursor(cursor)
+
+    def find_in_files(self, search_text):
+        """Busca en los archivos de la carpeta elegida; los resultados aparecen en el panel de la ventana."""
+        directory = self.directory_input.text()
+        if not os.path.isdir(directory):
+            QMessageBox.warning(self, "Error", f"La carpeta {directory} no existe.")
+            return
+        pattern = self.get_search_pattern(search_text)
+        if pattern is not None:
+            self.parent.find_in_files(directory, search_text, pattern)
+
+    def find_in_match_index(self, editors):
+        """Selecciona la siguiente coincidencia de la expresión regular según el índice de coincidencias."""
+        for editor in editors:
+            if not isinstance(editor, EditorTab):
+                continue
+            cursor = editor.textCursor()
+            if self.search_direction_down:
+                match = editor.match_index.next_match(cursor.selectionEnd())
+            else:
+                match = editor.match_index.next_match(cursor.selectionStart(), backward=True)
+            if match is None:
+                if editor.match_index.scanning:
+                    # Puede que la coincidencia aún no haya llegado: se repite al terminar la búsqueda
+                    self.wait_for_matches(self.find_text)
+                    return
+                continue
+            cursor.setPosition(match[0])
+            cursor.setPosition(match[1], QTextCursor.KeepAnchor)
+            editor.setTextCursor(cursor)
+            self.parent.tabs.setCurrentWidget(editor)
+            return
+
+        QMessageBox.information(self, "Buscar", "No se encontró el texto.")
 
     def replace_text(self):
         """Reemplaza el texto seleccionado con el texto de reemplazo."""
+        if not isinstance(self.parent_editor, EditorTab):
+            return  # El visor de archivos enormes es de solo lectura
         cursor = self.parent_editor.textCursor()
-        if cursor.hasSelection():
-            cursor.insertText(self.replace_input.text())
+        if cursor.hasSelection() and not self.parent_editor.isReadOnly():
+            replacement = self.replace_input.text()
+            if self.regex_checkbox.isChecked():
+                replacement = self.expand_selection(cursor, replacement)
+            if replacement is not None:
+                cursor.insertText(replacement)
             self.find_text()  # Buscar el siguiente
 
+    def expand_selection(self, cursor, template):
+        """Sustituye los grupos de template con la coincidencia seleccionada (None si la selección no coincide)."""
+        pattern = self.get_search_pattern(self.search_input.text())
+        if pattern is None:
+            return None
+        text = self.parent_editor.toPlainText()
+        positions = DocumentPositions(text)
+        start, end = positions.to_text(cursor.selectionStart()), positions.to_text(cursor.selectionEnd())
+        match = pattern.match(text, start)
+        if match is None or match.end() != end:
+            match = pattern.fullmatch(text, start, end)
+        if match is None:
+            return None
+        try:
+            return expand_replacement(match, template, use_regex=True)
+        except InvalidPattern as e:
+            QMessageBox.warning(self, "Error", f"Reemplazo no válido: {e}")
+            return None
+
     def replace_all_text(self):
-        """Reemplaza todas las ocurrencias del texto de búsqueda."""
+        """
+        Reemplaza todas las ocurrencias del texto de búsqueda. Las coincidencias
+        (y los reemplazos con sus grupos) se calculan en segundo plano sobre una
+        copia del texto y se aplican al terminar, si el documento no ha cambiado.
+        """
         search_text = self.search_input.text()
         replace_text = self.replace_input.text()
         if not search_text:
             QMessageBox.warning(self, "Error", "Por favor, ingresa un texto para buscar.")
             return
 
-        flags = self.get_search_flags()
+        pattern = self.get_search_pattern(search_text)
+        if pattern is None:
+            return
         self.set_all_tabs_editors()
         editors = self.all_tabs_editors if self.search_all_tabs_checkbox.isChecked() else [self.parent_editor]
-        total_count = 0
 
+        for worker in self.replace_jobs:
+            worker.cancel()
+        self.replace_jobs = {}
+        self.replace_count = 0
+        self.replace_errors = []
+        self.replace_started = time.perf_counter()
         for editor in editors:
+            if not isinstance(editor, EditorTab) or editor.isReadOnly():
+                continue  # Las pestañas que aún se están cargando no se modifican
+            start, end = 0, None
             cursor = editor.textCursor()
             if self.limit_to_selection_checkbox.isChecked() and cursor.hasSelection():
                 start, end = cursor.selectionStart(), cursor.selectionEnd()
-                cursor.setPosition(start)
-                editor.setTextCursor(cursor)
-                while cursor.position() <= end and editor.find(search_text, flags):
-                    editor.textCursor().insertText(replace_text)
-                    total_count += 1
+            worker = SearchWorker(self)
+            worker.batch_found.connect(self.on_replace_batch)
+            worker.search_finished.connect(self.on_replace_finished)
+            self.replace_jobs[worker] = {
+                "editor": editor, "revision": editor.document().revision(), "starts": [], "ends": [], "replacements": [],
+            }
+            worker.start(pattern, editor.toPlainText(), start, end, replace_text, self.regex_checkbox.isChecked())
+        if not self.replace_jobs:
+            self.finish_replace_all()
+        else:
+            self.status_label.setText("Reemplazando…")
+
+    def on_replace_batch(self, generation, starts, ends, replacements):
+        job = self.replace_jobs.get(self.sender())
+        if job is None or not self.sender().is_current(generation):
+            return
+        job["starts"].extend(starts)
+        job["ends"].extend(ends)
+        job["replacements"].extend(replacements)
+
+    def on_replace_finished(self, generation, error):
+        worker = self.sender()
+        job = self.replace_jobs.pop(worker, None)
+        worker.deleteLater()
+        if job is None or not worker.is_current(generation):
+            return
+        editor = job["editor"]
+        try:
+            if error:
+                self.replace_errors.append(error)
+            elif editor.document().revision() != job["revision"]:
+                self.replace_errors.append("El documento cambió durante la búsqueda; no se reemplazó nada en él.")
             else:
-                cursor.movePosition(QTextCursor.Start)
-                editor.setTextCursor(cursor)
-                while editor.find(search_text, flags):
-                    editor.textCursor().insertText(replace_text)
-                    total_count += 1
-
-        QMessageBox.information(self, "Reemplazar Todo", f"Se reemplazaron {total_count} ocurrencias.")
+                self.replace_count += self.apply_replacements(editor, job["starts"], job["ends"], job["replacements"])
+        except RuntimeError:
+            pass  # El editor se cerró mientras se buscaba
+        if not self.replace_jobs:
+            self.finish_replace_all()
+
+    def finish_replace_all(self):
+        elapsed_ms = (time.perf_counter() - self.replace_started) * 1000
+        self.status_label.setText("")
+        message = f"Se reemplazaron {self.replace_count} ocurrencias en {elapsed_ms:.0f} ms."
+        if self.replace_errors:
+            QMessageBox.warning(self, "Reemplazar Todo", "\n".join([message] + self.replace_errors))
+        else:
+            QMessageBox.information(self, "Reemplazar Todo", message)
+
+    def get_search_pattern(self, search_text, quiet=False):
+        """Compila el texto buscado según las opciones seleccionadas; None si la expresión no es válida."""
+        try:
+            return compile_search(
+                search_text, self.match_case_checkbox.isChecked(), self.whole_word_checkbox.isChecked(),
+                self.regex_checkbox.isChecked(),
+            )
+        except InvalidPattern as e:
+            if not quiet:
+                QMessageBox.warning(self, "Error", f"Expresión regular no válida: {e}")
+            return None
+
+    def apply_replacements(self, editor, starts, ends, replacements):
+        """
+        Sustituye las coincidencias (posiciones del documento) en un único bloque
+        de edición (un solo paso de deshacer). Devuelve cuántas hubo.
+        """
+        if not starts:
+            return 0
+
+        # De atrás hacia delante para que las posiciones pendientes sigan siendo válidas
+        cursor = QTextCursor(editor.document())
+        cursor.beginEditBlock()
+        for match_start, match_end, replacement in zip(reversed(starts), reversed(ends), reversed(replacements)):
+            cursor.setPosition(match_start)
+            cursor.setPosition(match_end, QTextCursor.KeepAnchor)
+            cursor.insertText(replacement)
+        cursor.endEditBlock()
+        return len(starts)
 
     def count_matches(self):
         """Cuenta cuántas veces aparece el texto buscado."""
@@ -196,19 +499,81 @@ class FindReplaceDialog(QDialog):
             QMessageBox.warning(self, "Error", "Por favor, ingresa un texto para buscar.")
             return
 
-        flags = self.get_search_flags()
+        pattern = self.get_search_pattern(search_text)
+        if pattern is None:
+            return
         self.set_all_tabs_editors()
         editors = self.all_tabs_editors if self.search_all_tabs_checkbox.isChecked() else [self.parent_editor]
-        total_count = 0
-
-        for editor in editors:
-            cursor = editor.textCursor()
-            cursor.movePosition(QTextCursor.Start)
-            editor.setTextCursor(cursor)
-            while editor.find(search_text, flags):
-                total_count += 1
-
-        QMessageBox.information(self, "Contar Coincidencias", f"Se encontraron {total_count} coincidencias.")
+        self.counted_editors = [editor for editor in editors if isinstance(editor, EditorTab)]
+
+        # El índice de coincidencias cuenta sin mover el cursor y resalta las visibles
+        for editor in self.counted_editors:
+            self.highlight_matches(editor, pattern)
+        if any(editor.match_index.scanning for editor in self.counted_editors):
+            self.wait_for_matches(self.show_match_count)
+        else:
+            self.show_match_count()
+
+    def show_match_count(self):
+        total_count = sum(editor.match_index.count() for editor in self.counted_editors)
+        errors = {editor.match_index.error for editor in self.counted_editors} - {""}
+        message = f"Se encontraron {total_count} coincidencias."
+        if errors:
+            QMessageBox.warning(self, "Contar Coincidencias", "\n".join([message] + sorted(errors)))
+        else:
+            QMessageBox.information(self, "Contar Coincidencias", message)
+
+    def highlight_matches(self, editor, pattern):
+        """Activa el resaltado de coincidencias en un editor, recordándolo para quitarlo al cerrar."""
+        if isinstance(editor, EditorTab):
+            if editor not in self.highlighted_editors:
+                editor.match_index.changed.connect(self.update_status)
+                editor.match_index.scan_finished.connect(self.on_scan_finished)
+                self.highlighted_editors.add(editor)
+            editor.set_search_pattern(pattern)
+
+    def update_status(self):
+        """Muestra el recuento de coincidencias a medida que llegan."""
+        indexes = [editor.match_index for editor in self.highlighted_editors]
+        total_count = sum(index.count() for index in indexes)
+        if any(index.scanning for index in indexes):
+            self.status_label.setText(f"Buscando… {total_count} coincidencias")
+        elif any(index.error for index in indexes):
+            self.status_label.setText(f"{total_count} coincidencias (búsqueda incompleta)")
+        else:
+            self.status_label.setText(f"{total_count} coincidencias")
+
+    def wait_for_matches(self, action):
+        """Deja action pendiente hasta que terminen las búsquedas en curso."""
+        if action not in self.pending_actions:
+            self.pending_actions.append(action)
+
+    def on_scan_finished(self, _error):
+        """Ejecuta las acciones que esperaban a que terminaran todas las búsquedas."""
+        self.update_status()
+        if any(editor.match_index.scanning for editor in self.highlighted_editors):
+            return
+        actions, self.pending_actions = self.pending_actions, []
+        for action in actions:
+            action()
+
+    def clear_highlighted_matches(self):
+        """Quita el resaltado de coincidencias de todos los editores."""
+        for editor in self.highlighted_editors:
+            try:
+                editor.match_index.changed.disconnect(self.update_status)
+                editor.match_index.scan_finished.disconnect(self.on_scan_finished)
+                editor.set_search_pattern(None)
+            except RuntimeError:
+                pass  # El editor ya se cerró
+        self.highlighted_editors.clear()
+        self.pending_actions = []
+        self.last_query = self.last_pattern = self.search_anchor = None
+        self.status_label.setText("")
+
+    def hideEvent(self, event):
+        self.clear_highlighted_matches()
+        super().hideEvent(event)
 
 
 
@@ -0,0 +1,424 @@
+import os
+import ast
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from extras.site_index import format_arguments, resolve_import
+
+# Índice de los archivos Python de un proyecto: definiciones, importaciones y
+# referencias de cada archivo, en una base de datos SQLite compartida por todos
+# los proyectos abiertos. Solo se vuelven a analizar los archivos cuya fecha o
+# tamaño han cambiado y, de esos, los que además tienen otro contenido.
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    module TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    file_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    signature TEXT,
+    params TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imports (
+    file_id INTEGER NOT NULL,
+    module TEXT NOT NULL,
+    name TEXT,
+    alias TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    file_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    col INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_root ON files (root);
+CREATE INDEX IF NOT EXISTS files_module ON files (module);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file_id);
+CREATE INDEX IF NOT EXISTS imports_file ON imports (file_id);
+CREATE INDEX IF NOT EXISTS refs_name ON refs (name);
+CREATE INDEX IF NOT EXISTS refs_file ON refs (file_id);
+"""
+
+ROOT_MARKERS = (".git", ".hg", "pyproject.toml", "setup.py", "setup.cfg")
+SKIPPED_DIRS = {"__pycache__", "node_modules", "site-packages", "build", "dist", "venv", "env"}
+MAX_FILE_SIZE = 2 * 1024 * 1024  # Archivos más grandes suelen ser datos generados
+PARALLEL_THRESHOLD = 16  # Con menos archivos cambiados no compensa arrancar procesos
+MAX_PROJECT_FILES = 20000  # Archivos .py que se indexan como máximo de un proyecto
+
+
+def is_project_root(directory):
+    """Indica si la carpeta tiene algún marcador de proyecto (.git, pyproject.toml...)."""
+    return any(os.path.exists(os.path.join(directory, marker)) for marker in ROOT_MARKERS)
+
+
+def find_root(path):
+    """
+    Carpeta del proyecto de un archivo: la primera hacia arriba con un
+    marcador. Sin marcadores es la carpeta del propio archivo, que
+    find_python_files() no recorre por dentro (p. ej. ~/notas.py o /tmp/x.py).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    current = directory
+    while True:
+        if is_project_root(current):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return directory  # Sin marcadores: la carpeta del propio archivo
+        current = parent
+
+
+def module_name(root, path):
+    """Nombre de módulo de un archivo relativo a la raíz del proyecto."""
+    relative = os.path.splitext(os.path.relpath(path, root))[0]
+    parts = relative.split(os.sep)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def find_python_files(root):
+    """
+    Devuelve {ruta: (mtime_ns, tamaño)} de los .py del proyecto, sin entornos
+    virtuales ni ocultos (como mucho MAX_PROJECT_FILES). Si root no tiene
+    marcadores de proyecto solo se miran los archivos de la propia carpeta.
+    """
+    found = {}
+    recursive = is_project_root(root)
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            name = entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not recursive or name.startswith(".") or name in SKIPPED_DIRS:
+                        continue
+                    if os.path.exists(os.path.join(entry.path, "pyvenv.cfg")):
+                        continue
+                    pending.append(entry.path)
+                elif name.endswith(".py") and entry.is_file():
+                    stat = entry.stat()
+                    found[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                    if len(found) >= MAX_PROJECT_FILES:
+                        print(f"Se indexan solo los primeros {MAX_PROJECT_FILES} archivos .py del proyecto {root}")
+                        return found
+            except OSError:
+                continue
+    return found
+
+
+class _Collector(ast.NodeVisitor):
+    """Recorre un módulo anotando definiciones (con su ámbito), importaciones y referencias."""
+
+    def __init__(self, module, is_package=False):
+        self.module = module
+        self.is_package = is_package
+        self.scope = []  # Nombres de las clases y funciones que encierran el nodo actual
+        self.kinds = []  # "class" o "function" para cada nivel de scope
+        self.symbols = []
+        self.imports = []
+        self.references = []
+
+    def _define(self, name, kind, node, scope, signature=None, params=()):
+        self.symbols.append((name, kind, ".".join(scope), node.lineno, node.col_offset, signature, ",".join(params)))
+
+    def _visit_scope(self, node, kind):
+        self.scope.append(node.name)
+        self.kinds.append(kind)
+        self.generic_visit(node)
+        self.scope.pop()
+        self.kinds.pop()
+
+    def visit_FunctionDef(self, node):
+        signature, params = format_arguments(node.args)
+        self._define(node.name, "function", node, self.scope, signature, params)
+        self._visit_scope(node, "function")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        # La firma de una clase es la de su __init__ sin self
+        signature, params = None, []
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == "__init__":
+                signature, params = format_arguments(item.args)
+                params = params[1:]
+                break
+        self._define(node.name, "class", node, self.scope, signature, params)
+        self._visit_scope(node, "class")
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            self._define_target(target)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        self._define_target(node.target)
+        self.generic_visit(node)
+
+    def _define_target(self, target):
+        # Las variables locales de las funciones no son visibles desde fuera; los self.x sí
+        in_function = bool(self.kinds) and self.kinds[-1] == "function"
+        if isinstance(target, ast.Name) and not in_function:
+            self._define(target.id, "variable", target, self.scope)
+        elif (isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "self"
+              and in_function and len(self.kinds) >= 2 and self.kinds[-2] == "class"):
+            self._define(target.attr, "variable", target, self.scope[:-1])
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for element in target.elts:
+                self._define_target(element)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append((alias.name, None, alias.asname or alias.name.split(".")[0], node.lineno))
+
+    def visit_ImportFrom(self, node):
+        module = resolve_import(self.module, self.is_package, node)
+        for alias in node.names:
+            if alias.name != "*":
+                self.imports.append((module, alias.name, alias.asname or alias.name, node.lineno))
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.references.append((node.id, node.lineno, node.col_offset))
+
+    def visit_Attribute(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.references.append((node.attr, node.end_lineno, node.end_col_offset - len(node.attr)))
+        self.generic_visit(node)
+
+
+def file_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def index_source(item):
+    """
+    Analiza un archivo (se ejecuta en un proceso de trabajo). Devuelve
+    (ruta, hash, símbolos, importaciones, referencias); si el hash coincide con
+    el conocido no se analiza y las listas son None.
+    """
+    path, module, known_hash = item
+    try:
+        with open(path, "rb") as file:
+            data = file.read(MAX_FILE_SIZE + 1)
+    except OSError:
+        return path, None, None, None, None
+    digest = file_hash(data)
+    if digest == known_hash:
+        return path, digest, None, None, None
+    collector = _Collector(module, os.path.basename(path) == "__init__.py")
+    if len(data) <= MAX_FILE_SIZE:
+        try:
+            collector.visit(ast.parse(data))
+        except (SyntaxError, ValueError, RecursionError):
+            pass  # Se guarda vacío: se reintenta cuando cambie el archivo
+    return path, digest, collector.symbols, collector.imports, collector.references
+
+
+class WorkspaceDatabase:
+    """Acceso a la base de datos del índice; cada hilo usa su propia conexión."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.local = threading.local()
+
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")  # Las lecturas no esperan a la escritura
+            connection.execute("PRAGMA synchronous=NORMAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                with connection:
+                    for table in ("files", "symbols", "imports", "refs"):
+                        connection.execute(f"DROP TABLE IF EXISTS {table}")
+                    connection.executescript(SCHEMA)
+                    connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self.local.connection = connection
+        return connection
+
+    def update_root(self, root, workers=None, cancelled=None):
+        """
+        Sincroniza el índice con los archivos del proyecto. Devuelve el número de
+        archivos analizados de nuevo (0 si no había cambios).
+        """
+        connection = self.connection()
+        on_disk = find_python_files(root)
+        known = {path: (file_id, mtime_ns, size, digest) for file_id, path, mtime_ns, size, digest in
+                 connection.execute("SELECT id, path, mtime_ns, size, hash FROM files WHERE root = ?", (root,))}
+
+        removed = [known[path][0] for path in known.keys() - on_disk.keys()]
+        changed = [
+            (path, module_name(root, path), known[path][3] if path in known else None)
+            for path, stat in on_disk.items()
+            if path not in known or known[path][1:3] != stat
+        ]
+        if not removed and not changed:
+            return 0
+
+        with connection:
+            self._delete_files(connection, removed)
+
+        if len(changed) < PARALLEL_THRESHOLD:
+            results = map(index_source, changed)
+            self._store(connection, root, on_disk, known, results, cancelled)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(index_source, changed, chunksize=16)
+                self._store(connection, root, on_disk, known, results, cancelled)
+        return len(changed)
+
+    def _store(self, connection, root, on_disk, known, results, cancelled):
+        # Se confirma por lotes para que las consultas vean los resultados pronto
+        batch = []
+        for result in results:
+            if cancelled is not None and cancelled():
+                break
+            batch.append(result)
+            if len(batch) >= 200:
+                self._write(connection, root, on_disk, known, batch)
+                batch = []
+        if batch:
+            self._write(connection, root, on_disk, known, batch)
+
+    def _write(self, connection, root, on_disk, known, batch):
+        with connection:
+            for path, digest, symbols, imports, references in batch:
+                if digest is None:
+                    continue  # No se pudo leer: se reintenta en la siguiente sincronización
+                mtime_ns, size = on_disk[path]
+                if symbols is None:
+                    # Mismo contenido con otra fecha: basta con actualizar la fecha
+                    connection.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?", (mtime_ns, size, path))
+                    continue
+                if path in known:
+                    self._delete_files(connection, [known[path][0]])
+                file_id = connection.execute(
+                    "INSERT INTO files (root, path, module, mtime_ns, size, hash) VALUES (?, ?, ?, ?, ?, ?)",
+                    (root, path, module_name(root, path), mtime_ns, size, digest),
+                ).lastrowid
+                connection.executemany(
+                    "INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [(file_id, *symbol) for symbol in symbols]
+                )
+                connection.executemany("INSERT INTO imports VALUES (?, ?, ?, ?, ?)", [(file_id, *item) for item in imports])
+                connection.executemany("INSERT INTO refs VALUES (?, ?, ?, ?)", [(file_id, *ref) for ref in references])
+
+    @staticmethod
+    def _delete_files(connection, file_ids):
+        for file_id in file_ids:
+            for table in ("symbols", "imports", "refs"):
+                connection.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+            connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def top_level_names(self, root):
+        """Nombres definidos a nivel de módulo en los archivos del proyecto."""
+        rows = self.connection().execute(
+            "SELECT DISTINCT symbols.name FROM symbols JOIN files ON files.id = symbols.file_id "
+            "WHERE files.root = ? AND symbols.scope = ''", (root,)
+        )
+        return [name for name, in rows]
+
+    def module_members(self, module, root=None):
+        """Miembros de un módulo del proyecto ({nombre: [tipo, firma, parámetros]}) o None."""
+        connection = self.connection()
+        query = "SELECT id, root FROM files WHERE module = ?" + (" AND root = ?" if root else "")
+        row = connection.execute(query, (module, root) if root else (module,)).fetchone()
+        if row is None:
+            return None
+        file_id, root = row
+        members = {
+            name: [kind, signature, params.split(",") if params else []]
+            for name, kind, signature, params in connection.execute(
+                "SELECT name, kind, signature, params FROM symbols WHERE file_id = ? AND scope = ''", (file_id,)
+            )
+        }
+        # Los submódulos de un paquete (del mismo proyecto) también son miembros
+        for submodule, in connection.execute("SELECT module FROM files WHERE module LIKE ? ESCAPE '\\' AND root = ?",
+                                            (module.replace("_", "\\_") + ".%", root)):
+            name = submodule[len(module) + 1:]
+            if "." not in name:
+                members.setdefault(name, ["module", None, []])
+        # Lo importado con "from ... import" también se puede importar desde este módulo
+        for imported_module, imported, alias in connection.execute(
+            "SELECT module, name, alias FROM imports WHERE file_id = ? AND name IS NOT NULL", (file_id,)
+        ):
+            members.setdefault(alias, ["alias", f"{imported_module}.{imported}", []])
+        return members
+
+    def class_members(self, module, class_name, root=None):
+        """Miembros de una clase definida en un módulo del proyecto root (o de cualquiera), o None."""
+        query = (
+            "SELECT symbols.name, kind, signature, params FROM symbols JOIN files ON files.id = symbols.file_id "
+            "WHERE files.module = ? AND symbols.scope = ?" + (" AND files.root = ?" if root else "")
+        )
+        rows = self.connection().execute(
+            query, (module, class_name, root) if root else (module, class_name)
+        ).fetchall()
+        if not rows:
+            return None
+        return {name: [kind, signature, params.split(",") if params else []] for name, kind, signature, params in rows}
+
+    def module_path(self, module, root=None):
+        """Ruta del archivo de un módulo, preferentemente del proyecto root, o None."""
+        row = self.connection().execute(
+            "SELECT path FROM files WHERE module = ? ORDER BY root != ? LIMIT 1", (module, root or "")
+        ).fetchone()
+        return row[0] if row else None
+
+    def definitions(self, name, module=None, root=None, limit=None):
+        """
+        Devuelve [(ruta, línea, columna)] de las definiciones de name: primero las del
+        proyecto root y las de nivel de módulo. Con module solo se buscan en ese módulo.
+        """
+        query = (
+            "SELECT files.path, symbols.line, symbols.col FROM symbols JOIN files ON files.id = symbols.file_id "
+            "WHERE symbols.name = ?"
+        )
+        parameters = [name]
+        if module is not None:
+            query += " AND files.module = ?"
+            parameters.append(module)
+        query += " ORDER BY files.root != ?, symbols.scope != '', files.path, symbols.line"
+        parameters.append(root or "")
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        return self.connection().execute(query, parameters).fetchall()
+
+    def references(self, name, root=None):
+        """Devuelve [(ruta, línea, columna)] de los usos de name."""
+        query = "SELECT files.path, refs.line, refs.col FROM refs JOIN files ON files.id = refs.file_id WHERE refs.name = ?"
+        parameters = [name]
+        if root is not None:
+            query += " AND files.root = ?"
+            parameters.append(root)
+        return self.connection().execute(query + " ORDER BY files.path, refs.line", parameters).fetchall()
+
+    def close(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None